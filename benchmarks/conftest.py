@@ -0,0 +1,23 @@
+"""Fixtures for all benchmarks."""
+
+import zigpy.quirks as zq
+
+import zhaquirks
+
+# Reuse the device fixtures of the tests
+from tests.conftest import (  # noqa: F401
+    app_controller_mock,
+    ieee_mock,
+    zigpy_device_from_quirk,
+)
+
+zhaquirks.setup()
+
+ALL_QUIRK_CLASSES = list(
+    dict.fromkeys(
+        quirk
+        for manufacturer in zq._DEVICE_REGISTRY._registry.values()
+        for model_quirk_list in manufacturer.values()
+        for quirk in model_quirk_list
+    )
+)
@@ -0,0 +1,375 @@
+"""Replay captured Zigbee traffic against the quirks.
+
+The capture is a JSON lines file. Device records describe the devices of the
+network, frame records are the raw ZCL frames they sent:
+
+    {"ieee": "00:15:8d:00:01:02:03:04", "manufacturer": "LUMI", "model": "lumi.weather"}
+    {"ieee": "00:15:8d:00:01:02:03:04", "endpoint": 1, "cluster": 0,
+     "data": "1c5f11120a...", "timestamp": 1650000000.5}
+
+Devices are built from the signature of their quirk, like the
+`zigpy_device_from_quirk` test fixture, and the frames are replayed through
+`Device.handle_message` at maximum speed or in real time. A device record may
+name its quirk class with "quirk" when several quirks share the model.
+
+    python -m benchmarks.replay capture.jsonl [--realtime] [--speed 10] [--json]
+"""
+
+import argparse
+import asyncio
+import collections
+import dataclasses
+import importlib
+import json
+import logging
+import math
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import zigpy.application
+import zigpy.device
+import zigpy.quirks as zq
+import zigpy.types as t
+from zigpy.zcl import foundation
+
+import zhaquirks
+from zhaquirks.const import (
+    DEVICE_TYPE,
+    ENDPOINTS,
+    INPUT_CLUSTERS,
+    MANUFACTURER,
+    MODEL,
+    MODELS_INFO,
+    OUTPUT_CLUSTERS,
+    PROFILE_ID,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+PERCENTILES = (50, 90, 99)
+
+
+@dataclasses.dataclass
+class Frame:
+    """Captured ZCL frame."""
+
+    ieee: t.EUI64
+    endpoint: int
+    cluster: int
+    data: bytes
+    timestamp: float
+    profile: Optional[int] = None
+
+
+@dataclasses.dataclass
+class ClusterStats:
+    """Replay statistics of a cluster."""
+
+    latencies: List[float] = dataclasses.field(default_factory=list)
+    errors: int = 0
+    events: collections.Counter = dataclasses.field(default_factory=collections.Counter)
+
+    def summary(self) -> Dict[str, Any]:
+        """Return the throughput, latency percentiles and events of the cluster."""
+        total = sum(self.latencies)
+        latencies = sorted(self.latencies)
+        summary = {
+            "frames": len(latencies),
+            "errors": self.errors,
+            "throughput": len(latencies) / total if total else None,
+            "latency_max": latencies[-1] if latencies else None,
+            "events": dict(self.events),
+        }
+        for percentile in PERCENTILES:
+            summary[f"latency_p{percentile}"] = _percentile(latencies, percentile)
+        return summary
+
+
+def _percentile(latencies: List[float], percentile: int) -> Optional[float]:
+    """Return the nearest rank percentile of the sorted latencies."""
+    if not latencies:
+        return None
+    rank = math.ceil(percentile / 100 * len(latencies))
+    return latencies[max(rank, 1) - 1]
+
+
+class _NullListener:
+    """Listener ignoring every event."""
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return lambda *args: None
+
+
+class ReplayApplication(zigpy.application.ControllerApplication):
+    """Application without radio, requests of the quirks are only counted."""
+
+    def __init__(self, *args, **kwargs):
+        """Init."""
+        super().__init__(*args, **kwargs)
+        self._ieee = t.EUI64(b"Replay78")
+        self._nwk = t.NWK(0x0000)
+        # Nothing is persisted, clusters report their updates to a no-op listener
+        self._dblistener = _NullListener()
+        self.requests = collections.Counter()
+
+    async def probe(self, *args):
+        """Probe method."""
+        return True
+
+    async def shutdown(self):
+        """Shutdown."""
+
+    async def startup(self, *args):
+        """Startup."""
+
+    async def permit_ncp(self, *args):
+        """Permit ncp."""
+
+    async def request(
+        self, device, profile, cluster, src_ep, dst_ep, sequence, data, **kwargs
+    ):
+        """Count the request."""
+        self.requests[(device.ieee, cluster)] += 1
+        return foundation.Status.SUCCESS, "replayed"
+
+    async def mrequest(self, *args, **kwargs):
+        """Multicast request."""
+        return foundation.Status.SUCCESS, "replayed"
+
+    async def broadcast(self, *args, **kwargs):
+        """Broadcast."""
+        return foundation.Status.SUCCESS, "replayed"
+
+
+class _EventRecorder:
+    """Cluster listener counting every event the cluster emits."""
+
+    def __init__(self, events: collections.Counter) -> None:
+        """Init."""
+        self._events = events
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def record(*args):
+            if name == "zha_send_event" and args:
+                self._events[f"{name}:{args[0]}"] += 1
+            else:
+                self._events[name] += 1
+
+        return record
+
+
+def _load_quirk(path: str):
+    module, _, name = path.rpartition(".")
+    return getattr(importlib.import_module(module), name)
+
+
+def _find_quirk(manufacturer: str, model: str):
+    quirks = zq._DEVICE_REGISTRY._registry.get(manufacturer, {}).get(model, [])
+    if len(quirks) > 1:
+        _LOGGER.warning(
+            "%s %s matches several quirks, using %s", manufacturer, model, quirks[0]
+        )
+    return quirks[0] if quirks else None
+
+
+def device_from_quirk(app, quirk, ieee: t.EUI64, nwk: t.NWK) -> zigpy.device.Device:
+    """Build a device from the signature of its quirk."""
+
+    manufacturer, model = quirk.signature.get(
+        MODELS_INFO,
+        (
+            (
+                quirk.signature.get(MANUFACTURER, "Replay Manufacturer"),
+                quirk.signature.get(MODEL, "Replay Model"),
+            ),
+        ),
+    )[0]
+
+    raw_device = zigpy.device.Device(app, ieee, nwk)
+    raw_device.manufacturer = manufacturer
+    raw_device.model = model
+    for ep_id, ep_data in quirk.signature.get(ENDPOINTS, {}).items():
+        ep = raw_device.add_endpoint(ep_id)
+        ep.profile_id = ep_data.get(PROFILE_ID, 0x0260)
+        ep.device_type = ep_data.get(DEVICE_TYPE, 0xFEDB)
+        for cluster_id in ep_data.get(INPUT_CLUSTERS, []):
+            ep.add_input_cluster(cluster_id)
+        for cluster_id in ep_data.get(OUTPUT_CLUSTERS, []):
+            ep.add_output_cluster(cluster_id)
+
+    device = quirk(app, ieee, nwk, raw_device)
+    app.devices[ieee] = device
+    return device
+
+
+def read_capture(lines: Iterable[str]) -> Tuple[List[Dict[str, Any]], List[Frame]]:
+    """Return the device and frame records of a capture."""
+
+    devices, frames = [], []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        if "data" not in record:
+            devices.append(record)
+            continue
+        frames.append(
+            Frame(
+                ieee=t.EUI64.convert(record["ieee"]),
+                endpoint=record["endpoint"],
+                cluster=record["cluster"],
+                data=bytes.fromhex(record["data"]),
+                timestamp=record.get("timestamp", 0.0),
+                profile=record.get("profile"),
+            )
+        )
+    frames.sort(key=lambda frame: frame.timestamp)
+    return devices, frames
+
+
+class Replay:
+    """Replay of captured frames against quirk devices."""
+
+    def __init__(self, device_records: Iterable[Dict[str, Any]]) -> None:
+        """Init."""
+        config = ReplayApplication.SCHEMA(
+            {"device": {"path": "/dev/null"}, "database": None}
+        )
+        self.app = ReplayApplication(config)
+        self.stats: Dict[
+            Tuple[t.EUI64, int, int], ClusterStats
+        ] = collections.defaultdict(ClusterStats)
+        self.unknown_frames = 0
+
+        for nwk, record in enumerate(device_records, start=1):
+            if "quirk" in record:
+                quirk = _load_quirk(record["quirk"])
+            else:
+                quirk = _find_quirk(record.get("manufacturer"), record.get("model"))
+            if quirk is None:
+                _LOGGER.warning("No quirk for device %s", record)
+                continue
+            ieee = t.EUI64.convert(record["ieee"])
+            device = device_from_quirk(self.app, quirk, ieee, t.NWK(nwk))
+            self._add_listeners(device)
+
+    def _add_listeners(self, device: zigpy.device.Device) -> None:
+        for ep_id, endpoint in device.endpoints.items():
+            if ep_id == 0:
+                continue
+            for clusters in (endpoint.in_clusters, endpoint.out_clusters):
+                for cluster_id, cluster in clusters.items():
+                    stats = self.stats[(device.ieee, ep_id, cluster_id)]
+                    cluster.add_listener(_EventRecorder(stats.events))
+
+    def handle_frame(self, frame: Frame) -> None:
+        """Process a captured frame, timing how long the device takes."""
+
+        device = self.app.devices.get(frame.ieee)
+        if device is None or frame.endpoint not in device.endpoints:
+            self.unknown_frames += 1
+            return
+
+        profile = frame.profile
+        if profile is None:
+            profile = device.endpoints[frame.endpoint].profile_id
+        stats = self.stats[(frame.ieee, frame.endpoint, frame.cluster)]
+
+        start = time.perf_counter()
+        try:
+            device.handle_message(
+                profile, frame.cluster, frame.endpoint, frame.endpoint, frame.data
+            )
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.debug("Error handling %s", frame, exc_info=True)
+            stats.errors += 1
+        stats.latencies.append(time.perf_counter() - start)
+
+    async def run(self, frames: List[Frame], speed: Optional[float] = None) -> None:
+        """Replay the frames, as fast as possible or at `speed` times real time."""
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for frame in frames:
+            if speed is not None:
+                delay = (frame.timestamp - frames[0].timestamp) / speed
+                await asyncio.sleep(max(0, start + delay - loop.time()))
+            self.handle_frame(frame)
+        # Let the tasks started by the quirks run
+        await asyncio.sleep(0)
+
+    def report(self) -> Dict[str, Any]:
+        """Return the replay statistics of the clusters that received frames."""
+
+        clusters = {
+            f"{ieee}/{endpoint}/0x{cluster:04x}": stats.summary()
+            for (ieee, endpoint, cluster), stats in sorted(self.stats.items())
+            if stats.latencies or stats.events
+        }
+        return {
+            "clusters": clusters,
+            "requests": {
+                f"{ieee}/0x{cluster:04x}": count
+                for (ieee, cluster), count in self.app.requests.items()
+            },
+            "unknown_frames": self.unknown_frames,
+        }
+
+
+def _format_report(report: Dict[str, Any]) -> str:
+    lines = []
+    for name, summary in report["clusters"].items():
+        if not summary["frames"]:
+            continue
+        percentiles = " ".join(
+            f"p{percentile}={summary[f'latency_p{percentile}'] * 1e6:.0f}us"
+            for percentile in PERCENTILES
+        )
+        lines.append(
+            f"{name}: {summary['frames']} frames, {summary['errors']} errors,"
+            f" {summary['throughput']:.0f} frames/s, {percentiles},"
+            f" {sum(summary['events'].values())} events"
+        )
+    lines.append(f"unknown frames: {report['unknown_frames']}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Replay a capture file and print the statistics."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", type=argparse.FileType("r"))
+    parser.add_argument(
+        "--realtime", action="store_true", help="replay with the captured timing"
+    )
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="speed up of the real time replay"
+    )
+    parser.add_argument("--json", action="store_true", help="print the JSON report")
+    args = parser.parse_args(argv)
+
+    zhaquirks.setup()
+    device_records, frames = read_capture(args.capture)
+
+    async def _replay():
+        replay = Replay(device_records)
+        await replay.run(frames, speed=args.speed if args.realtime else None)
+        return replay.report()
+
+    report = asyncio.run(_replay())
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print(_format_report(report))
+
+
+if __name__ == "__main__":
+    main()
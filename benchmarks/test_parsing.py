@@ -0,0 +1,118 @@
+"""Benchmarks of parsing device reports."""
+
+from unittest import mock
+
+import pytest
+
+from zhaquirks.tuya import TuyaData, TuyaDPType
+import zhaquirks.tuya.ts0601_siren
+import zhaquirks.tuya.ts0601_trv
+from zhaquirks.xbee import XBeeCommon
+from zhaquirks.xiaomi import BasicCluster
+
+# Aqara heartbeats, reported every 50-60 minutes by every Xiaomi device
+AQARA_HEARTBEATS = {
+    "wleak": (
+        b"\x1c_\x11\x12\n"
+        b'\x01\xffB"\x01!\xb3\x0b\x03(\x17\x04!\xa8C\x05!\xa7\x00\x06$\x15'
+        b"\x00\x14\x00\x00\x08!\x04\x02\n!\x00\x00d\x10\x01"
+    ),
+    "wleak_model": (
+        b"\x1c_\x11\x12\n"
+        b'\x05\x00B\x15lumi.sensor_wleak.aq1\x01\xffB"\x01!\xb3\x0b\x03('
+        b"\x17\x04!\xa8C\x05!\xa7\x00\x06$\x00\x00\x00\x00\x00\x08!\x04"
+        b"\x02\n!\x00\x00d\x10\x01"
+    ),
+}
+
+TUYA_DATAPOINTS = {
+    TuyaDPType.BOOL: b"\x01\x00\x01\x01",
+    TuyaDPType.VALUE: b"\x02\x00\x04\x00\x00\x00\xb3",
+    TuyaDPType.STRING: b"\x03\x00\x05hello",
+    TuyaDPType.ENUM: b"\x04\x00\x01\x02",
+    TuyaDPType.BITMAP: b"\x05\x00\x02\x01\x80",
+}
+
+# Moes TRV window detection, a RAW datapoint decoded by the quirk
+TUYA_RAW_REPORT = b"\tp\x02\x00\x02\x68\x00\x00\x03\x01\x10\x05"
+
+TUYA_SIREN_REPORTS = (
+    b"\tp\x02\x00\x02i\x02\x00\x04\x00\x00\x00\xb3",
+    b"\tp\x02\x00\x02j\x02\x00\x04\x00\x00\x00U",
+    b"\t\t\x02\x00\x04h\x01\x00\x01\x01",
+    b"\t\t\x02\x00\x04h\x01\x00\x01\x00",
+)
+
+XBEE_IO_SAMPLES = {
+    "digital": bytes.fromhex("01" "1fff" "00" "0aaa"),
+    "analog": bytes.fromhex("01" "0000" "8f" "0100" "0200" "0300" "03ff" "0c80"),
+    "sample_sets": bytes.fromhex("04" "0009" "81" + "000802000c80" * 4),
+}
+
+
+@pytest.mark.parametrize("cached", (True, False), ids=("cached", "uncached"))
+@pytest.mark.parametrize("report", AQARA_HEARTBEATS)
+def test_xiaomi_deserialize(benchmark, report, cached):
+    """Benchmark deserializing Aqara heartbeat reports."""
+
+    cluster = BasicCluster(mock.MagicMock())
+    data = AQARA_HEARTBEATS[report]
+
+    if cached:
+        cluster.deserialize(data)
+        hdr, args = benchmark(cluster.deserialize, data)
+    else:
+        hdr, args = benchmark.pedantic(
+            cluster.deserialize,
+            args=(data,),
+            setup=cluster.attr_report_cache.clear,
+            rounds=2000,
+        )
+    assert args
+
+
+@pytest.mark.parametrize("dp_type", TUYA_DATAPOINTS, ids=lambda dp: dp.name)
+def test_tuya_data_payload(benchmark, dp_type):
+    """Benchmark decoding the payload of each datapoint type."""
+
+    data, _ = TuyaData.deserialize(TUYA_DATAPOINTS[dp_type])
+    assert benchmark(lambda: data.payload) is not None
+
+
+async def test_tuya_raw_datapoint(benchmark, zigpy_device_from_quirk):
+    """Benchmark decoding a RAW datapoint report, which the quirk handles."""
+
+    device = zigpy_device_from_quirk(zhaquirks.tuya.ts0601_trv.MoesHY368_Type1)
+    tuya_cluster = device.endpoints[1].tuya_manufacturer
+
+    def handle_report():
+        hdr, args = tuya_cluster.deserialize(TUYA_RAW_REPORT)
+        tuya_cluster.handle_cluster_request(hdr, args)
+
+    benchmark(handle_report)
+    assert device.endpoints[1].on_off.get("window_detection_temperature") == 1600
+
+
+async def test_tuya_handle_cluster_request(benchmark, zigpy_device_from_quirk):
+    """Benchmark handling Tuya datapoint reports."""
+
+    device = zigpy_device_from_quirk(zhaquirks.tuya.ts0601_siren.TuyaSiren)
+    tuya_cluster = device.endpoints[1].tuya_manufacturer
+    reports = [tuya_cluster.deserialize(report) for report in TUYA_SIREN_REPORTS]
+
+    def handle_reports():
+        for hdr, args in reports:
+            tuya_cluster.handle_cluster_request(hdr, args)
+
+    benchmark(handle_reports)
+    assert device.endpoints[1].on_off.get("on_off") == 0
+
+
+@pytest.mark.parametrize("sample", XBEE_IO_SAMPLES)
+def test_xbee_io_sample_deserialize(benchmark, sample):
+    """Benchmark deserializing XBee IO samples."""
+
+    io_sample = XBeeCommon.DigitalIOCluster.IOSample
+    result, rest = benchmark(io_sample.deserialize, XBEE_IO_SAMPLES[sample])
+    assert result["samples"]
+    assert rest == b""
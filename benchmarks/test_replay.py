@@ -0,0 +1,27 @@
+"""Benchmark of replaying captured traffic."""
+
+import pathlib
+
+from benchmarks.replay import Replay, read_capture
+
+SAMPLE_CAPTURE = pathlib.Path(__file__).parent / "captures" / "sample.jsonl"
+
+
+async def test_replay_sample_capture(benchmark):
+    """Benchmark replaying the sample capture at maximum speed."""
+
+    with SAMPLE_CAPTURE.open() as capture:
+        device_records, frames = read_capture(capture)
+    replay = Replay(device_records)
+
+    def replay_frames():
+        for frame in frames:
+            replay.handle_frame(frame)
+
+    benchmark(replay_frames)
+
+    report = replay.report()
+    assert report["unknown_frames"] == 0
+    assert report["clusters"]
+    for summary in report["clusters"].values():
+        assert summary["errors"] == 0
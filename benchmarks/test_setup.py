@@ -0,0 +1,38 @@
+"""Benchmarks of loading quirks and matching devices."""
+
+import subprocess
+import sys
+
+import pytest
+import zigpy.quirks as zq
+
+from benchmarks.conftest import ALL_QUIRK_CLASSES
+from zhaquirks.const import LAZY_LOAD_QUIRKS
+
+
+@pytest.mark.parametrize(
+    "config", (None, {LAZY_LOAD_QUIRKS: True}), ids=("eager", "lazy")
+)
+def test_setup_import(benchmark, config):
+    """Benchmark importing zhaquirks and registering the quirks in a new process."""
+
+    code = f"import zhaquirks; zhaquirks.setup({config!r})"
+    benchmark.pedantic(
+        subprocess.run,
+        args=([sys.executable, "-c", code],),
+        kwargs={"check": True},
+        rounds=5,
+        iterations=1,
+    )
+
+
+async def test_match_all_signatures(benchmark, zigpy_device_from_quirk):
+    """Benchmark matching a device for the signature of every registered quirk."""
+
+    matcher = zq._DEVICE_REGISTRY.get_device.__self__
+    devices = [
+        zigpy_device_from_quirk(quirk, apply_quirk=False) for quirk in ALL_QUIRK_CLASSES
+    ]
+
+    quirks = benchmark(lambda: [matcher.get_quirk(device) for device in devices])
+    assert all(quirks)
@@ -23,6 +23,7 @@ setup(
     license="Apache License Version 2.0",
     keywords="zha quirks homeassistant hass",
     packages=find_packages(exclude=["tests"]),
+    package_data={"zhaquirks": ["quirks_manifest.json"]},
     python_requires=">=3",
     install_requires=["zigpy>=0.42.0"],
     tests_require=["pytest"],
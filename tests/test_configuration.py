@@ -0,0 +1,272 @@
+"""Tests for writing the configuration of bound clusters."""
+
+import asyncio
+import functools
+import gc
+from types import SimpleNamespace
+from unittest import mock
+import weakref
+
+from asynctest import CoroutineMock
+import pytest
+import zigpy.exceptions
+from zigpy.zcl import foundation
+import zigpy.zdo.types as zdo_t
+
+import zhaquirks
+from zhaquirks.configuration import (
+    ConfigurationScheduler,
+    get_configuration_scheduler,
+    pack_write_records,
+    write_attr_config,
+)
+import zhaquirks.osram.lightifyx4
+
+from tests.conftest import MockApp
+
+zhaquirks.setup()
+
+Status = foundation.Status
+
+
+def _write_response(*failures):
+    if not failures:
+        return [[foundation.WriteAttributesStatusRecord(Status.SUCCESS)]]
+    return [
+        [
+            foundation.WriteAttributesStatusRecord(status, attrid)
+            for attrid, status in failures
+        ]
+    ]
+
+
+def test_pack_write_records(zigpy_device_from_quirk):
+    """Test records are packed in order into frames of at most the payload size."""
+
+    cluster = (
+        zigpy_device_from_quirk(zhaquirks.osram.lightifyx4.LightifyX4)
+        .endpoints[1]
+        .osram_cluster
+    )
+    # uint8 records take 4 bytes, uint16 records 5 bytes
+    records = cluster._write_attr_records(cluster.attr_config)
+
+    frames = pack_write_records(records, 14)
+    assert [record for frame in frames for record in frame] == records
+    assert [[record.attrid for record in frame] for frame in frames][:2] == [
+        [0x000A, 0x000B, 0x000C],
+        [0x000D, 0x0019, 0x001A],
+    ]
+    assert pack_write_records(records, 3) == [[record] for record in records]
+    assert pack_write_records(records, 1000) == [records]
+
+
+@pytest.mark.parametrize("quirk", (zhaquirks.osram.lightifyx4.LightifyX4,))
+async def test_bind_writes_attr_config(zigpy_device_from_quirk, quirk):
+    """Test the configuration is written in as few frames as the device allows."""
+
+    device = zigpy_device_from_quirk(quirk)
+    device.node_desc = zdo_t.NodeDescriptor(maximum_incoming_transfer_size=40)
+    cluster = device.endpoints[1].osram_cluster
+
+    responses = [
+        _write_response(
+            (0x000C, Status.HARDWARE_FAILURE), (0x0019, Status.UNSUPPORTED_ATTRIBUTE)
+        ),
+        _write_response(),
+        zigpy.exceptions.DeliveryError("Failed"),
+        _write_response(),
+        _write_response((0x0019, Status.UNSUPPORTED_ATTRIBUTE)),
+    ]
+    with mock.patch("zigpy.zcl.Cluster.bind", CoroutineMock()), mock.patch.object(
+        cluster, "_write_attributes", CoroutineMock(side_effect=responses)
+    ) as write_attributes:
+        await cluster.bind()
+
+        frames = [
+            [record.attrid for record in call[0][0]]
+            for call in write_attributes.call_args_list
+        ]
+        # 35 bytes of records fit in a manufacturer specific frame
+        assert frames == [
+            [0x000A, 0x000B, 0x000C, 0x000D, 0x0019, 0x001A, 0x001B],
+            [0x001C, 0x001D, 0x001E, 0x002C, 0x002D, 0x002E, 0x002F],
+            [0x000C],
+            [0x000C],
+        ]
+        assert write_attributes.call_args[1]["manufacturer"] == (
+            zhaquirks.osram.lightifyx4.OSRAM_MFG_CODE
+        )
+        assert 0x0019 not in cluster._attr_cache
+        assert cluster._attr_cache[0x000C] == 0xFFFF
+
+        # only attributes the device doesn't have yet are written again
+        write_attributes.reset_mock()
+        failed = await write_attr_config(
+            cluster,
+            cluster.attr_config,
+            manufacturer=zhaquirks.osram.lightifyx4.OSRAM_MFG_CODE,
+        )
+        assert failed == {0x0019: Status.UNSUPPORTED_ATTRIBUTE}
+        assert [
+            [record.attrid for record in call[0][0]]
+            for call in write_attributes.call_args_list
+        ] == [[0x0019]]
+
+
+def _device(app, ieee, mains_powered, parent=None):
+    """Device with a node descriptor, end devices are sleepy."""
+
+    flags = zdo_t.NodeDescriptor.MACCapabilityFlags
+    device = SimpleNamespace(
+        ieee=ieee,
+        application=app,
+        node_desc=zdo_t.NodeDescriptor(
+            logical_type=zdo_t.LogicalType.Router
+            if mains_powered
+            else zdo_t.LogicalType.EndDevice,
+            mac_capability_flags=flags.MainsPowered | flags.RxOnWhenIdle
+            if mains_powered
+            else flags.AllocateAddress,
+        ),
+        neighbors=[],
+        is_initialized=True,
+        handle_message=mock.MagicMock(),
+        debug=mock.MagicMock(),
+    )
+    if parent is not None:
+        parent.neighbors.append(SimpleNamespace(device=device))
+    app.devices[ieee] = device
+    return device
+
+
+async def test_configuration_scheduler_limits(MockAppController):
+    """Test configurations are capped per network and parent, mains powered first."""
+
+    app = MockAppController
+    scheduler = ConfigurationScheduler(app, max_concurrent=2, max_per_parent=1)
+    parent = _device(app, "parent", mains_powered=True)
+    sleepy_1 = _device(app, "sleepy_1", mains_powered=False, parent=parent)
+    sleepy_2 = _device(app, "sleepy_2", mains_powered=False, parent=parent)
+    router_1 = _device(app, "router_1", mains_powered=True)
+    router_2 = _device(app, "router_2", mains_powered=True)
+
+    started = []
+    done = {}
+
+    async def configure(device):
+        started.append(device.ieee)
+        done[device.ieee] = asyncio.Event()
+        await done[device.ieee].wait()
+        # configuring the same device again from within runs right away
+        return await scheduler.run(device, lambda: asyncio.sleep(0, device.ieee))
+
+    tasks = [
+        asyncio.ensure_future(
+            scheduler.run(device, functools.partial(configure, device))
+        )
+        for device in (sleepy_1, sleepy_2, router_1, router_2)
+    ]
+    await asyncio.sleep(0.01)
+    assert set(started) == {"sleepy_1", "router_1"}
+
+    # mains powered devices go first, sleepy_2 waits for its parent anyway
+    done["sleepy_1"].set()
+    await asyncio.sleep(0.01)
+    assert started[2:] == ["router_2"]
+
+    done["router_1"].set()
+    await asyncio.sleep(0.01)
+    assert started[2:] == ["router_2", "sleepy_2"]
+    assert scheduler.in_flight == 2
+
+    done["router_2"].set()
+    done["sleepy_2"].set()
+    assert await asyncio.gather(*tasks) == [
+        "sleepy_1",
+        "sleepy_2",
+        "router_1",
+        "router_2",
+    ]
+    assert scheduler.in_flight == 0
+    assert scheduler._children is None
+
+
+async def test_configuration_scheduler_device_slot(MockAppController):
+    """Test the clusters of a device bound at the same time share its slot."""
+
+    app = MockAppController
+    scheduler = ConfigurationScheduler(app, max_concurrent=1)
+    router_1 = _device(app, "router_1", mains_powered=True)
+    router_2 = _device(app, "router_2", mains_powered=True)
+
+    started = []
+    done = asyncio.Event()
+
+    async def configure(device, cluster):
+        started.append((device.ieee, cluster))
+        await done.wait()
+
+    tasks = [
+        asyncio.ensure_future(
+            scheduler.run(device, functools.partial(configure, device, cluster))
+        )
+        for device, cluster in (
+            (router_1, "on_off"),
+            (router_2, "on_off"),
+            (router_1, "level"),
+        )
+    ]
+    await asyncio.sleep(0.01)
+    assert started == [("router_1", "on_off"), ("router_1", "level")]
+    assert scheduler.in_flight == 1
+
+    done.set()
+    await asyncio.gather(*tasks)
+    assert started[2:] == [("router_2", "on_off")]
+    assert scheduler.in_flight == 0
+    assert not scheduler._slots
+
+
+async def test_configuration_scheduler_sleepy_retry(MockAppController):
+    """Test the timed out configuration of a sleepy device is retried at check-in."""
+
+    app = MockAppController
+    scheduler = get_configuration_scheduler(app)
+    assert get_configuration_scheduler(app) is scheduler
+    sleepy = _device(app, "sleepy", mains_powered=False)
+    attempts = []
+
+    async def configure():
+        attempts.append(len(attempts) + 1)
+        if len(attempts) == 1:
+            await asyncio.sleep(1)
+        return "configured"
+
+    with mock.patch("zhaquirks.configuration.SLEEPY_CONFIGURATION_TIMEOUT", 0.01):
+        with pytest.raises(asyncio.TimeoutError):
+            await scheduler.run(sleepy, configure)
+        assert scheduler.in_flight == 0
+
+        # the device checks in
+        app.handle_message(sleepy, 0x0104, 0x0006, 1, 1, b"")
+        assert len(scheduler._retries) == 1
+        await asyncio.sleep(0.01)
+        assert not scheduler._retries
+
+    assert attempts == [1, 2]
+    assert not scheduler._deferred
+
+
+def test_configuration_scheduler_releases_application():
+    """Test deferred configurations don't keep the application alive."""
+
+    app = MockApp(MockApp.SCHEMA({"device": {"path": "/dev/null"}, "database": None}))
+    scheduler = get_configuration_scheduler(app)
+    sleepy = _device(app, "sleepy", mains_powered=False)
+    scheduler._deferred[sleepy.ieee] = [(functools.partial(mock.Mock(), sleepy), 1)]
+
+    app_ref = weakref.ref(app)
+    del app, scheduler, sleepy
+    gc.collect()
+    assert app_ref() is None
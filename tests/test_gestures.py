@@ -0,0 +1,138 @@
+"""Tests for the button gesture engine."""
+import asyncio
+from unittest import mock
+
+import pytest
+from zigpy.zcl import foundation
+
+import zhaquirks
+from zhaquirks.const import (
+    CLICK_TYPE,
+    COMMAND_CLICK,
+    COMMAND_HOLD,
+    COMMAND_RELEASE,
+    COMMAND_SINGLE,
+    ZHA_SEND_EVENT,
+)
+from zhaquirks.gestures import ButtonGestures
+import zhaquirks.philips.rwl022
+import zhaquirks.xiaomi.mija.sensor_switch
+
+zhaquirks.setup()
+
+MULTI_CLICK_S = 0.02
+
+
+async def test_multi_clicks_per_button():
+    """Test presses are counted for each button on its own."""
+
+    on_clicks = mock.MagicMock()
+    gestures = ButtonGestures(on_clicks, multi_click_s=MULTI_CLICK_S)
+
+    gestures.press("on", 1)
+    gestures.press("off", 2)
+    gestures.press("on", 3)
+    assert on_clicks.call_count == 0
+
+    await asyncio.sleep(MULTI_CLICK_S * 3)
+    assert sorted(on_clicks.call_args_list) == [
+        mock.call("off", 1, 2),
+        mock.call("on", 2, 3),
+    ]
+
+    # a press after the multi click window starts over
+    gestures.press("on")
+    await asyncio.sleep(MULTI_CLICK_S * 3)
+    assert on_clicks.call_args == mock.call("on", 1, None)
+
+
+async def test_max_clicks():
+    """Test gestures are reported as soon as the maximum clicks are reached."""
+
+    on_clicks = mock.MagicMock()
+    gestures = ButtonGestures(on_clicks, multi_click_s=MULTI_CLICK_S, max_clicks=2)
+
+    gestures.press("on")
+    gestures.press("on")
+    on_clicks.assert_called_once_with("on", 2, None)
+
+
+async def test_hold_and_release():
+    """Test holds are reported and clicks are reported on release."""
+
+    on_clicks = mock.MagicMock()
+    on_hold = mock.MagicMock()
+    on_release = mock.MagicMock()
+    gestures = ButtonGestures(
+        on_clicks,
+        on_hold=on_hold,
+        on_release=on_release,
+        multi_click_s=0,
+        hold_s=MULTI_CLICK_S,
+    )
+
+    gestures.press("button")
+    gestures.release("button")
+    on_clicks.assert_called_once_with("button", 1, None)
+
+    gestures.press("button")
+    await asyncio.sleep(MULTI_CLICK_S * 3)
+    on_hold.assert_called_once_with("button", None)
+    assert on_release.call_count == 0
+
+    gestures.release("button")
+    on_release.assert_called_once_with("button", None)
+    assert on_clicks.call_count == 1
+
+
+@pytest.mark.parametrize("quirk", (zhaquirks.philips.rwl022.PhilipsRWL022,))
+async def test_philips_remotes_independent(zigpy_device_from_quirk, quirk):
+    """Test presses on two Philips remotes don't reset each other."""
+
+    events = []
+    clusters = []
+    for _ in range(2):
+        device = zigpy_device_from_quirk(quirk)
+        cluster = device.endpoints[1].philips_remote_cluster
+        cluster.button_gestures.multi_click_s = MULTI_CLICK_S
+        cluster.listener_event = mock.MagicMock(
+            side_effect=lambda *args, c=cluster: events.append((c, args[1]))
+        )
+        clusters.append(cluster)
+
+    hdr = foundation.ZCLHeader.cluster(1, 0)
+    press = [1, 0x30, 0, 0x21, 0, 0]
+    clusters[0].handle_cluster_request(hdr, press)
+    clusters[1].handle_cluster_request(hdr, press)
+    clusters[0].handle_cluster_request(hdr, press)
+
+    await asyncio.sleep(MULTI_CLICK_S * 3)
+    assert sorted(events, key=lambda e: e[1]) == [
+        (clusters[0], "on_double_press"),
+        (clusters[1], "on_press"),
+    ]
+
+
+@pytest.mark.parametrize("quirk", (zhaquirks.xiaomi.mija.sensor_switch.MijaButton,))
+async def test_mija_button_gestures(zigpy_device_from_quirk, quirk):
+    """Test the Mija button click, hold and release events."""
+
+    device = zigpy_device_from_quirk(quirk)
+    cluster = device.endpoints[1].out_clusters[0x0006]
+    cluster.button_gestures.hold_s = MULTI_CLICK_S
+
+    with mock.patch.object(cluster, "listener_event") as listener_event:
+        cluster._update_attribute(0, 0)
+        cluster._update_attribute(0, 1)
+        listener_event.assert_any_call(
+            ZHA_SEND_EVENT, COMMAND_CLICK, {CLICK_TYPE: COMMAND_SINGLE}
+        )
+
+        listener_event.reset_mock()
+        cluster._update_attribute(0, 0)
+        await asyncio.sleep(MULTI_CLICK_S * 3)
+        listener_event.assert_any_call(ZHA_SEND_EVENT, COMMAND_HOLD, [])
+
+        listener_event.reset_mock()
+        cluster._update_attribute(0, 1)
+        listener_event.assert_any_call(ZHA_SEND_EVENT, COMMAND_RELEASE, [])
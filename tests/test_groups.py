@@ -0,0 +1,100 @@
+"""Tests for the groups the coordinator joined."""
+
+import asyncio
+import gc
+from unittest import mock
+import weakref
+
+from asynctest import CoroutineMock
+import pytest
+from zigpy.zcl.clusters.general import LevelControl, OnOff
+
+import zhaquirks
+from zhaquirks import GroupBoundCluster, groups
+from zhaquirks.groups import get_coordinator_groups
+import zhaquirks.lutron.lzl4bwhl01remote
+
+from tests.conftest import MockApp
+
+zhaquirks.setup()
+
+GROUP_ID = GroupBoundCluster.COORDINATOR_GROUP_ID
+
+
+@pytest.fixture
+def coordinator(MockAppController):
+    """Coordinator joining groups when asked to, unless told to fail."""
+
+    app = MockAppController
+    coordinator = app.add_device(app.ieee, 0x0000)
+    endpoint = coordinator.add_endpoint(1)
+    coordinator.fail = False
+
+    async def add_to_group(group_id, name=None):
+        await asyncio.sleep(0)
+        if not coordinator.fail:
+            app.groups.add_group(group_id, name).add_member(endpoint)
+
+    with mock.patch.object(
+        coordinator, "add_to_group", CoroutineMock(side_effect=add_to_group)
+    ):
+        yield coordinator
+
+
+@pytest.mark.parametrize(
+    "quirk", (zhaquirks.lutron.lzl4bwhl01remote.LutronLZL4BWHL01Remote,)
+)
+async def test_group_bound_clusters_join_once(
+    zigpy_device_from_quirk, quirk, coordinator
+):
+    """Test the coordinator joins the group once for all bound clusters."""
+
+    device = zigpy_device_from_quirk(quirk)
+    out_clusters = device.endpoints[1].out_clusters
+    with mock.patch.object(device.zdo, "Bind_req", CoroutineMock()) as bind_req:
+        await asyncio.gather(
+            out_clusters[OnOff.cluster_id].bind(),
+            out_clusters[LevelControl.cluster_id].bind(),
+        )
+        await out_clusters[OnOff.cluster_id].bind()
+
+    assert bind_req.call_count == 3
+    assert coordinator.add_to_group.call_count == 1
+    assert GROUP_ID in get_coordinator_groups(device.application)
+
+
+async def test_coordinator_groups_invalidated(MockAppController, coordinator):
+    """Test groups are joined again once the coordinator isn't a member anymore."""
+
+    groups = get_coordinator_groups(MockAppController)
+    assert get_coordinator_groups(MockAppController) is groups
+
+    # joining failed, the coordinator isn't a member
+    coordinator.fail = True
+    await groups.join(GROUP_ID)
+    assert GROUP_ID not in groups
+    coordinator.fail = False
+    await groups.join(GROUP_ID)
+    await groups.join(GROUP_ID)
+    assert coordinator.add_to_group.call_count == 2
+
+    MockAppController.groups[GROUP_ID].remove_member(coordinator.endpoints[1])
+    assert GROUP_ID not in groups
+    await groups.join(GROUP_ID)
+    assert coordinator.add_to_group.call_count == 3
+
+    MockAppController.groups.pop(GROUP_ID)
+    assert GROUP_ID not in groups
+
+
+def test_coordinator_groups_release_application():
+    """Test the groups of a network don't keep its application alive."""
+
+    app = MockApp(MockApp.SCHEMA({"device": {"path": "/dev/null"}, "database": None}))
+    get_coordinator_groups(app)
+    assert app in groups._COORDINATOR_GROUPS
+
+    app_ref = weakref.ref(app)
+    del app
+    gc.collect()
+    assert app_ref() is None
@@ -0,0 +1,112 @@
+"""Tests for the quirk hot path instrumentation."""
+
+import asyncio
+
+import pytest
+from zigpy.quirks import CustomCluster
+from zigpy.zcl.clusters.general import OnOff
+
+import zhaquirks
+from zhaquirks import Bus, LocalDataCluster, instrumentation
+from zhaquirks.instrumentation import StatsKey
+import zhaquirks.tuya.ts0601_siren
+
+zhaquirks.setup()
+
+SIREN = "zhaquirks.tuya.ts0601_siren.TuyaSiren"
+ZCL_TUYA_SIREN_TEMPERATURE = b"\tp\x02\x00\x02i\x02\x00\x04\x00\x00\x00\xb3"
+ZCL_TUYA_SIREN_ON = b"\t\t\x02\x00\x04h\x01\x00\x01\x01"
+
+
+class SlowWriteOnOff(CustomCluster, OnOff):
+    """On/off cluster awaiting the network when writing."""
+
+    async def write_attributes(self, attributes, manufacturer=None):
+        """Fail after awaiting the network."""
+        await asyncio.sleep(0.05)
+        raise RuntimeError("Write failed")
+
+
+@pytest.fixture
+def stats():
+    """Instrumentation enabled with a fresh stats registry."""
+
+    registry = instrumentation.StatsRegistry()
+    instrumentation.enable(registry)
+    yield registry
+    instrumentation.disable()
+
+
+@pytest.mark.parametrize("quirk", (zhaquirks.tuya.ts0601_siren.TuyaSiren,))
+async def test_instrumentation_records_overrides(zigpy_device_from_quirk, quirk, stats):
+    """Test the quirk overrides and bus events are counted per quirk and cluster."""
+
+    device = zigpy_device_from_quirk(quirk)
+    tuya_cluster = device.endpoints[1].tuya_manufacturer
+
+    for frame in (ZCL_TUYA_SIREN_TEMPERATURE, ZCL_TUYA_SIREN_ON):
+        hdr, args = tuya_cluster.deserialize(frame)
+        tuya_cluster.handle_message(hdr, args)
+
+    snapshot = stats.snapshot()
+    tuya = "zhaquirks.tuya.ts0601_siren.TuyaManufClusterSiren"
+    assert snapshot[StatsKey(SIREN, tuya, "handle_cluster_request")].calls == 2
+    assert snapshot[StatsKey(SIREN, tuya, "_update_attribute")].calls == 2
+    bus_event = StatsKey(SIREN, "zhaquirks.Bus:temperature_reported", "listener_event")
+    assert snapshot[bus_event].calls == 1
+    assert instrumentation._bus_quirks[device.temperature_bus] == SIREN
+
+    # calls through super() are only counted once
+    on_off = "zhaquirks.tuya.ts0601_siren.TuyaSirenOnOff"
+    update = snapshot[StatsKey(SIREN, on_off, "_update_attribute")]
+    assert update.calls == 1
+    assert update.errors == 0
+    assert 0 < update.mean <= update.max <= update.total
+
+    # snapshots are copies
+    stats.reset()
+    assert update.calls == 1
+    assert stats.snapshot() == {}
+
+
+async def test_instrumentation_times_coroutine_steps(zigpy_device_from_quirk, stats):
+    """Test coroutines are only timed while running on the event loop."""
+
+    device = zigpy_device_from_quirk(zhaquirks.tuya.ts0601_siren.TuyaSiren)
+    cluster = SlowWriteOnOff(device.endpoints[1])
+    instrumentation.instrument_clusters()
+
+    # instrumented coroutine functions stay native coroutine functions
+    assert asyncio.iscoroutinefunction(SlowWriteOnOff.write_attributes)
+    with pytest.raises(RuntimeError):
+        await asyncio.create_task(cluster.write_attributes({"on_off": 1}))
+
+    key = StatsKey(SIREN, f"{__name__}.SlowWriteOnOff", "write_attributes")
+    write = stats.snapshot()[key]
+    assert write.calls == 1
+    assert write.errors == 1
+    assert write.total < 0.05
+
+
+def test_instrumentation_disable_restores_methods(stats):
+    """Test disabling the instrumentation restores the original methods."""
+
+    original = LocalDataCluster.__dict__["_update_attribute"]
+    assert instrumentation.is_enabled()
+    assert original.__wrapped__
+    assert "listener_event" in Bus.__dict__
+
+    instrumentation.disable()
+    assert not instrumentation.is_enabled()
+    assert LocalDataCluster.__dict__["_update_attribute"] is original.__wrapped__
+    assert "listener_event" not in Bus.__dict__
+
+
+def test_setup_enables_instrumentation():
+    """Test the instrumentation is enabled from the setup config."""
+
+    try:
+        zhaquirks.setup({zhaquirks.INSTRUMENT_QUIRKS: True})
+        assert instrumentation.is_enabled()
+    finally:
+        instrumentation.disable()
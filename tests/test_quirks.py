@@ -1,7 +1,13 @@
 """General quirk tests."""
 
+import asyncio
+import json
+import random
+import shutil
+import sys
 from unittest import mock
 
+from asynctest import CoroutineMock
 import pytest
 import zigpy.device
 import zigpy.endpoint
@@ -9,6 +15,7 @@ import zigpy.profiles
 import zigpy.quirks as zq
 import zigpy.types
 import zigpy.zcl as zcl
+from zigpy.zcl import foundation
 import zigpy.zdo.types
 
 import zhaquirks
@@ -24,8 +31,12 @@ from zhaquirks.const import (
     PROFILE_ID,
     SKIP_CONFIGURATION,
 )
+import zhaquirks.tuya.ts011f_plug
+import zhaquirks.tuya.ts0601_din_power
 from zhaquirks.xiaomi import XIAOMI_NODE_DESC
 
+from tests.common import ClusterListener
+
 zhaquirks.setup()
 
 ALL_QUIRK_CLASSES = []
@@ -486,3 +497,518 @@ class TestReplacementISWZPR1WP13(CustomDevice):
 
     assert not isinstance(zq.get_device(device), zhaquirks.bosch.motion.ISWZPR1WP13)
     assert type(zq.get_device(device)).__name__ == "TestReplacementISWZPR1WP13"
+
+
+LAZY_MANIFEST = {
+    "version": 2,
+    "modules": {
+        "zhaquirks.vendor.quirk_a": {
+            "quirks": [{"class": "QuirkA", "models_info": [["manuf_a", "model_a"]]}]
+        },
+        "zhaquirks.vendor.quirk_b": {
+            "quirks": [
+                {
+                    "class": "QuirkB",
+                    "models_info": [["manuf_b", "model_b"], ["manuf_a", "model_a"]],
+                }
+            ]
+        },
+    },
+}
+
+
+def test_lazy_quirk_loader():
+    """Test quirk modules are only imported when their signature is looked up."""
+
+    loader = zhaquirks.manifest.LazyQuirkLoader(LAZY_MANIFEST)
+    registry = zq.DeviceRegistry()
+    zhaquirks.manifest.install_lazy_registry(loader, registry)
+
+    with mock.patch("zhaquirks.manifest.importlib.import_module") as import_mock:
+        assert zq.get_quirk_list("manuf_c", "model_c", registry) == []
+        assert import_mock.call_count == 0
+
+        zq.get_quirk_list("manuf_b", "model_b", registry)
+        assert import_mock.mock_calls == [mock.call("zhaquirks.vendor.quirk_b")]
+
+        zq.get_quirk_list("manuf_a", "model_a", registry)
+        zq.get_quirk_list("manuf_a", "model_a", registry)
+        assert import_mock.mock_calls == [
+            mock.call("zhaquirks.vendor.quirk_b"),
+            mock.call("zhaquirks.vendor.quirk_a"),
+        ]
+
+    assert loader.imported == {"zhaquirks.vendor.quirk_a", "zhaquirks.vendor.quirk_b"}
+
+
+def test_lazy_quirk_loader_get_device(zigpy_device_from_quirk):
+    """Test zigpy finds quirks registered by a module imported on demand."""
+
+    quirk = zhaquirks.bosch.motion.ISWZPR1WP13
+    device = zigpy_device_from_quirk(quirk, apply_quirk=False)
+    manifest = {
+        "version": 2,
+        "modules": {
+            quirk.__module__: {
+                "quirks": [
+                    {
+                        "class": quirk.__name__,
+                        "models_info": [[device.manufacturer, device.model]],
+                    }
+                ]
+            }
+        },
+    }
+
+    loader = zhaquirks.manifest.LazyQuirkLoader(manifest)
+    registry = zq.DeviceRegistry()
+    zhaquirks.manifest.install_lazy_registry(loader, registry)
+
+    with mock.patch(
+        "zhaquirks.manifest.importlib.import_module",
+        side_effect=lambda modname: registry.add_to_registry(quirk),
+    ) as import_mock:
+        assert type(zq.get_device(device, registry)) is quirk
+        assert type(zq.get_device(device, registry)) is quirk
+
+    assert import_mock.call_count == 1
+
+
+@pytest.mark.parametrize("lookup_order", ["forward", "reversed", "shuffled"])
+def test_lazy_quirk_loader_priorities(zigpy_device_from_quirk, lookup_order):
+    """Test lazy loading picks the same quirks as importing all of them."""
+
+    manifest = zhaquirks.manifest.build_manifest()
+
+    eager_registry = zq.DeviceRegistry()
+    for manufacturer, models in zq._DEVICE_REGISTRY.registry.items():
+        for model, model_quirks in models.items():
+            eager_registry.registry[manufacturer][model] = [
+                quirk
+                for quirk in model_quirks
+                if quirk.__module__ in manifest["modules"]
+            ]
+
+    devices = []
+    for modname, module_info in manifest["modules"].items():
+        for quirk_info in module_info["quirks"]:
+            quirk = getattr(sys.modules[modname], quirk_info["class"])
+            for manufacturer, model in quirk_info["models_info"]:
+                device = zigpy_device_from_quirk(quirk, apply_quirk=False)
+                device.manufacturer = manufacturer
+                device.model = model
+                devices.append(device)
+
+    if lookup_order == "reversed":
+        devices.reverse()
+    elif lookup_order == "shuffled":
+        random.Random(0).shuffle(devices)
+
+    loader = zhaquirks.manifest.LazyQuirkLoader(manifest)
+    registry = zq.DeviceRegistry()
+    zhaquirks.manifest.install_lazy_registry(loader, registry)
+
+    def import_module(modname):
+        # Register the quirks of the module in an order unrelated to the source
+        for quirk_info in manifest["modules"][modname]["quirks"]:
+            registry.add_to_registry(getattr(sys.modules[modname], quirk_info["class"]))
+
+    eager_matcher = zhaquirks.matcher.QuirkMatcher(eager_registry)
+    lazy_matcher = zhaquirks.matcher.QuirkMatcher(registry)
+    with mock.patch(
+        "zhaquirks.manifest.importlib.import_module", side_effect=import_module
+    ):
+        for device in devices:
+            assert lazy_matcher.get_quirk(device) is eager_matcher.get_quirk(device), (
+                device.manufacturer,
+                device.model,
+            )
+
+    assert loader.imported == loader.modules
+
+
+def test_setup_lazy_loading():
+    """Test lazy setup skips importing the modules listed in the manifest."""
+
+    manifest = {
+        "version": 2,
+        "modules": {
+            "zhaquirks.bosch.motion": {
+                "quirks": [
+                    {
+                        "class": "ISWZPR1WP13",
+                        "models_info": [["Bosch", "ISW-ZPR1-WP13"]],
+                    }
+                ]
+            }
+        },
+    }
+
+    with mock.patch("zhaquirks.load_manifest", return_value=manifest), mock.patch(
+        "zhaquirks.install_lazy_registry"
+    ) as install_mock, mock.patch("zhaquirks.importlib.import_module") as import_mock:
+        zhaquirks.setup({zhaquirks.LAZY_LOAD_QUIRKS: True})
+
+    imported = {c[1][0] for c in import_mock.mock_calls}
+    assert "zhaquirks.bosch.motion" not in imported
+    assert "zhaquirks.bosch.isw_zdl1_wp11g" in imported
+    assert install_mock.call_count == 1
+
+    with mock.patch("zhaquirks.load_manifest", return_value=None), mock.patch(
+        "zhaquirks.install_lazy_registry"
+    ) as install_mock, mock.patch("zhaquirks.importlib.import_module") as import_mock:
+        zhaquirks.setup({zhaquirks.LAZY_LOAD_QUIRKS: True})
+
+    imported = {c[1][0] for c in import_mock.mock_calls}
+    assert "zhaquirks.bosch.motion" in imported
+    assert install_mock.call_count == 0
+
+
+def test_load_manifest(tmp_path):
+    """Test missing or unsupported manifests are ignored."""
+
+    path = tmp_path / "quirks_manifest.json"
+    assert zhaquirks.manifest.load_manifest(path) is None
+
+    path.write_text("not json")
+    assert zhaquirks.manifest.load_manifest(path) is None
+
+    path.write_text('{"version": 0, "modules": {}}')
+    assert zhaquirks.manifest.load_manifest(path) is None
+
+    path.write_text('{"version": 1, "modules": {}}')
+    assert zhaquirks.manifest.load_manifest(path) is None
+
+    manifest = {
+        "version": 2,
+        "sha256": zhaquirks.manifest._package_digest(),
+        "modules": {},
+    }
+    path.write_text(json.dumps(manifest))
+    assert zhaquirks.manifest.load_manifest(path) == manifest
+
+
+def test_quirks_manifest_current():
+    """Make sure the shipped quirk manifest matches the quirks.
+
+    Run `script/gen_manifest` to regenerate it.
+    """
+
+    assert zhaquirks.manifest.load_manifest() == zhaquirks.manifest.build_manifest()
+
+
+def test_quirks_manifest_signatures():
+    """Test manifest entries describe the quirk signatures."""
+
+    manifest = zhaquirks.manifest.build_manifest()
+    module_info = manifest["modules"]["zhaquirks.bosch.motion"]
+    assert module_info["file"] == "bosch/motion.py"
+
+    (quirk_info,) = [q for q in module_info["quirks"] if q["class"] == "ISWZPR1WP13"]
+    assert quirk_info["models_info"] == [["Bosch", "ISW-ZPR1-WP13"]]
+    assert quirk_info["endpoints"] == {
+        "5": {
+            "profile_id": 260,
+            "device_type": 1026,
+            "input_clusters": [0, 1, 3, 32, 1026, 1280, 2821],
+            "output_clusters": [25],
+        }
+    }
+
+    loader = zhaquirks.manifest.LazyQuirkLoader(manifest)
+    for quirk in ALL_QUIRK_CLASSES:
+        if quirk.__module__.startswith("zhaquirks."):
+            assert quirk.__module__ in loader.modules
+
+
+def test_stale_manifest(tmp_path):
+    """Test a manifest not matching the quirk modules source is ignored."""
+
+    manifest = zhaquirks.manifest.build_manifest()
+    path = tmp_path / "quirks_manifest.json"
+    path.write_text(json.dumps(manifest))
+    assert zhaquirks.manifest.load_manifest(path) == manifest
+
+    manifest["modules"]["zhaquirks.bosch.motion"]["sha256"] = "0" * 64
+    path.write_text(json.dumps(manifest))
+    assert zhaquirks.manifest.load_manifest(path) is None
+
+    manifest["modules"]["zhaquirks.bosch.motion"]["file"] = "bosch/no_such_module.py"
+    path.write_text(json.dumps(manifest))
+    assert zhaquirks.manifest.load_manifest(path) is None
+
+
+@pytest.mark.parametrize("module", ["__init__.py", "const.py", "tuya/__init__.py"])
+def test_stale_manifest_package_module(tmp_path, module):
+    """Test editing a module imported by the quirk modules makes the manifest stale."""
+
+    manifest = zhaquirks.manifest.build_manifest()
+    package_dir = tmp_path / "zhaquirks"
+    shutil.copytree(
+        zhaquirks.manifest.PACKAGE_DIR,
+        package_dir,
+        ignore=shutil.ignore_patterns("__pycache__"),
+    )
+
+    with mock.patch("zhaquirks.manifest.PACKAGE_DIR", package_dir):
+        assert zhaquirks.manifest.manifest_is_current(manifest)
+
+        with open(package_dir / module, "a") as f:
+            f.write("\n# edited\n")
+        assert not zhaquirks.manifest.manifest_is_current(manifest)
+
+
+class _ZigpyCandidate:
+    """Stand-in for a quirk class, returned instead of instantiating the quirk."""
+
+    def __init__(self, quirk):
+        """Init."""
+        self.quirk = quirk
+        self.signature = quirk.signature
+
+    def __call__(self, *args):
+        """Return self instead of a quirk instance."""
+        return self
+
+
+@pytest.fixture(scope="module")
+def zigpy_registry():
+    """Copy of zigpy's quirk registry with stand-in candidates."""
+
+    registry = zq.DeviceRegistry()
+    for manufacturer, models in zq._DEVICE_REGISTRY.registry.items():
+        for model, quirks in models.items():
+            registry.registry[manufacturer][model] = [
+                _ZigpyCandidate(q) for q in quirks
+            ]
+    return registry
+
+
+@pytest.mark.parametrize("quirk", ALL_QUIRK_CLASSES)
+@pytest.mark.parametrize("extra_cluster", (None, 0xFC57))
+def test_matcher_same_as_zigpy(
+    zigpy_device_from_quirk, zigpy_registry, quirk, extra_cluster
+):
+    """Test compiled signatures pick the same quirk as zigpy."""
+
+    device = zigpy_device_from_quirk(quirk, apply_quirk=False)
+    if extra_cluster is not None:
+        device.endpoints[min(quirk.signature[ENDPOINTS])].add_input_cluster(
+            extra_cluster
+        )
+
+    expected = zigpy_registry.get_device(device)
+    match = zhaquirks.matcher.QuirkMatcher().get_quirk(device)
+    if expected is device:
+        assert match is None
+    else:
+        assert match is expected.quirk
+
+
+def test_matcher_priority_and_wildcards(zigpy_device_from_quirk):
+    """Test compiled signatures keep zigpy's priorities and wildcards."""
+
+    registry = zq.DeviceRegistry()
+    matcher = zhaquirks.matcher.QuirkMatcher(registry)
+    endpoints = {
+        1: {
+            PROFILE_ID: zigpy.profiles.zha.PROFILE_ID,
+            DEVICE_TYPE: zigpy.profiles.zha.DeviceType.ON_OFF_LIGHT,
+            INPUT_CLUSTERS: [0, 6],
+            OUTPUT_CLUSTERS: [0x19],
+        }
+    }
+
+    class ExactQuirk(zq.CustomDevice):
+        signature = {MODELS_INFO: [("manuf", "model")], ENDPOINTS: endpoints}
+
+    class WildcardQuirk(zq.CustomDevice):
+        signature = {
+            MODELS_INFO: [("manuf", "model")],
+            ENDPOINTS: {1: {INPUT_CLUSTERS: [0, 6], OUTPUT_CLUSTERS: [0x19]}},
+        }
+
+    class ModelQuirk(zq.CustomDevice):
+        signature = {MODEL: "model", ENDPOINTS: endpoints}
+
+    device = zigpy_device_from_quirk(ExactQuirk, apply_quirk=False)
+    assert matcher.get_quirk(device) is None
+
+    registry.add_to_registry(ModelQuirk)
+    assert matcher.get_quirk(device) is ModelQuirk
+
+    registry.add_to_registry(ExactQuirk)
+    assert matcher.get_quirk(device) is ExactQuirk
+
+    # registered last, so it has the highest priority
+    registry.add_to_registry(WildcardQuirk)
+    assert matcher.get_quirk(device) is WildcardQuirk
+    assert type(matcher.get_device(device)) is WildcardQuirk
+
+    device[1].profile_id = 0xC05E
+    assert matcher.get_quirk(device) is WildcardQuirk
+
+    device[1].add_output_cluster(0x0A)
+    assert matcher.get_quirk(device) is None
+    assert matcher.get_device(device) is device
+
+
+def test_matcher_cache(zigpy_device_from_quirk):
+    """Test the tables are cached until quirks are added or removed."""
+
+    registry = zq.DeviceRegistry()
+    matcher = zhaquirks.matcher.QuirkMatcher(registry)
+    other_matcher = zhaquirks.matcher.QuirkMatcher(registry)
+
+    class Quirk(zq.CustomDevice):
+        signature = {
+            MODELS_INFO: [("manuf", "model")],
+            ENDPOINTS: {1: {INPUT_CLUSTERS: [0, 6], OUTPUT_CLUSTERS: [0x19]}},
+        }
+
+    device = zigpy_device_from_quirk(Quirk, apply_quirk=False)
+    registry.add_to_registry(Quirk)
+    assert matcher.get_quirk(device) is Quirk
+
+    # cached lookups don't look at the registry
+    with mock.patch.object(matcher, "_candidates") as candidates:
+        assert matcher.get_quirk(device) is Quirk
+        assert matcher.compiled("manuf", "model") is matcher.compiled("manuf", "model")
+    assert candidates.call_count == 0
+
+    registry.remove(Quirk)
+    assert matcher.get_quirk(device) is None
+    assert other_matcher.get_quirk(device) is None
+    registry.add_to_registry(Quirk)
+    assert matcher.get_quirk(device) is Quirk
+
+
+@pytest.mark.parametrize("quirk", (zhaquirks.tuya.ts0601_din_power.TuyaPowerMeter,))
+async def test_local_data_cluster_update_filters(zigpy_device_from_quirk, quirk):
+    """Test filtered attribute updates of local data clusters."""
+
+    device = zigpy_device_from_quirk(quirk)
+    cluster = device.endpoints[1].electrical_measurement
+    # updates are filtered after their aggregation
+    cluster._REPORT_AGGREGATIONS = {}
+    listener = ClusterListener(cluster)
+    voltage_id, power_id = cluster.VOLTAGE_ID, cluster.POWER_ID
+
+    # repeated values are suppressed
+    cluster.voltage_reported(230)
+    cluster.voltage_reported(230)
+    cluster.voltage_reported(231)
+    assert listener.attribute_updates == [(voltage_id, 230), (voltage_id, 231)]
+
+    # values within the deadband of the last update are suppressed
+    listener.attribute_updates.clear()
+    update_filters = {
+        power_id: zhaquirks.UpdateFilter(absolute=2, relative=0.1, max_silence=60)
+    }
+    with mock.patch.object(cluster, "_UPDATE_FILTERS", update_filters), mock.patch(
+        "time.monotonic", return_value=1000
+    ) as monotonic:
+        for power in (10, 12, 13, 100, 109, 111):
+            cluster.power_reported(power)
+        assert listener.attribute_updates == [
+            (power_id, 10),
+            (power_id, 13),
+            (power_id, 100),
+            (power_id, 111),
+        ]
+
+        # the value is refreshed after the maximum silence
+        monotonic.return_value = 1060
+        cluster.power_reported(111)
+        assert listener.attribute_updates[-1] == (power_id, 111)
+        assert len(listener.attribute_updates) == 5
+
+    # written values are never suppressed
+    await cluster.write_attributes({voltage_id: 231})
+    assert listener.attribute_updates[-1] == (voltage_id, 231)
+    assert len(listener.attribute_updates) == 6
+
+
+@pytest.mark.parametrize("quirk", (zhaquirks.tuya.ts011f_plug.Plug,))
+async def test_aggregating_cluster(zigpy_device_from_quirk, quirk):
+    """Test reports of aggregated attributes are updated once per window."""
+
+    device = zigpy_device_from_quirk(quirk)
+    cluster = device.endpoints[1].electrical_measurement
+    listener = ClusterListener(cluster)
+    voltage_id = cluster.attridx["rms_voltage"]
+    power_id = cluster.attridx["active_power"]
+
+    aggregations = {
+        voltage_id: zhaquirks.ReportAggregation(window=0.01),
+        power_id: zhaquirks.ReportAggregation(
+            window=0.01, statistic="max", thresholds=(1, 1000)
+        ),
+    }
+    with mock.patch.object(cluster, "_REPORT_AGGREGATIONS", aggregations):
+        # the first report is updated at once
+        for voltage in (230, 228, 233, 234):
+            cluster._update_attribute(voltage_id, voltage)
+        for power in (10, 50, 200, 60):
+            cluster._update_attribute(power_id, power)
+        assert listener.attribute_updates == [(voltage_id, 230), (power_id, 10)]
+
+        await asyncio.sleep(0.05)
+        assert listener.attribute_updates[2:] == [(voltage_id, 232), (power_id, 200)]
+
+        # reports crossing a threshold are updated at once
+        cluster._update_attribute(power_id, 150)
+        cluster._update_attribute(power_id, 1500)
+        assert listener.attribute_updates[4:] == [(power_id, 1500)]
+        await asyncio.sleep(0.05)
+        assert len(listener.attribute_updates) == 5
+
+    # other attributes are not aggregated
+    cluster._update_attribute(cluster.attridx["ac_frequency"], 50)
+    assert listener.attribute_updates[-1] == (cluster.attridx["ac_frequency"], 50)
+
+    with pytest.raises(ValueError):
+        zhaquirks.ReportAggregation(statistic="median")
+
+
+@pytest.mark.parametrize("quirk", (zhaquirks.tuya.ts011f_plug.Plug,))
+async def test_aggregating_cluster_read(zigpy_device_from_quirk, quirk):
+    """Test attributes read during an aggregation window are updated as read."""
+
+    device = zigpy_device_from_quirk(quirk)
+    cluster = device.endpoints[1].electrical_measurement
+    listener = ClusterListener(cluster)
+    voltage_id = cluster.attridx["rms_voltage"]
+
+    aggregations = {voltage_id: zhaquirks.ReportAggregation(window=0.01)}
+    read_result = [
+        [
+            foundation.ReadAttributeRecord(
+                voltage_id,
+                foundation.Status.SUCCESS,
+                foundation.TypeValue(zigpy.types.uint16_t, 229),
+            )
+        ]
+    ]
+    with mock.patch.object(
+        cluster, "_REPORT_AGGREGATIONS", aggregations
+    ), mock.patch.object(
+        cluster, "read_attributes_raw", CoroutineMock(return_value=read_result)
+    ):
+        cluster._update_attribute(voltage_id, 230)
+        cluster._update_attribute(voltage_id, 235)
+        assert listener.attribute_updates == [(voltage_id, 230)]
+
+        success, _ = await cluster.read_attributes(["rms_voltage"])
+        assert success == {"rms_voltage": 229}
+        assert listener.attribute_updates == [(voltage_id, 230), (voltage_id, 229)]
+
+        # the samples reported before the read are dropped
+        await asyncio.sleep(0.05)
+        assert len(listener.attribute_updates) == 2
+
+        # reports are aggregated again after the read
+        cluster._update_attribute(voltage_id, 231)
+        cluster._update_attribute(voltage_id, 233)
+        await asyncio.sleep(0.05)
+        assert listener.attribute_updates[2:] == [(voltage_id, 232)]
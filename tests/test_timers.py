@@ -0,0 +1,136 @@
+"""Tests for the shared timer wheel."""
+import asyncio
+import gc
+import weakref
+
+import pytest
+
+import zhaquirks
+from zhaquirks import timers
+from zhaquirks.timers import TimerWheel, get_timer_wheel
+import zhaquirks.xiaomi.aqara.motion_aq2
+
+from tests.common import ZCL_OCC_ATTR_RPT_OCC
+
+zhaquirks.setup()
+
+RESOLUTION = 0.01
+
+
+async def test_timer_wheel_expiry():
+    """Test timers fire after their delay, across all levels of the wheel."""
+
+    loop = asyncio.get_running_loop()
+    wheel = TimerWheel(loop, resolution=RESOLUTION, slots=4, levels=3)
+    fired = {}
+
+    # 4, 16 and 64 ticks are covered by the levels, 100 ticks are beyond them
+    delays = {
+        owner: delay * RESOLUTION for owner, delay in enumerate((1, 3, 5, 17, 40, 100))
+    }
+    start = loop.time()
+    for owner, delay in delays.items():
+        wheel.schedule(
+            owner, delay, lambda owner=owner: fired.setdefault(owner, loop.time())
+        )
+    assert wheel.pending == len(delays)
+    assert 3 in wheel
+
+    await asyncio.sleep(max(delays.values()) + 5 * RESOLUTION)
+
+    assert wheel.pending == 0
+    assert fired.keys() == delays.keys()
+    for owner, delay in delays.items():
+        assert delay - RESOLUTION <= fired[owner] - start <= delay + 10 * RESOLUTION
+
+
+async def test_timer_wheel_rearm_cancel():
+    """Test re-arming replaces the pending timer and timers can be cancelled."""
+
+    loop = asyncio.get_running_loop()
+    wheel = TimerWheel(loop, resolution=RESOLUTION, slots=4, levels=3)
+    fired = []
+
+    wheel.schedule("a", 2 * RESOLUTION, lambda: fired.append("a1"))
+    wheel.schedule("a", 6 * RESOLUTION, lambda: fired.append("a2"))
+    wheel.schedule("b", 3 * RESOLUTION, lambda: fired.append("b"))
+    wheel.schedule("c", 0, lambda: fired.append("c"))
+    assert wheel.pending == 3
+
+    assert wheel.cancel("b")
+    assert not wheel.cancel("b")
+    assert wheel.pending == 2
+
+    await asyncio.sleep(4 * RESOLUTION)
+    assert fired == ["c"]
+    assert wheel.pending == 1
+
+    await asyncio.sleep(6 * RESOLUTION)
+    assert fired == ["c", "a2"]
+    assert wheel.pending == 0
+
+
+async def test_timer_wheel_rearm_from_callback():
+    """Test a callback re-arming its timer doesn't delay the other timers."""
+
+    loop = asyncio.get_running_loop()
+    wheel = TimerWheel(loop, resolution=RESOLUTION, slots=4, levels=3)
+    fired = {}
+
+    def rearm():
+        fired["a1"] = loop.time()
+        wheel.schedule("a", 4 * RESOLUTION, lambda: fired.setdefault("a2", loop.time()))
+
+    start = loop.time()
+    wheel.schedule("a", 4 * RESOLUTION, rearm)
+    wheel.schedule("b", 6 * RESOLUTION, lambda: fired.setdefault("b", loop.time()))
+
+    await asyncio.sleep(12 * RESOLUTION)
+
+    assert wheel.pending == 0
+    assert sorted(fired, key=fired.get) == ["a1", "b", "a2"]
+    assert 5 * RESOLUTION <= fired["b"] - start <= 16 * RESOLUTION
+
+
+async def test_timer_wheel_shared():
+    """Test the timer wheel is shared by the clusters on a loop."""
+
+    assert get_timer_wheel() is get_timer_wheel(asyncio.get_running_loop())
+
+
+def test_timer_wheel_releases_loop():
+    """Test a wheel with pending timers doesn't keep its closed loop alive."""
+
+    loop = asyncio.new_event_loop()
+    wheel = get_timer_wheel(loop)
+    wheel.schedule("wheel", 60, lambda: None)
+    wheel.schedule("loop", 0, lambda: None)
+    loop.close()
+    assert loop in timers._TIMER_WHEELS
+
+    loop_ref = weakref.ref(loop)
+    del loop, wheel
+    gc.collect()
+    assert loop_ref() is None
+
+
+@pytest.mark.parametrize("quirk", (zhaquirks.xiaomi.aqara.motion_aq2.MotionAQ2,))
+async def test_motion_reset_timer(zigpy_device_from_quirk, quirk):
+    """Test motion and occupancy clusters register their reset with the wheel."""
+
+    wheel = get_timer_wheel()
+    motion_dev = zigpy_device_from_quirk(quirk)
+    motion_cluster = motion_dev.endpoints[1].ias_zone
+    occupancy_cluster = motion_dev.endpoints[1].occupancy
+
+    hdr, args = occupancy_cluster.deserialize(ZCL_OCC_ATTR_RPT_OCC)
+    occupancy_cluster.handle_message(hdr, args)
+    occupancy_cluster.handle_message(hdr, args)
+
+    assert wheel.pending == 2
+    assert motion_cluster in wheel
+    assert occupancy_cluster in wheel
+
+    wheel.cancel(motion_cluster)
+    wheel.cancel(occupancy_cluster)
+    assert wheel.pending == 0
@@ -0,0 +1,78 @@
+"""Tests for the device automation trigger index."""
+
+import pytest
+import zigpy.quirks as zq
+
+import zhaquirks
+from zhaquirks.const import (
+    ARGS,
+    CLUSTER_ID,
+    COMMAND,
+    ENDPOINT_ID,
+    LONG_PRESS,
+    PRESS_TYPE,
+    SHORT_PRESS,
+    TURN_OFF,
+    TURN_ON,
+)
+import zhaquirks.philips.rwl022
+from zhaquirks.triggers import TriggerIndex, get_trigger_index, resolve_trigger
+import zhaquirks.xiaomi.aqara.motion_aq2
+
+zhaquirks.setup()
+
+TRIGGER_QUIRKS = {
+    quirk
+    for manufacturer in zq._DEVICE_REGISTRY._registry.values()
+    for model_quirk_list in manufacturer.values()
+    for quirk in model_quirk_list
+    if getattr(quirk, "device_automation_triggers", None)
+}
+
+
+@pytest.mark.parametrize("quirk", sorted(TRIGGER_QUIRKS, key=str))
+def test_trigger_index_resolves_all_triggers(quirk):
+    """Test every trigger of a quirk is resolved from its own criteria."""
+
+    index = get_trigger_index(quirk)
+    for trigger, criteria in quirk.device_automation_triggers.items():
+        assert trigger in index.resolve_all(criteria)
+
+
+def test_trigger_index_resolve():
+    """Test events are resolved to the most specific trigger they fire."""
+
+    index = TriggerIndex(
+        {
+            (SHORT_PRESS, TURN_ON): {COMMAND: "on"},
+            (LONG_PRESS, TURN_ON): {COMMAND: "on", ENDPOINT_ID: 2, ARGS: [1, 2]},
+            (SHORT_PRESS, TURN_OFF): {COMMAND: "press", ARGS: {PRESS_TYPE: 1}},
+            (LONG_PRESS, TURN_OFF): {COMMAND: "press", ARGS: {PRESS_TYPE: 2}},
+        }
+    )
+
+    event = {COMMAND: "on", ENDPOINT_ID: 1, CLUSTER_ID: 6, ARGS: []}
+    assert index.resolve(event) == (SHORT_PRESS, TURN_ON)
+
+    event = {COMMAND: "on", ENDPOINT_ID: 2, CLUSTER_ID: 6, ARGS: [1, 2]}
+    assert index.resolve(event) == (LONG_PRESS, TURN_ON)
+    assert index.resolve_all(event) == [(LONG_PRESS, TURN_ON), (SHORT_PRESS, TURN_ON)]
+
+    # args given as a dict match the event args per key
+    event = {COMMAND: "press", ARGS: {PRESS_TYPE: 2, "button": 1}}
+    assert index.resolve(event) == (LONG_PRESS, TURN_OFF)
+    assert index.resolve({COMMAND: "press", ARGS: [2]}) is None
+    assert index.resolve({COMMAND: "off"}) is None
+
+
+def test_trigger_index_cached():
+    """Test the trigger index is cached on the quirk class."""
+
+    quirk = zhaquirks.philips.rwl022.PhilipsRWL022
+    index = get_trigger_index(quirk)
+    assert get_trigger_index(quirk) is index
+    assert resolve_trigger(quirk, {COMMAND: "off_hold"}) == (LONG_PRESS, TURN_OFF)
+
+    quirk = zhaquirks.xiaomi.aqara.motion_aq2.MotionAQ2
+    assert get_trigger_index(quirk) is None
+    assert resolve_trigger(quirk, {COMMAND: "on"}) is None
@@ -22,7 +22,7 @@ from zhaquirks.const import (
     PROFILE_ID,
     ZONE_STATE,
 )
-from zhaquirks.tuya import Data, TuyaManufClusterAttributes
+from zhaquirks.tuya import Data, TuyaManufClusterAttributes, TuyaTimeSync
 import zhaquirks.tuya.ts0042
 import zhaquirks.tuya.ts0043
 import zhaquirks.tuya.ts0601_electric_heating
@@ -257,7 +257,10 @@ async def test_tuya_data_conversion():
 class TestManufCluster(TuyaManufClusterAttributes):
     """Cluster for synthetic tests."""
 
-    manufacturer_attributes = {617: ("test_attribute", t.uint32_t)}
+    manufacturer_attributes = {
+        617: ("test_attribute", t.uint32_t),
+        618: ("test_attribute_2", t.uint8_t),
+    }
 
 
 class TestDevice(CustomDevice):
@@ -330,6 +333,86 @@ async def test_tuya_send_attribute(zigpy_device_from_quirk, quirk):
         ]
 
 
+@pytest.mark.parametrize("quirk", (TestDevice,))
+async def test_tuya_send_attribute_coalesce(zigpy_device_from_quirk, quirk):
+    """Test superseded values for a datapoint are not sent."""
+
+    test_dev = zigpy_device_from_quirk(quirk)
+    tuya_cluster = test_dev.endpoints[1].tuya_manufacturer
+
+    async def async_success(*args, **kwargs):
+        return foundation.Status.SUCCESS
+
+    with mock.patch.object(
+        tuya_cluster.endpoint, "request", side_effect=async_success
+    ) as m1:
+
+        results = await asyncio.gather(
+            tuya_cluster.write_attributes({617: 1}),
+            tuya_cluster.write_attributes({617: 179}),
+        )
+        assert m1.call_count == 1
+        assert m1.call_args[0][2][5:] == b"i\x02\x00\x04\x00\x00\x00\xb3"
+        for (status,) in results:
+            assert status == [
+                foundation.WriteAttributesStatusRecord(foundation.Status.SUCCESS)
+            ]
+
+
+@pytest.mark.parametrize("quirk", (TestDevice,))
+async def test_tuya_send_attribute_multiple_dp(zigpy_device_from_quirk, quirk):
+    """Test coalesced datapoints are sent in a single frame."""
+
+    test_dev = zigpy_device_from_quirk(quirk)
+    tuya_cluster = test_dev.endpoints[1].tuya_manufacturer
+
+    async def async_success(*args, **kwargs):
+        return foundation.Status.SUCCESS
+
+    with mock.patch.object(
+        tuya_cluster.endpoint, "request", side_effect=async_success
+    ) as m1:
+
+        await asyncio.gather(
+            tuya_cluster.write_attributes({617: 179}),
+            tuya_cluster.write_attributes({618: 5}),
+        )
+        assert m1.call_count == 2
+
+        m1.reset_mock()
+        with mock.patch.object(tuya_cluster, "set_data_multiple_dp", True):
+            await asyncio.gather(
+                tuya_cluster.write_attributes({617: 179}),
+                tuya_cluster.write_attributes({618: 5}),
+            )
+        assert m1.call_count == 1
+        assert m1.call_args[0][2][5:] == (
+            b"i\x02\x00\x04\x00\x00\x00\xb3" b"j\x02\x00\x01\x05"
+        )
+
+
+@pytest.mark.parametrize("quirk", (TestDevice,))
+async def test_tuya_send_attribute_pacing(zigpy_device_from_quirk, quirk):
+    """Test set_data frames are spaced by the frame interval."""
+
+    test_dev = zigpy_device_from_quirk(quirk)
+    tuya_cluster = test_dev.endpoints[1].tuya_manufacturer
+    loop = asyncio.get_running_loop()
+    sent = []
+
+    async def async_success(*args, **kwargs):
+        sent.append(loop.time())
+        return foundation.Status.SUCCESS
+
+    with mock.patch.object(
+        tuya_cluster.endpoint, "request", side_effect=async_success
+    ), mock.patch.object(tuya_cluster, "set_data_frame_interval", 0.3):
+        await tuya_cluster.write_attributes({617: 179, 618: 5})
+
+    assert len(sent) == 2
+    assert sent[1] - sent[0] >= 0.29
+
+
 @pytest.mark.parametrize("quirk", (zhaquirks.tuya.ts0601_siren.TuyaSiren,))
 async def test_siren_state_report(zigpy_device_from_quirk, quirk):
     """Test tuya siren standard state reporting from incoming commands."""
@@ -1079,6 +1162,171 @@ async def test_moes(zigpy_device_from_quirk, quirk):
         datetime.datetime = origdatetime
 
 
+@pytest.mark.parametrize("quirk", (zhaquirks.tuya.ts0601_trv.MoesHY368_Type1,))
+async def test_moes_schedule(zigpy_device_from_quirk, quirk):
+    """Test the schedule is decoded once and only changed slots are reported."""
+
+    valve_dev = zigpy_device_from_quirk(quirk)
+    tuya_cluster = valve_dev.endpoints[1].tuya_manufacturer
+    thermostat_cluster = valve_dev.endpoints[1].thermostat
+    thermostat_listener = ClusterListener(thermostat_cluster)
+
+    hdr, args = tuya_cluster.deserialize(ZCL_TUYA_VALVE_WORKDAY_SCHEDULE)
+    tuya_cluster.handle_message(hdr, args)
+    assert len(thermostat_listener.attribute_updates) == 18
+    schedule = thermostat_cluster.get("workday_schedule")
+    assert schedule == zhaquirks.tuya.ts0601_trv.MOES_DEFAULT_SCHEDULE
+
+    # a repeated report doesn't update anything, a changed one its slot only
+    thermostat_listener.attribute_updates.clear()
+    tuya_cluster.handle_message(hdr, args)
+    assert thermostat_listener.attribute_updates == []
+    hdr, args = tuya_cluster.deserialize(
+        ZCL_TUYA_VALVE_WORKDAY_SCHEDULE.replace(b"\x06\x00\x14", b"\x06\x00\x11")
+    )
+    tuya_cluster.handle_message(hdr, args)
+    assert thermostat_listener.attribute_updates == [(0x4112, 1700)]
+
+    async def async_success(*args, **kwargs):
+        return foundation.Status.SUCCESS
+
+    with mock.patch.object(
+        tuya_cluster.endpoint, "request", side_effect=async_success
+    ) as m1:
+        # copies don't share their slots with the cached schedule
+        schedule = zhaquirks.tuya.ts0601_trv.MoesSchedule(schedule)
+        schedule[0].minute = 45
+        schedule[5].temperature = 1600
+        assert thermostat_cluster.get("workday_schedule")[0].minute == 0
+        (status,) = await thermostat_cluster.write_attributes(
+            {"workday_schedule": schedule}
+        )
+        m1.assert_called_once_with(
+            61184,
+            1,
+            b"\x01\x01\x00\x00\x01\x70\x00\x00\x12\x06\x2D\x14\x08\x00\x0F"
+            b"\x0B\x1E\x0F\x0C\x1E\x0F\x11\x1E\x14\x16\x00\x10",
+            expect_reply=False,
+            command_id=0,
+        )
+        assert status == [
+            foundation.WriteAttributesStatusRecord(foundation.Status.SUCCESS)
+        ]
+
+        # as sent by a service call
+        (status,) = await thermostat_cluster.write_attributes(
+            {
+                "weekend_schedule": [
+                    (6, 0, 2000),
+                    (8, 0, 1500),
+                    [11, 30, 1500],
+                    [12, 30, 1500],
+                    {"hour": 17, "minute": 30, "temperature": 2000},
+                    {"hour": 22, "minute": 0, "temperature": 1600},
+                ]
+            }
+        )
+        m1.assert_called_with(
+            61184,
+            2,
+            b"\x01\x02\x00\x00\x02\x71\x00\x00\x12\x06\x00\x14\x08\x00\x0F"
+            b"\x0B\x1E\x0F\x0C\x1E\x0F\x11\x1E\x14\x16\x00\x10",
+            expect_reply=False,
+            command_id=0,
+        )
+        assert status == [
+            foundation.WriteAttributesStatusRecord(foundation.Status.SUCCESS)
+        ]
+
+
+class FakeClockLoop:
+    """Event loop clock advanced by the test, running the timers due."""
+
+    def __init__(self):
+        """Init."""
+        self.now = 1000.0
+        self.timers = []
+
+    def time(self):
+        """Return the fake time."""
+        return self.now
+
+    def call_at(self, when, callback, *args):
+        """Schedule the callback at the fake time."""
+        self.timers.append((when, callback, args))
+
+    def advance(self, seconds):
+        """Advance the clock, running the timers due in order."""
+        self.now += seconds
+        while True:
+            due = sorted(
+                (timer for timer in self.timers if timer[0] <= self.now),
+                key=lambda timer: timer[0],
+            )
+            if not due:
+                return
+            self.timers.remove(due[0])
+            due[0][1](*due[0][2])
+
+
+@pytest.mark.parametrize("quirk", (zhaquirks.tuya.ts0601_trv.MoesHY368_Type1,))
+async def test_tuya_time_sync(zigpy_device_from_quirk, quirk):
+    """Test time requests are answered once per device, at a bounded rate."""
+
+    clusters = [
+        zigpy_device_from_quirk(quirk, ieee=t.EUI64([i] * 8))
+        .endpoints[1]
+        .tuya_manufacturer
+        for i in range(3)
+    ]
+    loop = FakeClockLoop()
+    time_sync = TuyaTimeSync(loop, rate=4, min_interval=1)
+
+    sent = []
+    with mock.patch.object(datetime, "datetime", NewDatetime):
+        for cluster in clusters:
+            cluster.send_time = mock.MagicMock(side_effect=sent.append)
+            time_sync.request(cluster)
+            # asking again while the answer is queued is ignored
+            time_sync.request(cluster)
+
+        # the first answer is sent right away, the others spread out
+        assert [cluster.send_time.call_count for cluster in clusters] == [1, 0, 0]
+        assert len(loop.timers) == 1
+        loop.advance(0.125)
+        assert [cluster.send_time.call_count for cluster in clusters] == [1, 0, 0]
+        loop.advance(0.125)
+        assert [cluster.send_time.call_count for cluster in clusters] == [1, 1, 0]
+        loop.advance(0.25)
+        assert [cluster.send_time.call_count for cluster in clusters] == [1, 1, 1]
+        assert not loop.timers
+
+        # devices are answered again once the time was sent a while ago
+        time_sync.request(clusters[0])
+        assert clusters[0].send_time.call_count == 1
+        loop.advance(0.5)
+        time_sync.request(clusters[0])
+        assert clusters[0].send_time.call_count == 2
+
+    # the payloads are computed once and shared by the devices
+    assert all(payload is sent[0] for payload in sent[:3])
+    assert sent[0] == list(b"\x00\x00\x1C\x20\x00\x00\x0E\x10")
+
+    # timestamps since 2000, the local one only for some devices
+    time_sync = TuyaTimeSync(asyncio.get_running_loop())
+    payload_1970 = bytes(time_sync.payload(1970))
+    payload_2000 = bytes(time_sync.payload(2000))
+    assert time_sync.payload(1970) is time_sync.payload(1970)
+    assert (
+        int.from_bytes(payload_1970[:4], "big")
+        - int.from_bytes(payload_2000[:4], "big")
+        == (
+            datetime.datetime(2000, 1, 1) - datetime.datetime(1970, 1, 1)
+        ).total_seconds()
+    )
+    assert payload_2000[4:] == bytes(time_sync.payload(1970, 2000))[4:]
+
+
 @pytest.mark.parametrize("quirk", (zhaquirks.tuya.ts0601_electric_heating.MoesBHT,))
 async def test_eheating_state_report(zigpy_device_from_quirk, quirk):
     """Test thermostatic valves standard reporting from incoming commands."""
@@ -6,9 +6,11 @@ import pytest
 import zigpy.profiles.zha
 
 import zhaquirks
-from zhaquirks.tuya import TuyaNewManufCluster
+from zhaquirks.tuya import TuyaLocalCluster, TuyaNewManufCluster
 from zhaquirks.tuya.air.ts0601_air_quality import TuyaCO2Sensor
 
+from tests.common import ClusterListener
+
 zhaquirks.setup()
 
 
@@ -59,3 +61,56 @@ def test_co2_sensor(air_quality_device, data, ep_attr, expected_value):
     )
     cluster = getattr(air_quality_device.endpoints[1], ep_attr)
     assert cluster.get("measured_value") == expected_value
+
+
+def test_co2_sensor_multiple_datapoints(air_quality_device):
+    """Test all datapoints of a frame are decoded, a trailing fragment ignored."""
+
+    data = (
+        b"\t\x02\x01\x00\x00"
+        b"\x12\x02\x00\x04\x00\x00\x01 "
+        b"\x13\x02\x00\x04\x00\x00\x02\xd6"
+        b"\x02\x02\x00\x04\x00\x00\x01r"
+        b"\x15\x02\x00"
+    )
+
+    with mock.patch.object(
+        TuyaLocalCluster,
+        "update_attributes",
+        autospec=True,
+        side_effect=TuyaLocalCluster.update_attributes,
+    ) as update_mock:
+        air_quality_device.handle_message(
+            zigpy.profiles.zha.PROFILE_ID, TuyaNewManufCluster.cluster_id, 1, 1, data
+        )
+
+    endpoint = air_quality_device.endpoints[1]
+    assert endpoint.temperature.get("measured_value") == 2880
+    assert endpoint.humidity.get("measured_value") == 7260
+    assert endpoint.carbon_dioxide_concentration.get("measured_value") == 370 * 1e-6
+    assert endpoint.voc_level.get("measured_value") is None
+
+    # one batch per target cluster
+    assert update_mock.call_count == 3
+    assert {call[1][0].ep_attribute for call in update_mock.mock_calls} == {
+        "temperature",
+        "humidity",
+        "carbon_dioxide_concentration",
+    }
+
+
+def test_update_attributes_batch(air_quality_device):
+    """Test batched updates are cached before the listeners are notified."""
+
+    cluster = air_quality_device.endpoints[1].voc_level
+    listener = ClusterListener(cluster)
+    cached = []
+    listener.attribute_updated = lambda attrid, value: cached.append(
+        (attrid, value, cluster.get("max_measured_value"))
+    )
+
+    cluster.update_attributes(
+        {"measured_value": 0.5, "max_measured_value": 1.0, "no_such_attribute": 1}
+    )
+
+    assert cached == [(0x0000, 0.5, 1.0), (0x0002, 1.0, 1.0)]
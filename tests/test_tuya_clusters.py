@@ -3,6 +3,7 @@
 from unittest import mock
 
 import pytest
+import zigpy.types as t
 import zigpy.zcl.foundation as zcl_f
 
 from zhaquirks.tuya import (
@@ -10,6 +11,7 @@ from zhaquirks.tuya import (
     TUYA_GET_DATA,
     TUYA_SET_DATA_RESPONSE,
     TUYA_SET_TIME,
+    DPToAttributeMapping,
     TuyaCommand,
     TuyaData,
     TuyaNewManufCluster,
@@ -126,6 +128,43 @@ def test_tuya_data_bitmap_invalid():
         r.payload
 
 
+def test_tuya_data_raw_unsupported():
+    """Test tuya Raw datatype has no payload decoder."""
+
+    r, _ = TuyaData.deserialize(b"\x00\x00\x02\x01\x02")
+    with pytest.raises(ValueError):
+        r.payload
+
+    r, _ = TuyaData.deserialize(b"\x04\x00\x00")
+    with pytest.raises(ValueError):
+        r.payload
+
+
+@pytest.mark.parametrize(
+    "data, expected_type, expected_value",
+    (
+        (b"\x02\x00\x04\x00\x01\x02\x03", t.uint32_t, 0x00010203),
+        (b"\x01\x00\x01\x01", t.Bool, t.Bool.true),
+        (b"\x03\x00\x03abc", str, "abc"),
+        (b"\x04\x00\x01\x02", t.enum8, 2),
+        (b"\x05\x00\x01\x81", t.bitmap8, 0x81),
+        (b"\x05\x00\x02\x40\x02", t.bitmap16, 0x0240),
+        (b"\x05\x00\x04\x40\x02\x80\x01", t.bitmap32, 0x01800240),
+    ),
+)
+def test_tuya_dp_decoders(data, expected_type, expected_value):
+    """Test the datapoint decoders table matches zigpy types deserialization."""
+
+    r, rest = TuyaData.deserialize(data)
+    assert rest == b""
+
+    payload = r.payload
+    assert type(payload) is expected_type
+    assert payload == expected_value
+    if expected_type is not str:
+        assert payload == expected_type.deserialize(r.raw)[0]
+
+
 @pytest.mark.parametrize(
     "cmd_id, handler_name, args",
     (
@@ -156,10 +195,14 @@ def test_tuya_cluster_request(
     hdr = zcl_f.ZCLHeader.general(1, cmd_id, is_reply=True)
     hdr.frame_control.disable_default_response = False
 
-    with mock.patch.object(TuyaCluster, handler_name) as handler:
-        handler.return_value = mock.sentinel.status
+    handlers = TuyaCluster._client_command_handlers
+    assert handlers[cmd_id] is getattr(TuyaNewManufCluster, handler_name)
+
+    handler = mock.MagicMock(return_value=mock.sentinel.status)
+    with mock.patch.dict(handlers, {cmd_id: handler}):
         TuyaCluster.handle_cluster_request(hdr, args)
         assert handler.call_count == 1
+        assert handler.call_args[0] == (TuyaCluster, *args)
         assert default_rsp_mock.call_count == 1
         assert default_rsp_mock.call_args[1]["status"] is mock.sentinel.status
 
@@ -187,3 +230,44 @@ def test_tuya_cluster_request_no_handler(default_rsp_mock, TuyaCluster):
     TuyaCluster.handle_cluster_request(hdr, (mock.sentinel.args,))
     assert default_rsp_mock.call_count == 1
     assert default_rsp_mock.call_args[1]["status"] == zcl_f.Status.UNSUP_CLUSTER_COMMAND
+
+
+@mock.patch("zhaquirks.tuya.TuyaNewManufCluster.send_default_rsp")
+def test_tuya_cluster_request_handler_error(default_rsp_mock, TuyaCluster):
+    """Test errors in handlers are not mistaken for missing handlers."""
+
+    hdr = zcl_f.ZCLHeader.general(1, TUYA_SET_TIME, is_reply=True)
+    hdr.frame_control.disable_default_response = False
+
+    handler = mock.MagicMock(side_effect=AttributeError)
+    with mock.patch.dict(
+        TuyaCluster._client_command_handlers, {TUYA_SET_TIME: handler}
+    ):
+        with pytest.raises(AttributeError):
+            TuyaCluster.handle_cluster_request(hdr, (0x1234,))
+    assert default_rsp_mock.call_count == 0
+
+
+def test_tuya_dp_handlers():
+    """Test datapoint handlers are resolved at class creation."""
+
+    class TestCluster(TuyaNewManufCluster):
+        dp_to_attribute = {
+            1: DPToAttributeMapping("on_off", "on_off"),
+        }
+        data_point_handlers = {
+            1: "_dp_2_attr_update",
+        }
+
+    assert TestCluster._dp_handlers == {1: TuyaNewManufCluster._dp_2_attr_update}
+    assert TuyaNewManufCluster._dp_handlers == {}
+
+    with pytest.raises(TypeError):
+
+        class NoHandlerCluster(TuyaNewManufCluster):
+            data_point_handlers = {1: "_dp_no_such_handler"}
+
+    with pytest.raises(TypeError):
+
+        class NoMappingCluster(TuyaNewManufCluster):
+            data_point_handlers = {2: "_dp_2_attr_update"}
@@ -0,0 +1,206 @@
+"""Tests for xbee."""
+
+import asyncio
+from unittest import mock
+
+import pytest
+from zigpy.zcl import foundation
+
+import zhaquirks
+from zhaquirks.xbee import (
+    XBEE_AT_REQUEST_CLUSTER,
+    XBEE_AT_RESPONSE_CLUSTER,
+    XBEE_IO_CLUSTER,
+    XBeeCommon,
+)
+import zhaquirks.xbee.xbee3_io
+
+zhaquirks.setup()
+
+IOSample = XBeeCommon.DigitalIOCluster.IOSample
+
+
+def test_io_sample_deserialize():
+    """Test all sample sets of an IO sample report are decoded."""
+
+    data = bytes.fromhex(
+        "02"  # sample sets
+        "0009"  # digital mask, DIO0 and DIO3
+        "81"  # analog mask, AD0 and supply voltage
+        "000802000c80"  # first set
+        "000103ff0c7f"  # second set
+        "ff"
+    )
+    sample, rest = IOSample.deserialize(data)
+
+    assert rest == b"\xff"
+    assert sample["digital_pins"] == (0, 3)
+    assert sample["analog_pins"] == (0, 7)
+    assert sample["samples"] == [
+        ((0, 1), (0x0200, 0x0C80)),
+        ((1, 0), (0x03FF, 0x0C7F)),
+    ]
+
+
+def test_io_sample_deserialize_reserved_digital_pins():
+    """Test the reserved high bits of the digital mask are ignored."""
+
+    sample, rest = IOSample.deserialize(bytes.fromhex("01" "e001" "00" "e001"))
+    assert rest == b""
+    assert sample["digital_pins"] == (0,)
+    assert sample["samples"] == [((1,), ())]
+
+
+def test_io_sample_deserialize_analog_only():
+    """Test the digital samples are skipped when no digital pin is enabled."""
+
+    sample, rest = IOSample.deserialize(bytes.fromhex("01000002" "0123"))
+    assert rest == b""
+    assert sample["digital_pins"] == ()
+    assert sample["analog_pins"] == (1,)
+    assert sample["samples"] == [((), (0x0123,))]
+
+    with pytest.raises(ValueError):
+        IOSample.deserialize(bytes.fromhex("02000002" "0123"))
+
+
+@pytest.mark.parametrize("quirk", (zhaquirks.xbee.xbee3_io.XBee3Sensor,))
+def test_io_sample_updates_changed_pins(zigpy_device_from_quirk, quirk):
+    """Test pins are updated for each sample set, only when their value changes."""
+
+    device = zigpy_device_from_quirk(quirk)
+    io_cluster = device.endpoints[0xE8].in_clusters[XBEE_IO_CLUSTER]
+    on_off_0 = device.endpoints[0xD0].on_off
+    on_off_3 = device.endpoints[0xD3].on_off
+    analog_0 = device.endpoints[0xD0].analog_input
+
+    hdr = foundation.ZCLHeader.cluster(1, 0)
+    data = bytes.fromhex("02" "0009" "01" "0008" "0200" "0008" "0200")
+    sample, _ = IOSample.deserialize(data)
+
+    with mock.patch.object(
+        on_off_0, "_update_attribute", wraps=on_off_0._update_attribute
+    ) as update_0, mock.patch.object(
+        on_off_3, "_update_attribute", wraps=on_off_3._update_attribute
+    ) as update_3, mock.patch.object(
+        analog_0, "_update_attribute", wraps=analog_0._update_attribute
+    ) as update_analog:
+        io_cluster.handle_cluster_request(hdr, [sample])
+        io_cluster.handle_cluster_request(hdr, [sample])
+
+    assert on_off_0.get("on_off") == 0
+    assert on_off_3.get("on_off") == 1
+    assert analog_0.get("present_value") == pytest.approx(0x0200 / 10.23)
+    assert update_0.call_count == 1
+    assert update_3.call_count == 1
+    assert update_analog.call_count == 1
+
+
+@pytest.fixture
+def xbee_at(zigpy_device_from_quirk):
+    """Device with the remote AT command requests it sends captured."""
+
+    device = zigpy_device_from_quirk(zhaquirks.xbee.xbee3_io.XBee3Sensor)
+    requests = []
+
+    async def request(device, profile, cluster, src_ep, dst_ep, seq, data, **kwargs):
+        requests.append((data[3], data[14:16].decode("ascii")))
+        return foundation.Status.SUCCESS, "message sent"
+
+    with mock.patch.object(device.application, "request", side_effect=request):
+        yield device, requests
+
+
+async def _next_request(requests):
+    for _ in range(10):
+        if requests:
+            return requests.pop(0)
+        await asyncio.sleep(0)
+    raise AssertionError("No AT command request sent")
+
+
+def _at_response(device, frame_id, command, status=0, value=b""):
+    hdr = foundation.ZCLHeader.cluster(1, 0)
+    device.endpoints[0xE6].in_clusters[XBEE_AT_RESPONSE_CLUSTER].handle_cluster_request(
+        hdr, [frame_id, command.encode("ascii"), status, value]
+    )
+
+
+async def test_remote_at_commands_pipelined(xbee_at):
+    """Test a batch of AT commands is pipelined and changes applied once."""
+
+    device, requests = xbee_at
+    at_request = device.endpoints[0xE6].out_clusters[XBEE_AT_REQUEST_CLUSTER]
+    at_request.max_concurrent_commands = 2
+
+    batch = asyncio.ensure_future(
+        device.remote_at_commands([("D0", 5), ("D1", 4), ("VR",)])
+    )
+
+    first = await _next_request(requests)
+    second = await _next_request(requests)
+    assert [first[1], second[1]] == ["D0", "D1"]
+    assert not requests
+
+    _at_response(device, *second)
+    frame_id, command = await _next_request(requests)
+    assert command == "VR"
+    # the frame id of a completed request is not reused while others are pending
+    assert frame_id not in (first[0], second[0])
+
+    _at_response(device, *first)
+    _at_response(device, frame_id, command, value=b"\x30\x0b")
+    apply_frame_id, apply_command = await _next_request(requests)
+    assert apply_command == "AC"
+    _at_response(device, apply_frame_id, apply_command)
+
+    assert await batch == [None, None, 0x300B]
+    assert not at_request._responses._awaiting
+
+
+async def test_remote_at_command_frame_id_reused(xbee_at):
+    """Test a completed request doesn't discard a newer request for its frame id."""
+
+    device, requests = xbee_at
+    at_request = device.endpoints[0xE6].out_clusters[XBEE_AT_REQUEST_CLUSTER]
+    responses = at_request._responses
+
+    command = asyncio.ensure_future(device.remote_at("VR"))
+    frame_id, name = await _next_request(requests)
+    _at_response(device, frame_id, name, value=b"\x30\x0b")
+    # the frame id is free again before the completed request resumes
+    newer = responses.save_at_request(frame_id)
+
+    assert await command == 0x300B
+    assert responses.is_awaiting(frame_id)
+
+    responses.discard_at_request(frame_id, newer)
+    assert not responses.is_awaiting(frame_id)
+
+
+async def test_remote_at_command_errors(xbee_at):
+    """Test failed and timed out AT commands release their frame ids."""
+
+    device, requests = xbee_at
+    at_request = device.endpoints[0xE6].out_clusters[XBEE_AT_REQUEST_CLUSTER]
+
+    batch = asyncio.ensure_future(device.remote_at_commands([("D0", 5), ("D1", 4)]))
+    first = await _next_request(requests)
+    second = await _next_request(requests)
+    _at_response(device, *first, status=2)
+    _at_response(device, *second)
+
+    responses = await batch
+    assert isinstance(responses[0], RuntimeError)
+    assert responses[1] is None
+    # changes are not applied when a command failed
+    assert not requests
+
+    with mock.patch("zhaquirks.xbee.REMOTE_AT_COMMAND_TIMEOUT", 0.01):
+        with pytest.raises(asyncio.TimeoutError):
+            await device.remote_at("D0", 5)
+    assert not at_request._responses._awaiting
+
+    # late responses are ignored
+    frame_id, command = await _next_request(requests)
+    _at_response(device, frame_id, command)
@@ -22,12 +22,19 @@ from zhaquirks.const import (
     ZONE_STATE,
 )
 from zhaquirks.xiaomi import (
+    BATTERY_REPORTED,
+    BATTERY_VOLTAGE_MV,
     LUMI,
+    XIAOMI_AQARA_ATTRIBUTE,
+    XIAOMI_ATTR_4,
     XIAOMI_NODE_DESC,
+    AttributeReportCache,
     BasicCluster,
+    BusRoute,
     XiaomiCustomDevice,
     XiaomiQuickInitDevice,
     handle_quick_init,
+    parse_aqara_tlv,
 )
 import zhaquirks.xiaomi.aqara.motion_aq2
 import zhaquirks.xiaomi.aqara.motion_aq2b
@@ -63,6 +70,44 @@ def test_basic_cluster_deserialize_wrong_len_2():
     assert deserialized[1]
 
 
+def test_attribute_report_cache():
+    """Test repeated attribute reports are interpreted once."""
+    cluster = BasicCluster(mock.MagicMock())
+    cache = AttributeReportCache(maxsize=2)
+
+    hdr = b"\x1c_\x11\x12\n"
+    report_1 = b'\x01\xffB"\x01!\xb3\x0b\x03(\x17\x04!\xa8C\x05!\xa7\x00\x06$\x15'
+    report_1 += b"\x00\x14\x00\x00\x08!\x04\x02\n!\x00\x00d\x10\x01"
+    report_2 = b"\x05\x00B\x15lumi.sensor_wleak.aq1"
+    report_3 = b"\x05\x00B\x15lumi.sensor_wleak.aq2"
+
+    with mock.patch.object(BasicCluster, "attr_report_cache", cache):
+        with mock.patch.object(
+            BasicCluster,
+            "_interpret_attr_reports",
+            side_effect=cluster._interpret_attr_reports,
+        ) as interpret:
+            first = cluster.deserialize(hdr + report_1)
+            call_count = interpret.call_count
+            second = cluster.deserialize(hdr + report_1)
+            assert interpret.call_count == call_count
+
+        assert [a.serialize() for a in first[1]] == [a.serialize() for a in second[1]]
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        # least recently used report is evicted
+        cluster.deserialize(hdr + report_2)
+        cluster.deserialize(hdr + report_1)
+        cluster.deserialize(hdr + report_3)
+        assert len(cache) == 2
+        assert (cache.hits, cache.misses) == (2, 3)
+
+        cluster.deserialize(hdr + report_1)
+        assert (cache.hits, cache.misses) == (3, 3)
+        cluster.deserialize(hdr + report_2)
+        assert (cache.hits, cache.misses) == (3, 4)
+
+
 @pytest.mark.parametrize(
     "quirk",
     (
@@ -424,3 +469,78 @@ def test_attribute_parsing(raw_report):
     # The only remaining data should be the data type and the length.
     # Everything else is passed through unmodified.
     assert len(raw_report) == 2 * len(reports[0])
+
+
+@pytest.mark.parametrize(
+    "value",
+    (
+        "0121E50B0328170421A8130521500006240100000000082105140A214761",
+        "0121630B0421A81305217D2F06240100000000642905006521631D662B4D7F01000A2157DE",
+        (
+            "03282305212E0008212E12092100106410006510006E20006F200094200295390A078C41"
+            "963999EB0C4597390030683B983980BB873C9B2100009C20010A2100000C280000"
+        ),
+        "0121D10B0328150421A8130521A200062403000000000A210000641000",
+        "0121D10B0328150421A8130521A200062403000000000A21000064100000",
+        "",
+    ),
+)
+def test_parse_aqara_tlv(value):
+    """Test parsing Aqara structured attributes."""
+    value = bytes.fromhex(value)
+
+    expected = {}
+    data = value
+    while data not in (b"", b"\x00"):
+        key = data[0]
+        svalue, data = foundation.TypeValue.deserialize(data[1:])
+        expected[key] = svalue.value
+
+    result = parse_aqara_tlv(value)
+    assert result == expected
+    assert [type(v) for v in result.values()] == [type(v) for v in expected.values()]
+
+
+def test_parse_aqara_tlv_truncated():
+    """Test parsing truncated Aqara structured attributes."""
+
+    with pytest.raises(ValueError):
+        parse_aqara_tlv(b"\x01\x21\xe5")
+
+    with pytest.raises(ValueError):
+        parse_aqara_tlv(b"\x01\x21\xe5\x0b\x03")
+
+    with pytest.raises(ValueError):
+        parse_aqara_tlv(b"\x01\x39\x00\x00")
+
+
+def test_attribute_routes():
+    """Test parsed attributes are sent to their routes."""
+
+    class RoutedBasicCluster(BasicCluster):
+        attribute_routes = {
+            **BasicCluster.attribute_routes,
+            "0xff01-8": BusRoute("custom_bus", "custom_reported", lambda x: x * 2),
+        }
+
+    cluster = RoutedBasicCluster(mock.MagicMock())
+    device = cluster.endpoint.device
+    device.model = "lumi.sensor_magnet"
+    value = bytes.fromhex("0121E50B0328170421A8130521500008210514")
+
+    cluster._update_attribute(XIAOMI_AQARA_ATTRIBUTE, value)
+    device.battery_bus.listener_event.assert_called_once_with(BATTERY_REPORTED, 3045)
+    device.custom_bus.listener_event.assert_called_once_with(
+        "custom_reported", 0x1405 * 2
+    )
+    cluster.endpoint.device_temperature.update_attribute.assert_called_once_with(
+        0x0000, 23 * 100
+    )
+
+    # routes are resolved once
+    assert cluster._route_targets[BATTERY_VOLTAGE_MV] is not None
+    assert cluster._route_targets[XIAOMI_ATTR_4] is None
+    targets = dict(cluster._route_targets)
+    cluster._update_attribute(XIAOMI_AQARA_ATTRIBUTE, value)
+    assert cluster._route_targets == targets
+    assert device.custom_bus.listener_event.call_count == 2
@@ -1,10 +1,14 @@
 """Quirks implementations for the ZHA component of Homeassistant."""
-import asyncio
+import contextvars
+import dataclasses
+import functools
 import importlib
 import logging
+import numbers
 import pathlib
 import pkgutil
-from typing import Any, Dict, List, Optional, Union
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import zigpy.device
 import zigpy.endpoint
@@ -17,6 +21,8 @@ from zigpy.zcl.clusters.measurement import OccupancySensing
 from zigpy.zcl.clusters.security import IasZone
 from zigpy.zdo import types as zdotypes
 
+from zhaquirks import instrumentation
+from zhaquirks.configuration import scheduled_configuration
 from zhaquirks.const import (
     ATTRIBUTE_ID,
     ATTRIBUTE_NAME,
@@ -26,6 +32,8 @@ from zhaquirks.const import (
     DEVICE_TYPE,
     ENDPOINTS,
     INPUT_CLUSTERS,
+    INSTRUMENT_QUIRKS,
+    LAZY_LOAD_QUIRKS,
     MANUFACTURER,
     MODEL,
     MODELS_INFO,
@@ -40,10 +48,15 @@ from zhaquirks.const import (
     ZHA_SEND_EVENT,
     ZONE_STATE,
 )
+from zhaquirks.groups import get_coordinator_groups
+from zhaquirks.manifest import LazyQuirkLoader, install_lazy_registry, load_manifest
+from zhaquirks.matcher import install_matcher
+from zhaquirks.timers import get_timer_wheel
 
 _LOGGER = logging.getLogger(__name__)
 OCCUPANCY_STATE = 0
 OCCUPANCY_EVENT = "occupancy_event"
+AGGREGATION_WINDOW_S = 10
 
 
 class Bus(ListenableMixin):
@@ -55,10 +68,75 @@ class Bus(ListenableMixin):
         self._listeners = {}
 
 
+@dataclasses.dataclass(frozen=True)
+class UpdateFilter:
+    """Filter suppressing attribute updates that don't change the value.
+
+    Updates with the current value of the attribute are suppressed, and so are
+    numeric values within the absolute or relative deadband of it. An update
+    is forwarded anyway once `max_silence` seconds passed since the last one.
+    """
+
+    absolute: float = 0
+    relative: float = 0
+    max_silence: Optional[float] = None
+
+    def suppresses(self, current: Any, value: Any) -> bool:
+        """Return True if the update from the current value is suppressed."""
+        if current == value:
+            return True
+        if (
+            not isinstance(current, numbers.Real)
+            or not isinstance(value, numbers.Real)
+            or isinstance(current, bool)
+            or isinstance(value, bool)
+        ):
+            return False
+        delta = abs(value - current)
+        return delta <= self.absolute or delta <= self.relative * abs(current)
+
+
+# Suppress repeated values, still refreshing them every 15 minutes
+SUPPRESS_UNCHANGED = UpdateFilter(max_silence=15 * 60)
+
+
 class LocalDataCluster(CustomCluster):
     """Cluster meant to prevent remote calls."""
 
     _CONSTANT_ATTRIBUTES = {}
+    # Opt-in update filters of attributes, by attribute id
+    _UPDATE_FILTERS: Dict[int, UpdateFilter] = {}
+
+    def __init__(self, *args, **kwargs):
+        """Init."""
+        super().__init__(*args, **kwargs)
+        self._attr_forwarded = {}
+
+    def _suppressed(self, attrid, value) -> bool:
+        """Return True if the update is suppressed by the attribute's filter."""
+        update_filter = self._UPDATE_FILTERS.get(attrid)
+        if update_filter is None:
+            return False
+        now = time.monotonic()
+        forwarded = self._attr_forwarded.get(attrid)
+        if (
+            forwarded is not None
+            and attrid in self._attr_cache
+            and (
+                update_filter.max_silence is None
+                or now - forwarded < update_filter.max_silence
+            )
+            and update_filter.suppresses(self._attr_cache[attrid], value)
+        ):
+            return True
+        self._attr_forwarded[attrid] = now
+        return False
+
+    def _update_attribute(self, attrid, value):
+        """Update attribute, unless suppressed by its update filter."""
+        if self._suppressed(attrid, value):
+            return
+        super()._update_attribute(attrid, value)
 
     async def bind(self):
         """Prevent bind."""
@@ -97,6 +175,8 @@ class LocalDataCluster(CustomCluster):
             if attrid not in self.attributes:
                 self.error("%d is not a valid attribute id", attrid)
                 continue
+            # Written values are never suppressed
+            self._attr_forwarded.pop(attrid, None)
             self._update_attribute(attrid, value)
         return ([foundation.WriteAttributesStatusRecord(foundation.Status.SUCCESS)],)
 
@@ -137,6 +217,133 @@ class EventableCluster(CustomCluster):
         )
 
 
+@dataclasses.dataclass(frozen=True)
+class ReportAggregation:
+    """Aggregation of the reports of an attribute over a window.
+
+    The reported values are buffered for `window` seconds and then updated
+    as one value, their "min", "mean", "max" or "last" value. Values crossing
+    one of the `thresholds` from the last updated value are updated at once.
+    """
+
+    window: float = AGGREGATION_WINDOW_S
+    statistic: str = "mean"
+    thresholds: Tuple[float, ...] = ()
+
+    def __post_init__(self):
+        """Validate the statistic."""
+        if self.statistic not in ("min", "mean", "max", "last"):
+            raise ValueError(f"Unknown report statistic: {self.statistic}")
+
+    def crosses(self, current: float, value: float) -> bool:
+        """Return True if the value is on another side of a threshold."""
+        return any(
+            (current < threshold) != (value < threshold)
+            for threshold in self.thresholds
+        )
+
+
+class _ReportSamples:
+    """Running statistics of the reports in an aggregation window."""
+
+    __slots__ = ("count", "total", "min", "max", "last")
+
+    def __init__(self, value: float) -> None:
+        """Init."""
+        self.count = 1
+        self.total = self.min = self.max = self.last = value
+
+    def add(self, value: float) -> None:
+        """Add a reported value."""
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.last = value
+
+    def value(self, statistic: str) -> float:
+        """Return the statistic of the reported values."""
+        if statistic != "mean":
+            return getattr(self, statistic)
+        mean = self.total / self.count
+        return round(mean) if isinstance(self.last, int) else mean
+
+
+# Attributes updated by the current task are the results of reading them
+_reading_attributes: contextvars.ContextVar = contextvars.ContextVar(
+    "reading_attributes", default=False
+)
+
+
+class AggregatingCluster(CustomCluster):
+    """Cluster aggregating bursts of attribute reports.
+
+    Chatty devices report measurements several times per second, the
+    attributes in `_REPORT_AGGREGATIONS` are instead updated once per
+    aggregation window. The first report of an attribute is updated at once.
+    Values read explicitly are updated as they are.
+    """
+
+    # Aggregations of attribute reports, by attribute id
+    _REPORT_AGGREGATIONS: Dict[int, ReportAggregation] = {}
+
+    def __init__(self, *args, **kwargs):
+        """Init."""
+        super().__init__(*args, **kwargs)
+        self._report_samples: Dict[int, _ReportSamples] = {}
+
+    async def read_attributes(self, *args, **kwargs):
+        """Read attributes, updating the read values without aggregating them."""
+        token = _reading_attributes.set(True)
+        try:
+            return await super().read_attributes(*args, **kwargs)
+        finally:
+            _reading_attributes.reset(token)
+
+    def _update_attribute(self, attrid, value):
+        """Update attribute, or buffer the value if it is aggregated."""
+        if _reading_attributes.get():
+            # The read value is newer than the samples of an open window
+            self._discard_report_samples(attrid)
+            super()._update_attribute(attrid, value)
+            return
+
+        aggregation = self._REPORT_AGGREGATIONS.get(attrid)
+        if (
+            aggregation is None
+            or not isinstance(value, numbers.Real)
+            or isinstance(value, bool)
+        ):
+            super()._update_attribute(attrid, value)
+            return
+
+        samples = self._report_samples.get(attrid)
+        current = self._attr_cache.get(attrid)
+        if current is None or aggregation.crosses(current, value):
+            self._discard_report_samples(attrid)
+            super()._update_attribute(attrid, value)
+        elif samples is None:
+            self._report_samples[attrid] = _ReportSamples(value)
+            get_timer_wheel().schedule(
+                (self, attrid),
+                aggregation.window,
+                functools.partial(self._flush_report_samples, attrid),
+            )
+        else:
+            samples.add(value)
+
+    def _discard_report_samples(self, attrid):
+        """Close the aggregation window of the attribute without updating it."""
+        if self._report_samples.pop(attrid, None) is not None:
+            get_timer_wheel().cancel((self, attrid))
+
+    def _flush_report_samples(self, attrid):
+        """Update the aggregated value of the window."""
+        samples = self._report_samples.pop(attrid)
+        statistic = self._REPORT_AGGREGATIONS[attrid].statistic
+        super()._update_attribute(attrid, samples.value(statistic))
+
+
 class GroupBoundCluster(CustomCluster):
     """Cluster that can only bind to a group instead of direct to hub.
 
@@ -146,12 +353,12 @@ class GroupBoundCluster(CustomCluster):
 
     COORDINATOR_GROUP_ID = 0x30  # Group id with only coordinator as a member
 
+    @scheduled_configuration
     async def bind(self):
         """Bind cluster to a group."""
         # Ensure coordinator is a member of the group
         application = self._endpoint.device.application
-        coordinator = application.get_device(application.ieee)
-        await coordinator.add_to_group(
+        await get_coordinator_groups(application).join(
             self.COORDINATOR_GROUP_ID,
             name="Coordinator Group - Created by ZHAQuirks",
         )
@@ -230,11 +437,13 @@ class _Motion(CustomCluster, IasZone):
     def __init__(self, *args, **kwargs):
         """Init."""
         super().__init__(*args, **kwargs)
-        self._loop = asyncio.get_running_loop()
-        self._timer_handle = None
+        self._reset_timers = get_timer_wheel()
+
+    def _schedule_reset(self):
+        """(Re)start the countdown to turning motion off."""
+        self._reset_timers.schedule(self, self.reset_s, self._turn_off)
 
     def _turn_off(self):
-        self._timer_handle = None
         _LOGGER.debug("%s - Resetting motion sensor", self.endpoint.device.ieee)
         self.listener_event(CLUSTER_COMMAND, 253, ZONE_STATE, [OFF, 0, 0, 0])
         self._update_attribute(ZONE_STATE, OFF)
@@ -259,9 +468,7 @@ class MotionWithReset(_Motion):
     ):
         """Handle the cluster command."""
         if hdr.command_id == ZONE_STATE:
-            if self._timer_handle:
-                self._timer_handle.cancel()
-            self._timer_handle = self._loop.call_later(self.reset_s, self._turn_off)
+            self._schedule_reset()
             if self.send_occupancy_event:
                 self.endpoint.device.occupancy_bus.listener_event(OCCUPANCY_EVENT)
 
@@ -283,10 +490,7 @@ class MotionOnEvent(_Motion):
 
         _LOGGER.debug("%s - Received motion event message", self.endpoint.device.ieee)
 
-        if self._timer_handle:
-            self._timer_handle.cancel()
-
-        self._timer_handle = self._loop.call_later(self.reset_s, self._turn_off)
+        self._schedule_reset()
 
 
 class _Occupancy(CustomCluster, OccupancySensing):
@@ -297,11 +501,13 @@ class _Occupancy(CustomCluster, OccupancySensing):
     def __init__(self, *args, **kwargs):
         """Init."""
         super().__init__(*args, **kwargs)
-        self._timer_handle = None
-        self._loop = asyncio.get_running_loop()
+        self._reset_timers = get_timer_wheel()
+
+    def _schedule_reset(self):
+        """(Re)start the countdown to turning occupancy off."""
+        self._reset_timers.schedule(self, self.reset_s, self._turn_off)
 
     def _turn_off(self):
-        self._timer_handle = None
         self._update_attribute(OCCUPANCY_STATE, OFF)
 
 
@@ -317,10 +523,7 @@ class OccupancyOnEvent(_Occupancy):
         """Occupancy event."""
         self._update_attribute(OCCUPANCY_STATE, ON)
 
-        if self._timer_handle:
-            self._timer_handle.cancel()
-
-        self._timer_handle = self._loop.call_later(self.reset_s, self._turn_off)
+        self._schedule_reset()
 
 
 class OccupancyWithReset(_Occupancy):
@@ -330,10 +533,8 @@ class OccupancyWithReset(_Occupancy):
         super()._update_attribute(attrid, value)
 
         if attrid == OCCUPANCY_STATE and value == ON:
-            if self._timer_handle:
-                self._timer_handle.cancel()
             self.endpoint.device.motion_bus.listener_event(MOTION_EVENT)
-            self._timer_handle = self._loop.call_later(self.reset_s, self._turn_off)
+            self._schedule_reset()
 
 
 class QuickInitDevice(CustomDevice):
@@ -385,14 +586,28 @@ class QuickInitDevice(CustomDevice):
 def setup(config: Optional[Dict[str, Any]] = None) -> None:
     """Register all quirks with zigpy, including optional custom quirks."""
 
-    # Import all quirks in the `zhaquirks` package first
+    loader = None
+    if config and config.get(LAZY_LOAD_QUIRKS):
+        manifest = load_manifest()
+        if manifest is None:
+            _LOGGER.debug("No usable quirk manifest, importing all quirks")
+        else:
+            loader = LazyQuirkLoader(manifest)
+
+    # Import all quirks in the `zhaquirks` package first. With lazy loading only
+    # packages and modules missing from the manifest are imported right away.
     for importer, modname, ispkg in pkgutil.walk_packages(
         path=__path__,
         prefix=__name__ + ".",
     ):
+        if loader is not None and not ispkg and modname in loader.modules:
+            continue
         _LOGGER.debug("Loading quirks module %s", modname)
         importlib.import_module(modname)
 
+    if loader is not None:
+        install_lazy_registry(loader)
+
     # Treat the custom quirk path (e.g. `/config/custom_quirks/`) itself as a module
     if config and config.get(CUSTOM_QUIRKS_PATH):
         path = pathlib.Path(config[CUSTOM_QUIRKS_PATH])
@@ -401,3 +616,9 @@ def setup(config: Optional[Dict[str, Any]] = None) -> None:
         for importer, modname, ispkg in pkgutil.walk_packages(path=[str(path)]):
             _LOGGER.debug("Loading custom quirks module %s", modname)
             importer.find_module(modname).load_module(modname)
+
+    # Match devices against compiled quirk signatures
+    install_matcher()
+
+    if config and config.get(INSTRUMENT_QUIRKS):
+        instrumentation.enable()
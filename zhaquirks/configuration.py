@@ -0,0 +1,361 @@
+"""Configuring clusters when they are bound.
+
+Some remotes only report button presses once manufacturer attributes are
+written when they are bound. Attributes the device already has according to
+the attribute cache are skipped, the others are packed into as few Write
+Attributes frames as the maximum incoming transfer size of the device allows.
+Only the attributes that failed are written again.
+
+Bind overrides go through the configuration scheduler of their network, which
+caps how many devices are configured at once in total and behind each parent
+router, and lets mains powered devices go first. The clusters of a device
+bound at the same time share the slot of the device. The configuration of
+sleepy devices times out and is tried again when the device next checks in.
+"""
+import asyncio
+import bisect
+import collections
+import contextvars
+import functools
+import itertools
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import zigpy.application
+import zigpy.device
+import zigpy.exceptions
+from zigpy.quirks import CustomCluster
+from zigpy.zcl import foundation
+
+ATTR_CONFIG_RETRIES = 2
+# Maximum incoming transfer size assumed when the node descriptor doesn't have it
+DEFAULT_MAX_TRANSFER_SIZE = 82
+ZCL_HEADER_SIZE = 3
+ZCL_MANUFACTURER_HEADER_SIZE = 5
+
+MAX_CONCURRENT_CONFIGURATIONS = 8
+MAX_CONCURRENT_CONFIGURATIONS_PER_PARENT = 2
+SLEEPY_CONFIGURATION_ATTEMPTS = 3
+SLEEPY_CONFIGURATION_TIMEOUT = 30
+
+# Writes failing with these won't succeed when tried again
+PERMANENT_WRITE_FAILURES = frozenset(
+    (
+        foundation.Status.NOT_AUTHORIZED,
+        foundation.Status.UNSUPPORTED_ATTRIBUTE,
+        foundation.Status.INVALID_VALUE,
+        foundation.Status.READ_ONLY,
+        foundation.Status.INVALID_DATA_TYPE,
+    )
+)
+
+
+def max_write_payload(cluster: CustomCluster, manufacturer: Optional[int]) -> int:
+    """Size of the write attribute records fitting in a frame to the device."""
+
+    node_desc = cluster.endpoint.device.node_desc
+    size = getattr(node_desc, "maximum_incoming_transfer_size", None)
+    if not size:
+        size = DEFAULT_MAX_TRANSFER_SIZE
+    if manufacturer is None:
+        return size - ZCL_HEADER_SIZE
+    return size - ZCL_MANUFACTURER_HEADER_SIZE
+
+
+def pack_write_records(
+    records: List[foundation.Attribute], max_payload: int
+) -> List[List[foundation.Attribute]]:
+    """Pack the records into frames, in order, without exceeding the payload size.
+
+    A record larger than the payload size is sent in a frame of its own.
+    """
+
+    frames: List[List[foundation.Attribute]] = []
+    frame: List[foundation.Attribute] = []
+    size = 0
+    for record in records:
+        record_size = len(record.serialize())
+        if frame and size + record_size > max_payload:
+            frames.append(frame)
+            frame, size = [], 0
+        frame.append(record)
+        size += record_size
+    if frame:
+        frames.append(frame)
+    return frames
+
+
+def _failed_records(result: Any, frame: List[foundation.Attribute]):
+    """Return the status of the records of the frame that weren't written."""
+
+    if not isinstance(result[0], list):
+        return {record.attrid: foundation.Status.FAILURE for record in frame}
+    return {
+        record.attrid: record.status
+        for record in result[0]
+        if record.status != foundation.Status.SUCCESS
+    }
+
+
+async def write_attr_config(
+    cluster: CustomCluster,
+    attr_config: Dict[int, Any],
+    manufacturer: Optional[int] = None,
+    retries: int = ATTR_CONFIG_RETRIES,
+) -> Dict[int, foundation.Status]:
+    """Write the attributes the device doesn't have yet.
+
+    Return the status of the attributes that couldn't be written, FAILURE if
+    the frame wasn't delivered.
+    """
+
+    records = [
+        record
+        for record in cluster._write_attr_records(attr_config)
+        if cluster._attr_cache.get(record.attrid) != record.value.value
+    ]
+    max_payload = max_write_payload(cluster, manufacturer)
+
+    failed: Dict[int, foundation.Status] = {}
+    for attempt in range(retries + 1):
+        if attempt:
+            records = [
+                record
+                for record in records
+                if failed.get(record.attrid) not in (None, *PERMANENT_WRITE_FAILURES)
+            ]
+            if not records:
+                break
+            cluster.debug("Writing %d configuration attributes again", len(records))
+
+        failed = {
+            attrid: status
+            for attrid, status in failed.items()
+            if status in PERMANENT_WRITE_FAILURES
+        }
+        for frame in pack_write_records(records, max_payload):
+            try:
+                result = await cluster.write_attributes(
+                    {record.attrid: record.value.value for record in frame},
+                    manufacturer=manufacturer,
+                )
+            except (zigpy.exceptions.ZigbeeException, asyncio.TimeoutError) as exc:
+                cluster.debug("Failed to write configuration attributes: %s", exc)
+                result = [foundation.Status.FAILURE]
+            failed.update(_failed_records(result, frame))
+
+        if not failed:
+            break
+
+    if failed:
+        cluster.warning("Failed to write configuration attributes: %s", failed)
+    return failed
+
+
+# Device configured by the current task, nested configurations run right away
+_configuring: contextvars.ContextVar = contextvars.ContextVar(
+    "configuring", default=None
+)
+
+
+class _DeviceSlot:
+    """Slot of a device, shared by the configurations running for it."""
+
+    __slots__ = ("parent", "acquiring", "users")
+
+    def __init__(self, parent) -> None:
+        """Init."""
+        self.parent = parent
+        self.acquiring: Optional[asyncio.Future] = None
+        self.users = 0
+
+
+class ConfigurationScheduler:
+    """Limit the devices of a network being configured at once."""
+
+    def __init__(
+        self,
+        application: zigpy.application.ControllerApplication,
+        max_concurrent: int = MAX_CONCURRENT_CONFIGURATIONS,
+        max_per_parent: int = MAX_CONCURRENT_CONFIGURATIONS_PER_PARENT,
+    ) -> None:
+        """Init."""
+        self.max_concurrent = max_concurrent
+        self.max_per_parent = max_per_parent
+        self.in_flight = 0
+        self._parents: collections.Counter = collections.Counter()
+        # (priority, sequence, parent, future) sorted by priority and arrival
+        self._waiters: List[Tuple[int, int, Any, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._slots: Dict[Any, _DeviceSlot] = {}
+        # child -> parent from the neighbor tables, built once per pass
+        self._children: Optional[Dict[Any, Any]] = None
+        self._deferred: Dict[Any, List[Tuple[Callable[[], Awaitable], int]]] = {}
+        self._retries: Set[asyncio.Task] = set()
+        application.add_listener(self)
+
+    def _parent(self, device: zigpy.device.Device) -> Any:
+        """Parent of an end device, according to the neighbor tables."""
+
+        node_desc = device.node_desc
+        if node_desc is None or not node_desc.is_end_device:
+            return None
+        if self._children is None:
+            self._children = {
+                neighbor.device.ieee: parent.ieee
+                for parent in device.application.devices.values()
+                for neighbor in parent.neighbors
+                if neighbor.device is not None
+            }
+        return self._children.get(device.ieee)
+
+    def _can_start(self, parent) -> bool:
+        return self.in_flight < self.max_concurrent and (
+            parent is None or self._parents[parent] < self.max_per_parent
+        )
+
+    def _wake(self) -> None:
+        """Start the waiting configurations there is room for, by priority."""
+
+        for waiter in list(self._waiters):
+            if self.in_flight >= self.max_concurrent:
+                return
+            _, _, parent, future = waiter
+            if future.done():
+                self._waiters.remove(waiter)
+            elif self._can_start(parent):
+                self._waiters.remove(waiter)
+                self.in_flight += 1
+                self._parents[parent] += 1
+                future.set_result(None)
+
+    async def _acquire(self, priority: int, parent) -> None:
+        future = asyncio.get_running_loop().create_future()
+        bisect.insort(self._waiters, (priority, next(self._sequence), parent, future))
+        self._wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(parent)
+            raise
+
+    def _release(self, parent) -> None:
+        self.in_flight -= 1
+        self._parents[parent] -= 1
+        if not self._parents[parent]:
+            del self._parents[parent]
+        self._wake()
+        if not self.in_flight and not self._waiters:
+            # The pass is over, neighbor tables may change until the next one
+            self._children = None
+
+    def _leave(self, slot: _DeviceSlot) -> None:
+        """Give back the slot of a device no configuration runs for anymore."""
+
+        acquiring = slot.acquiring
+        if (
+            acquiring.done()
+            and not acquiring.cancelled()
+            and acquiring.exception() is None
+        ):
+            self._release(slot.parent)
+        else:
+            acquiring.cancel()
+
+    async def run(
+        self,
+        device: zigpy.device.Device,
+        configure: Callable[[], Awaitable],
+        attempt: int = 1,
+    ) -> Any:
+        """Configure the device once there is room for it."""
+
+        if _configuring.get() is device:
+            return await configure()
+
+        node_desc = device.node_desc
+        mains_powered = node_desc is not None and node_desc.is_mains_powered
+        sleepy = node_desc is not None and node_desc.is_receiver_on_when_idle is False
+
+        slot = self._slots.get(device.ieee)
+        if slot is None:
+            slot = self._slots[device.ieee] = _DeviceSlot(self._parent(device))
+            slot.acquiring = asyncio.ensure_future(
+                self._acquire(0 if mains_powered else 1, slot.parent)
+            )
+        slot.users += 1
+        token = None
+        try:
+            await asyncio.shield(slot.acquiring)
+            token = _configuring.set(device)
+            if not sleepy:
+                return await configure()
+            try:
+                return await asyncio.wait_for(configure(), SLEEPY_CONFIGURATION_TIMEOUT)
+            except asyncio.TimeoutError:
+                if attempt < SLEEPY_CONFIGURATION_ATTEMPTS:
+                    device.debug("Configuration timed out, retrying at next check-in")
+                    self._deferred.setdefault(device.ieee, []).append(
+                        (configure, attempt + 1)
+                    )
+                raise
+        finally:
+            if token is not None:
+                _configuring.reset(token)
+            slot.users -= 1
+            if not slot.users:
+                del self._slots[device.ieee]
+                self._leave(slot)
+
+    async def _retry(
+        self,
+        device: zigpy.device.Device,
+        configure: Callable[[], Awaitable],
+        attempt: int,
+    ) -> None:
+        try:
+            await self.run(device, configure, attempt)
+        except Exception as exc:  # pylint: disable=broad-except
+            device.debug("Retried configuration failed: %r", exc)
+
+    def handle_message(
+        self, sender: zigpy.device.Device, profile, cluster, src_ep, dst_ep, message
+    ) -> None:
+        """Retry the timed out configuration of a device checking in."""
+
+        for configure, attempt in self._deferred.pop(sender.ieee, ()):
+            # The loop only keeps weak references to its tasks
+            task = asyncio.ensure_future(self._retry(sender, configure, attempt))
+            self._retries.add(task)
+            task.add_done_callback(self._retries.discard)
+
+    def device_removed(self, device: zigpy.device.Device) -> None:
+        """Forget the timed out configuration of a removed device."""
+        self._deferred.pop(device.ieee, None)
+
+
+def get_configuration_scheduler(
+    application: zigpy.application.ControllerApplication,
+) -> ConfigurationScheduler:
+    """Return the configuration scheduler of the network."""
+
+    # Deferred configurations lead back to the application, kept on it the
+    # scheduler is released together with the application
+    scheduler = getattr(application, "_zhaquirks_configuration_scheduler", None)
+    if scheduler is None:
+        scheduler = ConfigurationScheduler(application)
+        application._zhaquirks_configuration_scheduler = scheduler
+    return scheduler
+
+
+def scheduled_configuration(bind: Callable[..., Awaitable]) -> Callable:
+    """Run the bind method of a cluster through the configuration scheduler."""
+
+    @functools.wraps(bind)
+    async def wrapper(self, *args, **kwargs):
+        device = self.endpoint.device
+        return await get_configuration_scheduler(device.application).run(
+            device, functools.partial(bind, self, *args, **kwargs)
+        )
+
+    return wrapper
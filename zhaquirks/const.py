@@ -66,6 +66,8 @@ ALT_DOUBLE_PRESS = "remote_button_alt_double_press"
 ENDPOINT_ID = "endpoint_id"
 ENDPOINTS = SIG_ENDPOINTS
 INPUT_CLUSTERS = SIG_EP_INPUT
+INSTRUMENT_QUIRKS = "instrument_quirks"
+LAZY_LOAD_QUIRKS = "lazy_load_quirks"
 LEFT = "left"
 LONG_PRESS = "remote_button_long_press"
 LONG_RELEASE = "remote_button_long_release"
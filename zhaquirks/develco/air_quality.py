@@ -17,6 +17,7 @@ from zigpy.zcl.clusters.general import (
 from zigpy.zcl.clusters.measurement import RelativeHumidity, TemperatureMeasurement
 
 from zhaquirks import Bus, LocalDataCluster
+from zhaquirks.configuration import scheduled_configuration
 from zhaquirks.const import (
     DEVICE_TYPE,
     ENDPOINTS,
@@ -129,6 +130,7 @@ class EmulatedVOCMeasurement(LocalDataCluster):
         super().__init__(*args, **kwargs)
         self.endpoint.device.voc_bus.add_listener(self)
 
+    @scheduled_configuration
     async def bind(self):
         """Bind cluster."""
         result = await self.endpoint.device.app_cluster.bind()
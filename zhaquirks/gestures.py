@@ -0,0 +1,126 @@
+"""Button gesture engine deriving multi clicks and holds from raw button events.
+
+Each remote keeps its own `ButtonGestures`, with independent state for every
+button. Pending gestures are completed by loop timers, a timer per button is
+re-armed on every press instead of starting a task per press.
+"""
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Hashable, Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+MULTI_CLICK_S = 0.3
+
+
+class _ButtonState:
+    """Gesture state of a single button."""
+
+    __slots__ = ("clicks", "data", "handle", "pressed")
+
+    def __init__(self) -> None:
+        """Init."""
+        self.clicks = 0
+        self.data: Any = None
+        self.handle: Optional[asyncio.TimerHandle] = None
+        self.pressed = False
+
+
+class ButtonGestures:
+    """Derive multi click and hold gestures of the buttons of a device.
+
+    Presses within `multi_click_s` of each other are counted and reported as
+    one multi click once the button stays idle that long. With a `hold_s`,
+    a button pressed for that long is reported as held instead and its
+    release is reported too. A `multi_click_s` of 0 reports every click on
+    its own, as soon as the button is released.
+    """
+
+    def __init__(
+        self,
+        on_clicks: Callable[[Hashable, int, Any], None],
+        *,
+        on_hold: Optional[Callable[[Hashable, Any], None]] = None,
+        on_release: Optional[Callable[[Hashable, Any], None]] = None,
+        multi_click_s: float = MULTI_CLICK_S,
+        hold_s: Optional[float] = None,
+        max_clicks: Optional[int] = None,
+    ) -> None:
+        """Init."""
+        self._on_clicks = on_clicks
+        self._on_hold = on_hold
+        self._on_release = on_release
+        self.multi_click_s = multi_click_s
+        self.hold_s = hold_s
+        self.max_clicks = max_clicks
+        self._buttons: Dict[Hashable, _ButtonState] = {}
+
+    def _rearm(self, state: _ButtonState, delay: float, callback, button) -> None:
+        if state.handle is not None:
+            state.handle.cancel()
+        state.handle = asyncio.get_running_loop().call_later(delay, callback, button)
+
+    def _cancel(self, state: _ButtonState) -> bool:
+        if state.handle is None:
+            return False
+        state.handle.cancel()
+        state.handle = None
+        return True
+
+    def press(self, button: Hashable, data: Any = None) -> None:
+        """Process a button press, data is passed to the gesture callbacks."""
+
+        state = self._buttons.get(button)
+        if state is None:
+            state = self._buttons[button] = _ButtonState()
+
+        # A press within the multi click window continues the gesture
+        if not self._cancel(state):
+            state.clicks = 0
+        state.clicks += 1
+        state.data = data
+        state.pressed = True
+
+        if self.hold_s is not None:
+            self._rearm(state, self.hold_s, self._hold_timeout, button)
+        elif self.max_clicks is not None and state.clicks >= self.max_clicks:
+            self._clicks_timeout(button)
+        else:
+            self._rearm(state, self.multi_click_s, self._clicks_timeout, button)
+
+    def release(self, button: Hashable, data: Any = None) -> None:
+        """Process a button release."""
+
+        state = self._buttons.get(button)
+        if state is None or not state.pressed:
+            # Released after a hold, or a release without press
+            if self._on_release is not None:
+                self._on_release(button, data)
+            return
+
+        state.pressed = False
+        state.data = data if data is not None else state.data
+        self._cancel(state)
+
+        if self.multi_click_s <= 0 or (
+            self.max_clicks is not None and state.clicks >= self.max_clicks
+        ):
+            self._clicks_timeout(button)
+        else:
+            self._rearm(state, self.multi_click_s, self._clicks_timeout, button)
+
+    def _clicks_timeout(self, button: Hashable) -> None:
+        state = self._buttons[button]
+        state.handle = None
+        clicks, state.clicks = state.clicks, 0
+        _LOGGER.debug("Button %s clicked %s times", button, clicks)
+        self._on_clicks(button, clicks, state.data)
+
+    def _hold_timeout(self, button: Hashable) -> None:
+        state = self._buttons[button]
+        state.handle = None
+        state.clicks = 0
+        state.pressed = False
+        _LOGGER.debug("Button %s held", button)
+        if self._on_hold is not None:
+            self._on_hold(button, state.data)
@@ -0,0 +1,82 @@
+"""Groups the coordinator joined for quirks binding to a group.
+
+Clusters binding to a group first make sure the coordinator is a member of it,
+which is the same round trip for every bound cluster of every device. The
+groups the coordinator joined are remembered for the network instead, and
+concurrent joins of the same group share a single request. A group is joined
+again once zigpy removes the coordinator from it.
+
+The groups are held per application, so they only keep a weak reference to
+it.
+"""
+import asyncio
+from typing import Dict, Optional, Set, Tuple
+import weakref
+
+import zigpy.application
+import zigpy.group
+import zigpy.types as t
+
+
+class CoordinatorGroups:
+    """Groups the coordinator of a network joined."""
+
+    def __init__(self, application: zigpy.application.ControllerApplication) -> None:
+        """Init."""
+        self._application_ref = weakref.ref(application)
+        self._joined: Set[Tuple[t.EUI64, int]] = set()
+        self._joining: Dict[Tuple[t.EUI64, int], asyncio.Future] = {}
+        application.groups.add_listener(self)
+
+    @property
+    def _application(self) -> zigpy.application.ControllerApplication:
+        return self._application_ref()
+
+    def __contains__(self, group_id: int) -> bool:
+        """Return True if the coordinator joined the group."""
+        return (self._application.ieee, group_id) in self._joined
+
+    async def join(self, group_id: int, name: Optional[str] = None) -> None:
+        """Add the coordinator to the group, unless it already joined it."""
+
+        coordinator = self._application.get_device(self._application.ieee)
+        key = (coordinator.ieee, group_id)
+        if key in self._joined:
+            return
+
+        joining = self._joining.get(key)
+        if joining is None:
+            joining = self._joining[key] = asyncio.ensure_future(
+                coordinator.add_to_group(group_id, name=name)
+            )
+            joining.add_done_callback(lambda _: self._joining.pop(key, None))
+        await asyncio.shield(joining)
+
+        # Failing to add its endpoints isn't an error, check zigpy added them
+        group = self._application.groups.get(group_id)
+        if group is not None and any(
+            ieee == coordinator.ieee for ieee, _ in group.members
+        ):
+            self._joined.add(key)
+
+    def group_member_removed(self, group: zigpy.group.Group, ep) -> None:
+        """Forget the group when the coordinator leaves it."""
+        self._joined.discard((ep.device.ieee, group.group_id))
+
+    def group_removed(self, group: zigpy.group.Group) -> None:
+        """Forget the removed group."""
+        self._joined = {key for key in self._joined if key[1] != group.group_id}
+
+
+_COORDINATOR_GROUPS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_coordinator_groups(
+    application: zigpy.application.ControllerApplication,
+) -> CoordinatorGroups:
+    """Return the groups the coordinator of the network joined."""
+
+    groups = _COORDINATOR_GROUPS.get(application)
+    if groups is None:
+        groups = _COORDINATOR_GROUPS[application] = CoordinatorGroups(application)
+    return groups
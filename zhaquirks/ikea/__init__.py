@@ -7,6 +7,8 @@ from zigpy.zcl.clusters.general import Scenes
 from zigpy.zcl.clusters.lightlink import LightLink
 
 from zhaquirks import DoublingPowerConfigurationCluster
+from zhaquirks.configuration import scheduled_configuration
+from zhaquirks.groups import get_coordinator_groups
 
 _LOGGER = logging.getLogger(__name__)
 IKEA = "IKEA of Sweden"
@@ -16,11 +18,12 @@ ROTATED = "device_rotated"
 class LightLinkCluster(CustomCluster, LightLink):
     """Ikea LightLink cluster."""
 
+    @scheduled_configuration
     async def bind(self):
         """Bind LightLink cluster to coordinator."""
         application = self._endpoint.device.application
         try:
-            coordinator = application.get_device(application.ieee)
+            application.get_device(application.ieee)
         except KeyError:
             _LOGGER.warning("Aborting - unable to locate required coordinator device.")
             return
@@ -33,7 +36,7 @@ class LightLinkCluster(CustomCluster, LightLink):
                 "unable to locate required group info - falling back to group 0x0000."
             )
             group_id = 0x0000
-        status = await coordinator.add_to_group(
+        status = await get_coordinator_groups(application).join(
             group_id,
             name="Default Lightlink Group",
         )
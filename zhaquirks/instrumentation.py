@@ -0,0 +1,296 @@
+"""Optional timing of the quirk hot paths.
+
+When a coordinator's event loop lags there is no telling which quirk is
+blocking it. Once enabled, the overrides quirk clusters make of the hot
+cluster methods and the fan-out of the quirk event buses are timed and counted
+per quirk, cluster and method in an in-process stats registry.
+
+Only the time spent running on the event loop is counted: coroutines are timed
+step by step, the time they spend awaiting isn't. Times are inclusive, a
+cluster's `handle_cluster_request` includes the `_update_attribute` calls it
+makes. Instrumentation wraps the methods of the cluster classes when enabled
+and restores them when disabled, so it costs nothing while disabled.
+"""
+import asyncio
+import dataclasses
+import functools
+import inspect
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+import weakref
+
+from zigpy.quirks import CustomCluster
+
+INSTRUMENTED_METHODS = (
+    "handle_cluster_request",
+    "_update_attribute",
+    "deserialize",
+    "write_attributes",
+    "command",
+)
+
+_MISSING = object()
+
+
+class StatsKey(NamedTuple):
+    """Quirk, cluster and method the stats are kept for."""
+
+    quirk: str
+    cluster: str
+    method: str
+
+
+@dataclasses.dataclass
+class MethodStats:
+    """Calls and time spent in an instrumented method."""
+
+    calls: int = 0
+    errors: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        """Mean time spent per call."""
+        return self.total / self.calls if self.calls else 0.0
+
+
+class StatsRegistry:
+    """Stats of the instrumented methods."""
+
+    def __init__(self) -> None:
+        """Init."""
+        self._stats: Dict[StatsKey, MethodStats] = {}
+
+    def record(self, key: StatsKey, elapsed: float, error: bool = False) -> None:
+        """Count a call of the method."""
+
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = MethodStats()
+        stats.calls += 1
+        stats.errors += error
+        stats.total += elapsed
+        if elapsed > stats.max:
+            stats.max = elapsed
+
+    def snapshot(self) -> Dict[StatsKey, MethodStats]:
+        """Return a copy of the stats, by decreasing total time."""
+
+        return {
+            key: dataclasses.replace(stats)
+            for key, stats in sorted(
+                self._stats.items(), key=lambda item: item[1].total, reverse=True
+            )
+        }
+
+    def reset(self) -> None:
+        """Forget all stats."""
+        self._stats.clear()
+
+
+STATS = StatsRegistry()
+
+_registry: Optional[StatsRegistry] = None
+# Methods wrapped on each class, with the attribute they replaced
+_originals: Dict[Tuple[type, str], Any] = {}
+# (instance, method) pairs being timed, calls through `super()` aren't timed again
+_active: Set[Tuple[int, str]] = set()
+# Quirk of the devices of the buses, all listeners of a bus belong to one device
+_bus_quirks: "weakref.WeakKeyDictionary[Any, str]" = weakref.WeakKeyDictionary()
+
+
+@functools.lru_cache(maxsize=None)
+def _qualname(cls: type) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _cluster_key(cluster: CustomCluster, method: str, *args: Any) -> StatsKey:
+    return StatsKey(
+        _qualname(type(cluster.endpoint.device)), _qualname(type(cluster)), method
+    )
+
+
+def _bus_key(bus: Any, method: str, event: str, *args: Any) -> StatsKey:
+    """Stats key of a bus event, the quirk is the device of its listeners."""
+
+    quirk = _bus_quirks.get(bus)
+    if quirk is None:
+        quirk = ""
+        for listener, _ in bus._listeners.values():  # pylint: disable=W0212
+            endpoint = getattr(listener, "endpoint", None)
+            if endpoint is not None:
+                quirk = _bus_quirks[bus] = _qualname(type(endpoint.device))
+                break
+    return StatsKey(quirk, f"{_qualname(type(bus))}:{event}", method)
+
+
+class _TimedSteps:
+    """Awaitable running a coroutine, timing only its steps on the event loop."""
+
+    __slots__ = ("_coro", "_registry", "_key", "_active")
+
+    def __init__(
+        self,
+        coro: Any,
+        registry: StatsRegistry,
+        key: StatsKey,
+        active: Tuple[int, str],
+    ) -> None:
+        """Init."""
+        self._coro = coro
+        self._registry = registry
+        self._key = key
+        self._active = active
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        coro, registry, key, active = (
+            self._coro,
+            self._registry,
+            self._key,
+            self._active,
+        )
+        elapsed = 0.0
+        value: Any = None
+        exc: Optional[BaseException] = None
+        while True:
+            _active.add(active)
+            start = time.perf_counter()
+            try:
+                if exc is None:
+                    yielded = coro.send(value)
+                else:
+                    yielded = coro.throw(exc)
+            except StopIteration as stop:
+                registry.record(key, elapsed + time.perf_counter() - start)
+                return stop.value
+            except BaseException:
+                registry.record(key, elapsed + time.perf_counter() - start, error=True)
+                raise
+            finally:
+                _active.discard(active)
+            elapsed += time.perf_counter() - start
+
+            try:
+                value, exc = (yield yielded), None
+            except BaseException as err:  # pylint: disable=broad-except
+                value, exc = None, err
+
+
+def _instrument(
+    func: Callable, method: str, key_func: Callable[..., StatsKey]
+) -> Callable:
+    """Wrap the method to record its calls in the enabled stats registry."""
+
+    if asyncio.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            active = (id(self), method)
+            registry = _registry
+            if registry is None or active in _active:
+                return await func(self, *args, **kwargs)
+            return await _TimedSteps(
+                func(self, *args, **kwargs),
+                registry,
+                key_func(self, method, *args),
+                active,
+            )
+
+    else:
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            active = (id(self), method)
+            registry = _registry
+            if registry is None or active in _active:
+                return func(self, *args, **kwargs)
+
+            _active.add(active)
+            start = time.perf_counter()
+            error = True
+            try:
+                result = func(self, *args, **kwargs)
+                error = False
+                return result
+            finally:
+                _active.discard(active)
+                registry.record(
+                    key_func(self, method, *args),
+                    time.perf_counter() - start,
+                    error=error,
+                )
+
+    return wrapper
+
+
+def _patch(cls: type, name: str, func: Callable, key_func: Callable) -> None:
+    _originals[(cls, name)] = cls.__dict__.get(name, _MISSING)
+    setattr(cls, name, _instrument(func, name, key_func))
+
+
+def _cluster_classes() -> Iterator[type]:
+    """All quirk cluster classes defined so far."""
+
+    pending = list(CustomCluster.__subclasses__())
+    seen = set()
+    while pending:
+        cls = pending.pop()
+        if cls in seen:
+            continue
+        seen.add(cls)
+        pending.extend(cls.__subclasses__())
+        yield cls
+
+
+def instrument_clusters() -> None:
+    """Wrap the overrides of the quirk cluster classes not instrumented yet."""
+
+    if _registry is None:
+        return
+
+    for cls in _cluster_classes():
+        for name in INSTRUMENTED_METHODS:
+            func = cls.__dict__.get(name)
+            if inspect.isfunction(func) and (cls, name) not in _originals:
+                _patch(cls, name, func, _cluster_key)
+
+
+def enable(registry: StatsRegistry = STATS) -> None:
+    """Record the calls of the quirk hot paths in the registry."""
+
+    from zhaquirks import Bus  # pylint: disable=import-outside-toplevel
+
+    global _registry  # pylint: disable=global-statement
+    _registry = registry
+    if (Bus, "listener_event") not in _originals:
+        _patch(Bus, "listener_event", Bus.listener_event, _bus_key)
+    instrument_clusters()
+
+
+def disable() -> None:
+    """Stop recording and restore the instrumented methods."""
+
+    global _registry  # pylint: disable=global-statement
+    _registry = None
+    for (cls, name), original in _originals.items():
+        if original is _MISSING:
+            delattr(cls, name)
+        else:
+            setattr(cls, name, original)
+    _originals.clear()
+
+
+def is_enabled() -> bool:
+    """Return True if the quirk hot paths are instrumented."""
+    return _registry is not None
@@ -4,6 +4,9 @@ import logging
 from zigpy.quirks import CustomCluster
 from zigpy.zcl.clusters.lightlink import LightLink
 
+from zhaquirks.configuration import scheduled_configuration
+from zhaquirks.groups import get_coordinator_groups
+
 _LOGGER = logging.getLogger(__name__)
 MANUFACTURER = "LDS"
 
@@ -11,18 +14,19 @@ MANUFACTURER = "LDS"
 class LightLinkCluster(CustomCluster, LightLink):
     """LDS LightLink cluster."""
 
+    @scheduled_configuration
     async def bind(self):
         """Bind LightLink cluster to coordinator."""
         application = self._endpoint.device.application
         try:
-            coordinator = application.get_device(application.ieee)
+            application.get_device(application.ieee)
         except KeyError:
             _LOGGER.warning("Aborting - unable to locate required coordinator device.")
             return
         group_list = await self.get_group_identifiers(0)
         group_record = group_list[2]
         group_id = group_record[0].group_id
-        status = await coordinator.add_to_group(
+        status = await get_coordinator_groups(application).join(
             group_id,
             name=f"{str(self.endpoint.device.ieee)} - {self.endpoint.manufacturer} {self.endpoint.model}",
         )
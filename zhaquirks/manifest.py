@@ -0,0 +1,350 @@
+"""Quirk manifest used to import quirk modules on demand.
+
+The manifest describes the signature of every quirk shipped with zhaquirks
+together with the module defining it. With a manifest available,
+`zhaquirks.setup()` can skip importing the quirk modules and instead import
+each one the first time zigpy's device registry is asked about a matching
+device.
+
+The manifest is generated by importing every quirk once, see
+`script/gen_manifest`. The manifest records a hash of the source of every
+module in the package, a manifest not matching the installed package is
+ignored. Each quirk entry
+records the order zigpy registered it in, quirks imported on demand are given
+the priorities they would have had if all quirks were imported.
+"""
+import collections
+import hashlib
+import heapq
+import importlib
+import json
+import logging
+import pathlib
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import zigpy.quirks
+from zigpy.quirks.registry import DeviceRegistry
+
+from zhaquirks import instrumentation
+from zhaquirks.const import (
+    DEVICE_TYPE,
+    ENDPOINTS,
+    INPUT_CLUSTERS,
+    MANUFACTURER,
+    MODEL,
+    MODELS_INFO,
+    OUTPUT_CLUSTERS,
+    PROFILE_ID,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+PACKAGE_DIR = pathlib.Path(__file__).parent
+MANIFEST_FILE = PACKAGE_DIR / "quirks_manifest.json"
+MANIFEST_VERSION = 2
+
+MANIFEST_CLASS = "class"
+MANIFEST_MODULE_FILE = "file"
+MANIFEST_MODULES = "modules"
+MANIFEST_ORDER = "order"
+MANIFEST_QUIRKS = "quirks"
+MANIFEST_SHA256 = "sha256"
+MANIFEST_VERSION_KEY = "version"
+
+
+def _file_digest(path: pathlib.Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _package_digest() -> str:
+    """Hash of the path and source of every module in the package.
+
+    Quirk modules depend on the package and subpackage modules they import, any
+    change to them may change the quirks.
+    """
+
+    digest = hashlib.sha256()
+    for path in sorted(PACKAGE_DIR.rglob("*.py")):
+        digest.update(path.relative_to(PACKAGE_DIR).as_posix().encode())
+        digest.update(b"\0")
+        digest.update(_file_digest(path).encode())
+    return digest.hexdigest()
+
+
+def _describe_quirk(quirk: zigpy.quirks.CustomDevice) -> Dict[str, Any]:
+    """Serializable description of a quirk signature."""
+
+    signature = quirk.signature
+    models_info = signature.get(MODELS_INFO) or [
+        (signature.get(MANUFACTURER), signature.get(MODEL))
+    ]
+    description = {
+        MANIFEST_CLASS: quirk.__name__,
+        MODELS_INFO: [[manufacturer, model] for manufacturer, model in models_info],
+    }
+    for key in (MANUFACTURER, MODEL):
+        if key in signature:
+            description[key] = signature[key]
+
+    endpoints = {}
+    for ep_id, ep_data in signature.get(ENDPOINTS, {}).items():
+        ep_description = {
+            key: int(ep_data[key])
+            for key in (PROFILE_ID, DEVICE_TYPE)
+            if key in ep_data
+        }
+        for key in (INPUT_CLUSTERS, OUTPUT_CLUSTERS):
+            ep_description[key] = sorted({int(c) for c in ep_data.get(key, [])})
+        endpoints[str(ep_id)] = ep_description
+    description[ENDPOINTS] = endpoints
+
+    return description
+
+
+def _registration_order(
+    registry: DeviceRegistry, quirks: Set[zigpy.quirks.CustomDevice]
+) -> Dict[zigpy.quirks.CustomDevice, int]:
+    """Order in which the quirks were added to the registry.
+
+    Each registry list holds the most recently registered quirk first, merging
+    all of them gives an order reproducing the priorities of every list.
+    """
+
+    after: Dict[Any, Set[Any]] = {quirk: set() for quirk in quirks}
+    before_count = dict.fromkeys(quirks, 0)
+    for models in registry.registry.values():
+        for model_quirks in models.values():
+            ordered = [quirk for quirk in reversed(model_quirks) if quirk in quirks]
+            for earlier, later in zip(ordered, ordered[1:]):
+                if later not in after[earlier]:
+                    after[earlier].add(later)
+                    before_count[later] += 1
+
+    def sort_key(quirk):
+        return quirk.__module__, quirk.__name__
+
+    ready = [sort_key(q) + (q,) for q, count in before_count.items() if not count]
+    heapq.heapify(ready)
+    order = {}
+    while ready:
+        quirk = heapq.heappop(ready)[-1]
+        order[quirk] = len(order)
+        for later in after[quirk]:
+            before_count[later] -= 1
+            if not before_count[later]:
+                heapq.heappush(ready, sort_key(later) + (later,))
+
+    return order
+
+
+def build_manifest() -> Dict[str, Any]:
+    """Import every quirk and describe their signatures."""
+
+    import zhaquirks
+
+    zhaquirks.setup()
+
+    registry = zigpy.quirks._DEVICE_REGISTRY  # pylint: disable=W0212
+    quirks: Dict[str, List[zigpy.quirks.CustomDevice]] = collections.defaultdict(list)
+    for models in registry.registry.values():
+        for model_quirks in models.values():
+            for quirk in model_quirks:
+                if not quirk.__module__.startswith(zhaquirks.__name__ + "."):
+                    continue
+                if quirk not in quirks[quirk.__module__]:
+                    quirks[quirk.__module__].append(quirk)
+
+    order = _registration_order(
+        registry,
+        {quirk for module_quirks in quirks.values() for quirk in module_quirks},
+    )
+
+    modules = {}
+    for modname, module_quirks in sorted(quirks.items()):
+        path = PACKAGE_DIR.joinpath(*modname.split(".")[1:]).with_suffix(".py")
+        modules[modname] = {
+            MANIFEST_MODULE_FILE: path.relative_to(PACKAGE_DIR).as_posix(),
+            MANIFEST_SHA256: _file_digest(path),
+            MANIFEST_QUIRKS: [
+                dict(_describe_quirk(quirk), **{MANIFEST_ORDER: order[quirk]})
+                for quirk in sorted(module_quirks, key=lambda q: q.__name__)
+            ],
+        }
+
+    return {
+        MANIFEST_VERSION_KEY: MANIFEST_VERSION,
+        MANIFEST_SHA256: _package_digest(),
+        MANIFEST_MODULES: modules,
+    }
+
+
+def write_manifest(path: pathlib.Path = MANIFEST_FILE) -> None:
+    """Generate the quirk manifest and write it to a file."""
+
+    manifest = build_manifest()
+    with open(path, "w") as f:
+        json.dump(manifest, f, separators=(",", ":"), sort_keys=True)
+        f.write("\n")
+
+
+def manifest_is_current(manifest: Dict[str, Any]) -> bool:
+    """Check the manifest matches the source of the installed package."""
+
+    try:
+        if manifest[MANIFEST_SHA256] != _package_digest():
+            _LOGGER.debug("Quirk package changed since manifest")
+            return False
+        for modname, module_info in manifest[MANIFEST_MODULES].items():
+            path = PACKAGE_DIR / module_info[MANIFEST_MODULE_FILE]
+            if _file_digest(path) != module_info[MANIFEST_SHA256]:
+                _LOGGER.debug("Quirk module %s changed since manifest", modname)
+                return False
+    except (KeyError, OSError) as exc:
+        _LOGGER.debug("Failed to validate quirk manifest: %s", exc)
+        return False
+
+    return True
+
+
+def load_manifest(path: pathlib.Path = MANIFEST_FILE) -> Optional[Dict[str, Any]]:
+    """Load the quirk manifest, return None if it is missing, stale or unusable."""
+
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as exc:
+        _LOGGER.debug("Quirk manifest %s is not usable: %s", path, exc)
+        return None
+
+    if manifest.get(MANIFEST_VERSION_KEY) != MANIFEST_VERSION:
+        _LOGGER.debug(
+            "Quirk manifest %s has unsupported version %s",
+            path,
+            manifest.get(MANIFEST_VERSION_KEY),
+        )
+        return None
+
+    if not manifest_is_current(manifest):
+        _LOGGER.debug("Quirk manifest %s is stale", path)
+        return None
+
+    return manifest
+
+
+class LazyQuirkLoader:
+    """Import quirk modules the first time one of their signatures is looked up."""
+
+    def __init__(self, manifest: Dict[str, Any]) -> None:
+        """Init."""
+        self._pending: Dict[
+            Tuple[Optional[str], Optional[str]], Set[str]
+        ] = collections.defaultdict(set)
+        self._module_keys: Dict[
+            str, Set[Tuple[Optional[str], Optional[str]]]
+        ] = collections.defaultdict(set)
+        self._order: Dict[Tuple[str, str], int] = {}
+        self._registry: Optional[Dict[Optional[str], Any]] = None
+        self.modules: Set[str] = set()
+        self.imported: Set[str] = set()
+
+        for modname, module_info in manifest[MANIFEST_MODULES].items():
+            self.modules.add(modname)
+            for quirk_info in module_info[MANIFEST_QUIRKS]:
+                self._order[(modname, quirk_info[MANIFEST_CLASS])] = quirk_info.get(
+                    MANIFEST_ORDER, 0
+                )
+                for manufacturer, model in quirk_info[MODELS_INFO]:
+                    self._pending[(manufacturer, model)].add(modname)
+                    self._module_keys[modname].add((manufacturer, model))
+
+    def load(self, manufacturer: Optional[str], model: Optional[str]) -> None:
+        """Import all modules with a quirk for the manufacturer and model."""
+
+        # Popped before importing: registering the quirks looks the key up again
+        modules = self._pending.pop((manufacturer, model), None)
+        if not modules:
+            return
+
+        new_modules = sorted(modules - self.imported)
+        for modname in new_modules:
+            self.imported.add(modname)
+            _LOGGER.debug("Loading quirks module %s on demand", modname)
+            importlib.import_module(modname)
+
+        self._restore_priorities(new_modules)
+        instrumentation.instrument_clusters()
+
+    def _restore_priorities(self, modules: List[str]) -> None:
+        """Order the quirks of the imported modules as importing all of them would.
+
+        Quirks registered last take precedence, the order of the lookups must
+        not decide which quirk a device gets. Quirks missing from the manifest,
+        e.g. custom quirks, were registered after setup and stay in front.
+        """
+
+        if self._registry is None:
+            return
+
+        def priority(quirk) -> Tuple[int, int]:
+            order = self._order.get((quirk.__module__, quirk.__name__))
+            return (0, 0) if order is None else (1, -order)
+
+        for manufacturer, model in set().union(
+            *(self._module_keys[modname] for modname in modules)
+        ):
+            # Plain dict lookups, the lists must not trigger loading again
+            models = dict.get(self._registry, manufacturer)
+            model_quirks = None if models is None else dict.get(models, model)
+            if model_quirks:
+                model_quirks.sort(key=priority)
+
+    def load_all(self) -> None:
+        """Import every module still pending."""
+
+        while self._pending:
+            manufacturer, model = next(iter(self._pending))
+            self.load(manufacturer, model)
+
+
+class _LazyModelQuirks(collections.defaultdict):
+    """Model to quirk list mapping loading quirk modules on lookup."""
+
+    def __init__(self, manufacturer: Optional[str], loader: LazyQuirkLoader) -> None:
+        """Init."""
+        super().__init__(list)
+        self._manufacturer = manufacturer
+        self._loader = loader
+
+    def __getitem__(self, model: Optional[str]):
+        """Load quirks for the model before returning them."""
+        self._loader.load(self._manufacturer, model)
+        return super().__getitem__(model)
+
+
+class _LazyManufacturerQuirks(collections.defaultdict):
+    """Manufacturer to model mapping creating lazy model mappings."""
+
+    def __init__(self, loader: LazyQuirkLoader) -> None:
+        """Init."""
+        super().__init__()
+        self._loader = loader
+
+    def __missing__(self, manufacturer: Optional[str]) -> _LazyModelQuirks:
+        models = self[manufacturer] = _LazyModelQuirks(manufacturer, self._loader)
+        return models
+
+
+def install_lazy_registry(
+    loader: LazyQuirkLoader, registry: Optional[DeviceRegistry] = None
+) -> None:
+    """Make the zigpy device registry import quirk modules on demand."""
+
+    if registry is None:
+        registry = zigpy.quirks._DEVICE_REGISTRY  # pylint: disable=W0212
+
+    lazy_registry = _LazyManufacturerQuirks(loader)
+    for manufacturer, models in registry.registry.items():
+        lazy_registry[manufacturer].update(models)
+
+    loader._registry = lazy_registry  # pylint: disable=W0212
+    registry._registry = lazy_registry  # pylint: disable=W0212
@@ -0,0 +1,243 @@
+"""Precompiled quirk signature matching.
+
+zigpy matches a device against quirks by walking every candidate signature
+and comparing endpoints and cluster lists one by one. The matcher compiles the
+candidates for a manufacturer and model into a decision table once: endpoint
+signatures become tuples of frozensets and quirks without wildcards are found
+with a single dict lookup. Priorities are the same as zigpy's. The tables are
+cached by manufacturer and model until quirks are added to or removed from the
+registry.
+"""
+import functools
+import itertools
+import logging
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import zigpy.device
+import zigpy.quirks
+from zigpy.quirks.registry import DeviceRegistry
+
+from zhaquirks.const import (
+    DEVICE_TYPE,
+    ENDPOINTS,
+    INPUT_CLUSTERS,
+    MANUFACTURER,
+    MODEL,
+    OUTPUT_CLUSTERS,
+    PROFILE_ID,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Signature doesn't restrict the profile id or device type
+_ANY = object()
+
+# (endpoint id, profile id, device type, input clusters, output clusters)
+EndpointSignature = Tuple[int, Any, Any, FrozenSet[int], FrozenSet[int]]
+
+
+def _compile_endpoints(endpoints: Dict[int, Dict[str, Any]]):
+    """Compile a signature's endpoints into a tuple sorted by endpoint id."""
+
+    compiled = []
+    for ep_id, ep_data in sorted(endpoints.items()):
+        profile_id = ep_data.get(PROFILE_ID, _ANY)
+        device_type = ep_data.get(DEVICE_TYPE, _ANY)
+        compiled.append(
+            (
+                ep_id,
+                profile_id if profile_id is _ANY else int(profile_id),
+                device_type if device_type is _ANY else int(device_type),
+                frozenset(ep_data.get(INPUT_CLUSTERS, [])),
+                frozenset(ep_data.get(OUTPUT_CLUSTERS, [])),
+            )
+        )
+    return tuple(compiled)
+
+
+def _device_endpoints(device: zigpy.device.Device) -> Tuple[EndpointSignature, ...]:
+    """Endpoint signatures of a device, sorted by endpoint id."""
+
+    return tuple(
+        (
+            ep_id,
+            endpoint.profile_id,
+            endpoint.device_type,
+            frozenset(endpoint.in_clusters),
+            frozenset(endpoint.out_clusters),
+        )
+        for ep_id, endpoint in sorted(device.endpoints.items())
+        if ep_id != 0
+    )
+
+
+class _RegistryGeneration:
+    """Counter bumped whenever quirks are added to or removed from a registry."""
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        """Init."""
+        self.value = 0
+
+
+def _registry_generation(registry: DeviceRegistry) -> _RegistryGeneration:
+    """Return the generation of the registry, tracking it on first use."""
+
+    generation = getattr(registry, "_zhaquirks_generation", None)
+    if generation is not None:
+        return generation
+
+    generation = registry._zhaquirks_generation = _RegistryGeneration()
+
+    def _bumping(method):
+        @functools.wraps(method)
+        def wrapper(custom_device):
+            generation.value += 1
+            return method(custom_device)
+
+        return wrapper
+
+    registry.add_to_registry = _bumping(registry.add_to_registry)
+    registry.remove = _bumping(registry.remove)
+    return generation
+
+
+class CompiledQuirks:
+    """Decision table for the quirk candidates of a manufacturer and model."""
+
+    def __init__(
+        self,
+        manufacturer: Optional[str],
+        model: Optional[str],
+        candidates: Tuple[zigpy.quirks.CustomDevice, ...],
+    ) -> None:
+        """Compile the candidates, in zigpy's order of priority."""
+        self.candidates = candidates
+        self.exact: Dict[Tuple[EndpointSignature, ...], Tuple[int, Any]] = {}
+        self.wildcard: List[
+            Tuple[int, Any, FrozenSet[int], Tuple[EndpointSignature, ...]]
+        ] = []
+
+        for priority, quirk in enumerate(candidates):
+            signature = quirk.signature
+            if model != signature.get(MODEL, model):
+                continue
+            if manufacturer != signature.get(MANUFACTURER, manufacturer):
+                continue
+            if signature.get(ENDPOINTS) is None:
+                continue
+
+            endpoints = _compile_endpoints(signature[ENDPOINTS])
+            if any(ep[1] is _ANY or ep[2] is _ANY for ep in endpoints):
+                ep_ids = frozenset(ep[0] for ep in endpoints)
+                self.wildcard.append((priority, quirk, ep_ids, endpoints))
+            else:
+                self.exact.setdefault(endpoints, (priority, quirk))
+
+    def match(
+        self, device_endpoints: Tuple[EndpointSignature, ...]
+    ) -> Optional[zigpy.quirks.CustomDevice]:
+        """Return the quirk matching the device endpoints."""
+
+        best = self.exact.get(device_endpoints)
+        if not self.wildcard:
+            return best and best[1]
+
+        ep_ids = frozenset(ep[0] for ep in device_endpoints)
+        for priority, quirk, sig_ep_ids, endpoints in self.wildcard:
+            if best is not None and priority > best[0]:
+                break
+            if sig_ep_ids != ep_ids:
+                continue
+            if all(
+                sig[1] in (_ANY, dev[1])
+                and sig[2] in (_ANY, dev[2])
+                and sig[3] == dev[3]
+                and sig[4] == dev[4]
+                for sig, dev in zip(endpoints, device_endpoints)
+            ):
+                return quirk
+
+        return best and best[1]
+
+
+class QuirkMatcher:
+    """Find quirks for devices using compiled signatures."""
+
+    def __init__(self, registry: Optional[DeviceRegistry] = None) -> None:
+        """Init."""
+        if registry is None:
+            registry = zigpy.quirks._DEVICE_REGISTRY  # pylint: disable=W0212
+        self._registry = registry
+        self._generation = _registry_generation(registry)
+        self._compiled_generation = self._generation.value
+        self._compiled: Dict[Tuple[Optional[str], Optional[str]], CompiledQuirks] = {}
+
+    def _candidates(
+        self, manufacturer: Optional[str], model: Optional[str]
+    ) -> Tuple[zigpy.quirks.CustomDevice, ...]:
+        registry = self._registry.registry
+        return tuple(
+            itertools.chain(
+                registry[manufacturer][model],
+                registry[manufacturer][None],
+                registry[None][model],
+                registry[None][None],
+            )
+        )
+
+    def compiled(
+        self, manufacturer: Optional[str], model: Optional[str]
+    ) -> CompiledQuirks:
+        """Return the decision table, recompiling them if quirks were registered."""
+
+        if self._compiled_generation != self._generation.value:
+            self._compiled.clear()
+            self._compiled_generation = self._generation.value
+
+        compiled = self._compiled.get((manufacturer, model))
+        if compiled is None:
+            # Looking the candidates up may import quirks of a lazy registry
+            compiled = CompiledQuirks(
+                manufacturer, model, self._candidates(manufacturer, model)
+            )
+            self._compiled[(manufacturer, model)] = compiled
+        return compiled
+
+    def get_quirk(
+        self, device: zigpy.device.Device
+    ) -> Optional[zigpy.quirks.CustomDevice]:
+        """Return the quirk class matching the device, if any."""
+
+        compiled = self.compiled(device.manufacturer, device.model)
+        return compiled.match(_device_endpoints(device))
+
+    def get_device(self, device: zigpy.device.Device) -> zigpy.device.Device:
+        """Get a CustomDevice object, if one is available."""
+
+        if isinstance(device, zigpy.quirks.CustomDevice):
+            return device
+
+        quirk = self.get_quirk(device)
+        if quirk is None:
+            return device
+
+        _LOGGER.debug("Found custom device replacement for %s: %s", device.ieee, quirk)
+        return quirk(
+            device._application,  # pylint: disable=W0212
+            device.ieee,
+            device.nwk,
+            device,
+        )
+
+
+def install_matcher(registry: Optional[DeviceRegistry] = None) -> QuirkMatcher:
+    """Make the zigpy device registry match devices with compiled signatures."""
+
+    if registry is None:
+        registry = zigpy.quirks._DEVICE_REGISTRY  # pylint: disable=W0212
+
+    matcher = QuirkMatcher(registry)
+    registry.get_device = matcher.get_device
+    return matcher
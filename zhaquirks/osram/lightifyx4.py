@@ -19,6 +19,7 @@ from zigpy.zcl.clusters.general import (
 from zigpy.zcl.clusters.lighting import Color
 from zigpy.zcl.clusters.lightlink import LightLink
 
+from zhaquirks.configuration import scheduled_configuration, write_attr_config
 from zhaquirks.const import (
     BUTTON_1,
     BUTTON_2,
@@ -88,10 +89,11 @@ class OsramButtonCluster(CustomCluster):
         0x002F: 0xFFFF,
     }
 
+    @scheduled_configuration
     async def bind(self):
         """Bind cluster."""
         result = await super().bind()
-        await self.write_attributes(self.attr_config, manufacturer=OSRAM_MFG_CODE)
+        await write_attr_config(self, self.attr_config, manufacturer=OSRAM_MFG_CODE)
         return result
 
 
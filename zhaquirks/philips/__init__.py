@@ -1,7 +1,5 @@
 """Module for Philips quirks implementations."""
-import asyncio
 import logging
-import time
 from typing import Any, List, Optional, Union
 
 from zigpy.quirks import CustomCluster
@@ -10,6 +8,7 @@ from zigpy.zcl import foundation
 from zigpy.zcl.clusters.general import Basic
 from zigpy.zcl.clusters.measurement import OccupancySensing
 
+from zhaquirks.configuration import scheduled_configuration, write_attr_config
 from zhaquirks.const import (
     ARGS,
     BUTTON,
@@ -30,6 +29,7 @@ from zhaquirks.const import (
     TURN_ON,
     ZHA_SEND_EVENT,
 )
+from zhaquirks.gestures import ButtonGestures
 
 DIAGNOSTICS_CLUSTER_ID = 0x0B05  # decimal = 2821
 PHILIPS = "Philips"
@@ -88,50 +88,14 @@ class PhilipsBasicCluster(CustomCluster, Basic):
 
     attr_config = {0x0031: 0x000B}
 
+    @scheduled_configuration
     async def bind(self):
         """Bind cluster."""
         result = await super().bind()
-        await self.write_attributes(self.attr_config, manufacturer=0x100B)
+        await write_attr_config(self, self.attr_config, manufacturer=0x100B)
         return result
 
 
-class ButtonPressQueue:
-    """Philips button queue to derive multiple press events."""
-
-    def __init__(self):
-        """Init."""
-        self._ms_threshold = 300
-        self._ms_last_click = 0
-        self._click_counter = 1
-        self._button = None
-        self._callback = lambda x: None
-        self._task = None
-
-    async def _job(self):
-        await asyncio.sleep(self._ms_threshold / 1000)
-        self._callback(self._click_counter)
-
-    def _reset(self, button):
-        if self._task:
-            self._task.cancel()
-        self._click_counter = 1
-        self._button = button
-
-    def press(self, callback, button):
-        """Process a button press."""
-        self._callback = callback
-        now_ms = time.time() * 1000
-        if self._button != button:
-            self._reset(button)
-        elif now_ms - self._ms_last_click > self._ms_threshold:
-            self._click_counter = 1
-        else:
-            self._task.cancel()
-            self._click_counter += 1
-        self._ms_last_click = now_ms
-        self._task = asyncio.ensure_future(self._job())
-
-
 class PhilipsRemoteCluster(CustomCluster):
     """Philips remote cluster."""
 
@@ -148,7 +112,15 @@ class PhilipsRemoteCluster(CustomCluster):
     BUTTONS = {1: "on", 2: "up", 3: "down", 4: "off"}
     PRESS_TYPES = {0: "press", 1: "hold", 2: "short_release", 3: "long_release"}
 
-    button_press_queue = ButtonPressQueue()
+    # seconds between presses counted as a multiple press
+    multi_click_s: float = 0.3
+
+    def __init__(self, *args, **kwargs):
+        """Init."""
+        super().__init__(*args, **kwargs)
+        self.button_gestures = ButtonGestures(
+            self._send_press_event, multi_click_s=self.multi_click_s
+        )
 
     def handle_cluster_request(
         self,
@@ -177,31 +149,31 @@ class PhilipsRemoteCluster(CustomCluster):
             ARGS: args,
         }
 
-        def send_press_event(click_count):
-            _LOGGER.debug(
-                "PhilipsRemoteCluster - send_press_event click_count: [%s]", click_count
-            )
-            press_type = None
-            if click_count == 1:
-                press_type = "press"
-            elif click_count == 2:
-                press_type = "double_press"
-            elif click_count == 3:
-                press_type = "triple_press"
-            elif click_count == 4:
-                press_type = "quadruple_press"
-            elif click_count > 4:
-                press_type = "quintuple_press"
-
-            if press_type:
-                # Override PRESS_TYPE
-                event_args[PRESS_TYPE] = press_type
-                action = f"{button}_{press_type}"
-                self.listener_event(ZHA_SEND_EVENT, action, event_args)
-
         # Derive Multiple Presses
         if press_type == "press":
-            self.button_press_queue.press(send_press_event, button)
+            self.button_gestures.press(button, event_args)
         else:
             action = f"{button}_{press_type}"
             self.listener_event(ZHA_SEND_EVENT, action, event_args)
+
+    def _send_press_event(self, button, click_count, event_args):
+        _LOGGER.debug(
+            "PhilipsRemoteCluster - send_press_event click_count: [%s]", click_count
+        )
+        press_type = None
+        if click_count == 1:
+            press_type = "press"
+        elif click_count == 2:
+            press_type = "double_press"
+        elif click_count == 3:
+            press_type = "triple_press"
+        elif click_count == 4:
+            press_type = "quadruple_press"
+        elif click_count > 4:
+            press_type = "quintuple_press"
+
+        if press_type:
+            # Override PRESS_TYPE
+            event_args[PRESS_TYPE] = press_type
+            action = f"{button}_{press_type}"
+            self.listener_event(ZHA_SEND_EVENT, action, event_args)
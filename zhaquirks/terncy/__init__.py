@@ -92,10 +92,7 @@ class MotionCluster(LocalDataCluster, _Motion):
         """Motion event."""
         super().listener_event(CLUSTER_COMMAND, 254, ZONE_STATE, [ON, 0, 0, 0])
 
-        if self._timer_handle:
-            self._timer_handle.cancel()
-
-        self._timer_handle = self._loop.call_later(self.reset_s, self._turn_off)
+        self._schedule_reset()
 
         if self.send_occupancy_event:
             self.endpoint.device.occupancy_bus.listener_event(OCCUPANCY_EVENT)
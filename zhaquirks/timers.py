@@ -0,0 +1,201 @@
+"""Shared timer wheel for clusters resetting their state after a delay.
+
+Motion and occupancy clusters turn themselves off some time after the last
+report and re-arm that timer on every report. Instead of a `loop.call_later`
+handle per cluster, the clusters register their reset with the hierarchical
+timer wheel of the event loop: re-arming moves the timer to another slot and
+the wheel only wakes up once per tick, however many timers are pending.
+"""
+import asyncio
+import logging
+import math
+from typing import Callable, Dict, Hashable, List, Optional
+import weakref
+
+_LOGGER = logging.getLogger(__name__)
+
+TIMER_WHEEL_RESOLUTION = 1.0
+TIMER_WHEEL_SLOTS = 64
+TIMER_WHEEL_LEVELS = 3
+
+
+class _Timer:
+    """Timer registered with the wheel."""
+
+    __slots__ = ("callback", "expiry", "slot")
+
+    def __init__(self, callback: Callable[[], None], expiry: int) -> None:
+        """Init."""
+        self.callback = callback
+        self.expiry = expiry
+        self.slot: Optional[Dict[Hashable, "_Timer"]] = None
+
+
+class TimerWheel:
+    """Hierarchical timer wheel with one timer per owner.
+
+    Level 0 has one slot per tick, each slot of the next level covers a full
+    turn of the previous one. Timers shorter than a tick can't be placed in
+    the wheel and are scheduled on the loop directly.
+
+    The wheel is held per loop, so it only keeps a weak reference to it and
+    no handles of the loop.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        resolution: float = TIMER_WHEEL_RESOLUTION,
+        slots: int = TIMER_WHEEL_SLOTS,
+        levels: int = TIMER_WHEEL_LEVELS,
+    ) -> None:
+        """Init."""
+        self._loop_ref = weakref.ref(loop)
+        self._resolution = resolution
+        self._slots = slots
+        self._wheels: List[List[Dict[Hashable, _Timer]]] = [
+            [{} for _ in range(slots)] for _ in range(levels)
+        ]
+        self._timers: Dict[Hashable, _Timer] = {}
+        # Timers shorter than a tick, cancelled ones expire without effect
+        self._loop_timers: Dict[Hashable, _Timer] = {}
+        self._advancing = False
+        self._start = 0.0
+        self._tick = 0
+
+    @property
+    def _loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop_ref()
+
+    @property
+    def pending(self) -> int:
+        """Return the number of pending timers."""
+        return len(self._timers) + len(self._loop_timers)
+
+    def __contains__(self, owner: Hashable) -> bool:
+        """Return True if the owner has a pending timer."""
+        return owner in self._timers or owner in self._loop_timers
+
+    def schedule(
+        self, owner: Hashable, delay: float, callback: Callable[[], None]
+    ) -> None:
+        """Call the callback after the delay, replacing the owner's pending timer."""
+
+        self.cancel(owner)
+
+        if delay < self._resolution:
+            timer = self._loop_timers[owner] = _Timer(callback, 0)
+            self._loop.call_later(delay, self._expire, owner, timer)
+            return
+
+        if not self._advancing:
+            # The wheel is idle, outside of _advance and all slots are empty,
+            # restart it from now
+            self._start = self._loop.time()
+            self._tick = 0
+            self._advancing = True
+            self._loop.call_at(self._start + self._resolution, self._advance)
+
+        elapsed = (self._loop.time() - self._start) / self._resolution
+        timer = self._timers[owner] = _Timer(
+            callback, max(self._tick + 1, math.ceil(elapsed + delay / self._resolution))
+        )
+        self._place(owner, timer)
+
+    def cancel(self, owner: Hashable) -> bool:
+        """Cancel the owner's pending timer, return False if there is none."""
+
+        timer = self._timers.pop(owner, None)
+        if timer is not None:
+            del timer.slot[owner]
+            return True
+
+        return self._loop_timers.pop(owner, None) is not None
+
+    def _place(self, owner: Hashable, timer: _Timer) -> None:
+        """Put the timer in the slot of the level covering its expiry."""
+
+        remaining = timer.expiry - self._tick
+        span = 1
+        for level, wheel in enumerate(self._wheels):
+            if remaining < span * self._slots or level == len(self._wheels) - 1:
+                # Timers beyond the last level are placed again on its next turn
+                expiry = min(timer.expiry, self._tick + span * self._slots - 1)
+                timer.slot = wheel[(expiry // span) % self._slots]
+                timer.slot[owner] = timer
+                return
+            span *= self._slots
+
+    def _expire(self, owner: Hashable, timer: _Timer) -> None:
+        """Run the callback of a timer scheduled on the loop."""
+
+        if self._loop_timers.get(owner) is not timer:
+            # cancelled or replaced
+            return
+        del self._loop_timers[owner]
+        self._run(timer.callback)
+
+    def _run(self, callback: Callable[[], None]) -> None:
+        try:
+            callback()
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Error running timer callback %s", callback)
+
+    def _advance(self) -> None:
+        """Process all ticks up to now."""
+
+        # Callbacks scheduling timers see the wheel as running, so the origin
+        # stays put and this call remains the only one armed
+        # The loop runs callbacks up to its clock resolution early
+        now = int((self._loop.time() - self._start) / self._resolution + 1e-3)
+
+        while self._tick < now and self._timers:
+            self._tick += 1
+
+            # Move timers down from the slots of higher levels starting a turn
+            span = 1
+            for wheel in self._wheels[1:]:
+                span *= self._slots
+                if self._tick % span:
+                    break
+                slot = wheel[(self._tick // span) % self._slots]
+                timers = list(slot.items())
+                slot.clear()
+                for owner, timer in timers:
+                    self._place(owner, timer)
+
+            slot = self._wheels[0][self._tick % self._slots]
+            due = [
+                (owner, timer)
+                for owner, timer in slot.items()
+                if timer.expiry <= self._tick
+            ]
+            for owner, timer in due:
+                del slot[owner]
+                del self._timers[owner]
+            for owner, timer in due:
+                self._run(timer.callback)
+
+        if self._timers:
+            self._loop.call_at(
+                self._start + (self._tick + 1) * self._resolution, self._advance
+            )
+        else:
+            self._advancing = False
+
+
+_TIMER_WHEELS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, TimerWheel]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_timer_wheel(loop: Optional[asyncio.AbstractEventLoop] = None) -> TimerWheel:
+    """Return the timer wheel shared by everything running on the event loop."""
+
+    if loop is None:
+        loop = asyncio.get_running_loop()
+
+    wheel = _TIMER_WHEELS.get(loop)
+    if wheel is None:
+        wheel = _TIMER_WHEELS[loop] = TimerWheel(loop)
+    return wheel
@@ -0,0 +1,148 @@
+"""Compiled lookup of device automation triggers.
+
+`device_automation_triggers` map a (type, subtype) trigger to the fields a ZHA
+event must have to fire it. Matching an event against them means scanning the
+whole table, for every button event of every remote. The triggers of a quirk
+are instead compiled once into a reverse index: triggers are grouped by the
+fields they match on and each group is a dict from those field values to the
+trigger, so an event is resolved with one lookup per group.
+"""
+from __future__ import annotations
+
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
+
+from zigpy.quirks import CustomDevice
+
+from zhaquirks.const import ARGS
+
+Trigger = Tuple[str, str]
+_Path = Tuple[str, ...]
+_Shape = Tuple[_Path, ...]
+
+_MISSING = object()
+
+
+def _freeze(value: Any) -> Hashable:
+    """Return a hashable equivalent of an event value."""
+
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, Mapping):
+        return frozenset((key, _freeze(item)) for key, item in value.items())
+    return value
+
+
+def _criteria_paths(criteria: Mapping[str, Any]) -> Dict[_Path, Any]:
+    """Flatten trigger criteria, args given as a dict are matched per key."""
+
+    paths = {}
+    for field, value in criteria.items():
+        if field == ARGS and isinstance(value, Mapping):
+            for key, arg in value.items():
+                paths[(field, key)] = arg
+        else:
+            paths[(field,)] = value
+    return paths
+
+
+def _event_value(event: Mapping[str, Any], path: _Path) -> Any:
+    value = event
+    for key in path:
+        if not isinstance(value, Mapping):
+            return _MISSING
+        value = value.get(key, _MISSING)
+        if value is _MISSING:
+            return _MISSING
+    return value
+
+
+class TriggerIndex:
+    """Reverse index from ZHA event fields to device automation triggers."""
+
+    def __init__(self, triggers: Mapping[Trigger, Mapping[str, Any]]) -> None:
+        """Init."""
+        self.triggers = triggers
+        groups: Dict[_Shape, Dict[Tuple[Hashable, ...], List[Trigger]]] = {}
+        for trigger, criteria in triggers.items():
+            paths = _criteria_paths(criteria)
+            shape = tuple(sorted(paths))
+            key = tuple(_freeze(paths[path]) for path in shape)
+            groups.setdefault(shape, {}).setdefault(key, []).append(trigger)
+
+        # Triggers matching on more fields are more specific and come first
+        self._groups = sorted(groups.items(), key=lambda group: -len(group[0]))
+
+    def _lookup(self, event: Mapping[str, Any]) -> Iterator[List[Trigger]]:
+        for shape, lookup in self._groups:
+            key = []
+            for path in shape:
+                value = _event_value(event, path)
+                if value is _MISSING:
+                    break
+                key.append(_freeze(value))
+            else:
+                matches = lookup.get(tuple(key))
+                if matches is not None:
+                    yield matches
+
+    def resolve(self, event: Mapping[str, Any]) -> Optional[Trigger]:
+        """Return the most specific trigger fired by the event data.
+
+        The event data has the `command`, `endpoint_id`, `cluster_id` and
+        `args` fields of the ZHA event, a trigger is fired when all of its
+        criteria match. Returns None if no trigger is fired.
+        """
+
+        for matches in self._lookup(event):
+            return matches[0]
+        return None
+
+    def resolve_all(self, event: Mapping[str, Any]) -> List[Trigger]:
+        """Return all triggers fired by the event data, most specific first."""
+
+        return [trigger for matches in self._lookup(event) for trigger in matches]
+
+
+def get_trigger_index(
+    quirk: Union[CustomDevice, Type[CustomDevice]]
+) -> Optional[TriggerIndex]:
+    """Return the trigger index of a quirk, None if it has no triggers.
+
+    The index is built on first use and cached on the quirk class.
+    """
+
+    if not isinstance(quirk, type):
+        quirk = type(quirk)
+
+    triggers = getattr(quirk, "device_automation_triggers", None)
+    if not triggers:
+        return None
+
+    # Look in the class itself, subclasses may have triggers of their own
+    index = quirk.__dict__.get("_trigger_index")
+    if index is None or index.triggers is not triggers:
+        index = TriggerIndex(triggers)
+        setattr(quirk, "_trigger_index", index)
+    return index
+
+
+def resolve_trigger(
+    quirk: Union[CustomDevice, Type[CustomDevice]], event: Mapping[str, Any]
+) -> Optional[Trigger]:
+    """Return the device automation trigger of the quirk fired by the event."""
+
+    index = get_trigger_index(quirk)
+    if index is None:
+        return None
+    return index.resolve(event)
@@ -1,8 +1,11 @@
 """Tuya devices."""
+import asyncio
+import collections
 import dataclasses
 import datetime
 import logging
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import weakref
 
 from zigpy.quirks import CustomCluster, CustomDevice
 import zigpy.types as t
@@ -13,7 +16,14 @@ from zigpy.zcl.clusters.homeautomation import ElectricalMeasurement
 from zigpy.zcl.clusters.hvac import Thermostat, UserInterface
 from zigpy.zcl.clusters.smartenergy import Metering
 
-from zhaquirks import Bus, EventableCluster, LocalDataCluster
+from zhaquirks import (
+    SUPPRESS_UNCHANGED,
+    AggregatingCluster,
+    Bus,
+    EventableCluster,
+    LocalDataCluster,
+    ReportAggregation,
+)
 from zhaquirks.const import DOUBLE_PRESS, LONG_PRESS, SHORT_PRESS, ZHA_SEND_EVENT
 
 # ---------------------------------------------------------
@@ -37,6 +47,11 @@ TUYA_MCU_VERSION_RSP = 0x11
 #
 TUYA_LEVEL_COMMAND = 514
 
+# Time requests answered per second, across all devices
+TUYA_TIME_SYNC_RATE = 5
+# Seconds during which repeated time requests of a device aren't answered
+TUYA_TIME_SYNC_MIN_INTERVAL = 30
+
 COVER_EVENT = "cover_event"
 LEVEL_EVENT = "level_event"
 TUYA_MCU_COMMAND = "tuya_mcu_command"
@@ -187,6 +202,28 @@ class TuyaDPType(t.enum8):
     BITMAP = 0x05
 
 
+_BITMAP_TYPES = {1: t.bitmap8, 2: t.bitmap16, 4: t.bitmap32}
+
+
+def _decode_bitmap(raw: bytes) -> Union[t.bitmap8, t.bitmap16, t.bitmap32]:
+    try:
+        bitmap_type = _BITMAP_TYPES[len(raw)]
+    except KeyError as exc:
+        raise ValueError(f"Wrong bitmap length: {len(raw)}") from exc
+    return bitmap_type(int.from_bytes(raw, "little"))
+
+
+# dp_type -> decoder of the deserialized raw value. Values are reversed by
+# TuyaData.deserialize(), so integers are read back as little endian.
+TUYA_DP_DECODERS: Dict[TuyaDPType, Callable[[bytes], Any]] = {
+    TuyaDPType.VALUE: lambda raw: t.uint32_t(int.from_bytes(raw, "little")),
+    TuyaDPType.BOOL: lambda raw: t.Bool(raw[0]),
+    TuyaDPType.STRING: lambda raw: raw.decode("utf8"),
+    TuyaDPType.ENUM: lambda raw: t.enum8(raw[0]),
+    TuyaDPType.BITMAP: _decode_bitmap,
+}
+
+
 class TuyaData(t.Struct):
     """Tuya Data type."""
 
@@ -208,22 +245,15 @@ class TuyaData(t.Struct):
     @property
     def payload(self) -> Union[t.Bool, t.CharacterString, t.uint32_t, t.data32]:
         """Payload accordingly to data point type."""
-        if self.dp_type == TuyaDPType.VALUE:
-            return t.uint32_t.deserialize(self.raw)[0]
-        elif self.dp_type == TuyaDPType.BOOL:
-            return t.Bool.deserialize(self.raw)[0]
-        elif self.dp_type == TuyaDPType.STRING:
-            return self.raw.decode("utf8")
-        elif self.dp_type == TuyaDPType.ENUM:
-            return t.enum8.deserialize(self.raw)[0]
-        elif self.dp_type == TuyaDPType.BITMAP:
-            bitmaps = {1: t.bitmap8, 2: t.bitmap16, 4: t.bitmap32}
-            try:
-                return bitmaps[len(self.raw)].deserialize(self.raw)[0]
-            except KeyError as exc:
-                raise ValueError(f"Wrong bitmap length: {len(self.raw)}") from exc
+        try:
+            decoder = TUYA_DP_DECODERS[self.dp_type]
+        except KeyError as exc:
+            raise ValueError(f"Unknown {self.dp_type} datapoint type") from exc
 
-        raise ValueError(f"Unknown {self.dp_type} datapoint type")
+        try:
+            return decoder(self.raw)
+        except IndexError as exc:
+            raise ValueError(f"Empty {self.dp_type} datapoint") from exc
 
 
 class Data(t.List, item_type=t.uint8_t):
@@ -256,6 +286,31 @@ class TuyaCommand(t.Struct):
     data: TuyaData
 
 
+class TuyaDatapointData(t.Struct):
+    """Tuya Datapoint and Data."""
+
+    dp: t.uint8_t
+    data: TuyaData
+
+
+class TuyaDatapoints(t.List, item_type=TuyaDatapointData):
+    """Datapoints following the first one in a Tuya command."""
+
+    @classmethod
+    def deserialize(cls, data: bytes) -> Tuple["TuyaDatapoints", bytes]:
+        """Deserialize all complete datapoints, ignore any trailing bytes."""
+        datapoints = cls()
+        while data:
+            try:
+                datapoint, data = TuyaDatapointData.deserialize(data)
+            except ValueError:
+                _LOGGER.debug("Ignoring incomplete Tuya datapoint: %r", data)
+                break
+            datapoints.append(datapoint)
+
+        return datapoints, data
+
+
 class TuyaManufCluster(CustomCluster):
     """Tuya manufacturer specific cluster."""
 
@@ -274,6 +329,16 @@ class TuyaManufCluster(CustomCluster):
         function: t.uint8_t
         data: Data
 
+    class Datapoint(t.Struct):
+        """Datapoint following the first one in a Tuya command."""
+
+        command_id: t.uint16_t
+        function: t.uint8_t
+        data: Data
+
+    class Datapoints(t.List, item_type=Datapoint):
+        """Datapoints following the first one in a Tuya command."""
+
     class MCUVersionRsp(t.Struct):
         """Tuya MCU version response Zcl payload."""
 
@@ -296,7 +361,7 @@ class TuyaManufCluster(CustomCluster):
             NOTE: You need to wait for time request before setting it. You can't set time without request."""
 
     manufacturer_server_commands = {
-        0x0000: ("set_data", (Command,), False),
+        0x0000: ("set_data", (Command, t.Optional(Datapoints)), False),
         0x0010: ("mcu_version_req", (t.uint16_t,), False),
         0x0024: ("set_time", (TuyaTimePayload,), False),
     }
@@ -349,32 +414,244 @@ class TuyaManufCluster(CustomCluster):
             self.cluster_id,
             hdr.command_id,
         )
-        payload = TuyaTimePayload()
-        utc_timestamp = int(
-            (
-                datetime.datetime.utcnow()
-                - datetime.datetime(self.set_time_offset, 1, 1)
-            ).total_seconds()
-        )
-        local_timestamp = int(
-            (
-                datetime.datetime.now()
-                - datetime.datetime(
-                    self.set_time_local_offset or self.set_time_offset, 1, 1
-                )
-            ).total_seconds()
-        )
-        payload.extend(utc_timestamp.to_bytes(4, "big", signed=False))
-        payload.extend(local_timestamp.to_bytes(4, "big", signed=False))
+        get_tuya_time_sync().request(self)
+
+    def send_time(self, payload: TuyaTimePayload) -> None:
+        """Send the time to the device."""
 
         self.create_catching_task(
             super().command(TUYA_SET_TIME, payload, expect_reply=False)
         )
 
 
+class TuyaTimeSync:
+    """Answer the time requests of the Tuya devices, at a bounded rate.
+
+    All devices ask for the time right after the coordinator restarted. The
+    timestamps are computed once per second for all of them, a device asking
+    again while its answer is queued or shortly after it got one isn't
+    answered again, and answers are spread out instead of sent at once.
+
+    The time sync is held per loop, so it only keeps a weak reference to it
+    and no handles of the loop.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        rate: float = TUYA_TIME_SYNC_RATE,
+        min_interval: float = TUYA_TIME_SYNC_MIN_INTERVAL,
+    ) -> None:
+        """Init."""
+        self._loop_ref = weakref.ref(loop)
+        self._reply_interval = 1 / rate
+        self._min_interval = min_interval
+        self._pending: "collections.OrderedDict[t.EUI64, TuyaManufCluster]" = (
+            collections.OrderedDict()
+        )
+        # device -> loop time of the last answer
+        self._synced: Dict[t.EUI64, float] = {}
+        self._next_reply = 0.0
+        self._waking = False
+        # utc and local time of the current second, payloads by epoch years
+        self._now: Tuple[datetime.datetime, ...] = ()
+        self._payloads: Dict[Tuple[int, int], TuyaTimePayload] = {}
+        self._expires = 0.0
+
+    @property
+    def _loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop_ref()
+
+    def payload(
+        self, offset: int, local_offset: Optional[int] = None
+    ) -> TuyaTimePayload:
+        """Return the time payload for the epoch years of the timestamps.
+
+        Payloads are computed once per second and shared by the devices using
+        the same epoch years, usually 1970 or 2000.
+        """
+
+        now = self._loop.time()
+        if now >= self._expires:
+            self._expires = now + 1
+            self._now = (datetime.datetime.utcnow(), datetime.datetime.now())
+            self._payloads.clear()
+            self._synced = {
+                ieee: synced
+                for ieee, synced in self._synced.items()
+                if now - synced < self._min_interval
+            }
+
+        key = (offset, local_offset or offset)
+        payload = self._payloads.get(key)
+        if payload is None:
+            payload = self._payloads[key] = TuyaTimePayload()
+            for time, year in zip(self._now, key):
+                timestamp = int((time - datetime.datetime(year, 1, 1)).total_seconds())
+                payload.extend(timestamp.to_bytes(4, "big", signed=False))
+        return payload
+
+    def request(self, cluster: "TuyaManufCluster") -> None:
+        """Queue the answer to the time request of the device."""
+
+        ieee = cluster.endpoint.device.ieee
+        synced = self._synced.get(ieee)
+        if ieee in self._pending or (
+            synced is not None and self._loop.time() - synced < self._min_interval
+        ):
+            cluster.debug("Time was sent recently, ignoring the time request")
+            return
+
+        self._pending[ieee] = cluster
+        self._send_due()
+
+    def _send_due(self) -> None:
+        """Send the queued answers there is room for, schedule the others."""
+
+        now = self._loop.time()
+        while self._pending and self._next_reply <= now:
+            ieee, cluster = self._pending.popitem(last=False)
+            self._synced[ieee] = now
+            self._next_reply = now + self._reply_interval
+            cluster.send_time(
+                self.payload(cluster.set_time_offset, cluster.set_time_local_offset)
+            )
+
+        if self._pending and not self._waking:
+            self._waking = True
+            self._loop.call_at(self._next_reply, self._wake)
+
+    def _wake(self) -> None:
+        self._waking = False
+        self._send_due()
+
+
+_TUYA_TIME_SYNCS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, TuyaTimeSync]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_tuya_time_sync(
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+) -> TuyaTimeSync:
+    """Return the time sync shared by the Tuya devices of the event loop."""
+
+    if loop is None:
+        loop = asyncio.get_running_loop()
+
+    time_sync = _TUYA_TIME_SYNCS.get(loop)
+    if time_sync is None:
+        time_sync = _TUYA_TIME_SYNCS[loop] = TuyaTimeSync(loop)
+    return time_sync
+
+
+class TuyaSetDataQueue:
+    """Outbound queue coalescing the set_data commands sent to a Tuya device.
+
+    Values written within the coalescing window of the first queued write are
+    sent together and a newer value for a datapoint replaces the queued one.
+    Frames are spaced by the frame interval of the sending cluster, sleepy
+    devices drop commands arriving back to back.
+    """
+
+    def __init__(self) -> None:
+        """Init."""
+        # (cluster, datapoint) -> (value, manufacturer), in order of writing
+        self._pending: Dict[Tuple["TuyaManufClusterAttributes", int], Tuple] = {}
+        self._waiters: List[asyncio.Future] = []
+        self._flush_task: Optional[asyncio.Future] = None
+        self._last_frame: Optional[float] = None
+
+    async def write(
+        self,
+        cluster: "TuyaManufClusterAttributes",
+        values: Dict[int, Any],
+        manufacturer: Optional[Union[int, t.uint16_t]] = None,
+    ) -> None:
+        """Queue datapoint values and wait until they are sent."""
+
+        for attrid, value in values.items():
+            # moved to the end, values are sent in the order they were written
+            self._pending.pop((cluster, attrid), None)
+            self._pending[(cluster, attrid)] = (value, manufacturer)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        if self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self._flush(cluster))
+        await waiter
+
+    async def _flush(self, cluster: "TuyaManufClusterAttributes") -> None:
+        """Send the queued values once the coalescing window is over."""
+
+        waiters: List[asyncio.Future] = []
+        try:
+            await asyncio.sleep(cluster.set_data_coalesce_window)
+            while self._pending:
+                pending, self._pending = self._pending, {}
+                waiters, self._waiters = self._waiters, []
+                try:
+                    for frame_cluster, manufacturer, values in self._frames(pending):
+                        await self._pace(frame_cluster.set_data_frame_interval)
+                        await frame_cluster.send_datapoints(
+                            values, manufacturer=manufacturer
+                        )
+                except Exception as exc:  # pylint: disable=broad-except
+                    for waiter in waiters:
+                        if not waiter.done():
+                            waiter.set_exception(exc)
+                else:
+                    for waiter in waiters:
+                        if not waiter.done():
+                            waiter.set_result(None)
+        finally:
+            self._flush_task = None
+            for waiter in waiters + self._waiters:
+                if not waiter.done():
+                    waiter.cancel()
+
+    @staticmethod
+    def _frames(pending: Dict[Tuple["TuyaManufClusterAttributes", int], Tuple]):
+        """Split queued values into the set_data frames sending them."""
+
+        frames: Dict[Tuple, List[Tuple[int, Any]]] = {}
+        for (cluster, attrid), (value, manufacturer) in pending.items():
+            frames.setdefault((cluster, manufacturer), []).append((attrid, value))
+
+        for (cluster, manufacturer), values in frames.items():
+            if cluster.set_data_multiple_dp:
+                yield cluster, manufacturer, values
+            else:
+                for value in values:
+                    yield cluster, manufacturer, [value]
+
+    async def _pace(self, interval: float) -> None:
+        """Wait for the frame interval to pass since the last frame."""
+
+        loop = asyncio.get_running_loop()
+        if self._last_frame is not None:
+            delay = self._last_frame + interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        self._last_frame = loop.time()
+
+
 class TuyaManufClusterAttributes(TuyaManufCluster):
     """Manufacturer specific cluster for Tuya converting attributes <-> commands."""
 
+    # seconds to wait for more writes before sending queued values
+    set_data_coalesce_window: float = 0.1
+    # minimum seconds between two set_data frames sent to the device
+    set_data_frame_interval: float = 0.1
+    # MCU accepts several datapoints in a single set_data command
+    set_data_multiple_dp: bool = False
+
+    def __init__(self, *args, **kwargs):
+        """Init."""
+        super().__init__(*args, **kwargs)
+        if getattr(self.endpoint.device, "tuya_set_data_queue", None) is None:
+            self.endpoint.device.tuya_set_data_queue = TuyaSetDataQueue()
+
     def handle_cluster_request(
         self,
         hdr: foundation.ZCLHeader,
@@ -429,24 +706,49 @@ class TuyaManufClusterAttributes(TuyaManufCluster):
 
         records = self._write_attr_records(attributes)
 
-        for record in records:
-            cmd_payload = TuyaManufCluster.Command()
-            cmd_payload.status = 0
-            cmd_payload.tsn = self.endpoint.device.application.get_sequence()
-            cmd_payload.command_id = record.attrid
-            cmd_payload.function = 0
-            cmd_payload.data = Data.from_value(record.value.value)
-
-            await super().command(
-                TUYA_SET_DATA,
-                cmd_payload,
+        if records:
+            await self.endpoint.device.tuya_set_data_queue.write(
+                self,
+                {record.attrid: record.value.value for record in records},
                 manufacturer=manufacturer,
-                expect_reply=False,
-                tsn=cmd_payload.tsn,
             )
 
         return [[foundation.WriteAttributesStatusRecord(foundation.Status.SUCCESS)]]
 
+    async def send_datapoints(
+        self,
+        values: List[Tuple[int, Any]],
+        manufacturer: Optional[Union[int, t.uint16_t]] = None,
+    ) -> None:
+        """Send datapoint values in a single set_data command."""
+
+        (attrid, value), *others = values
+        cmd_payload = TuyaManufCluster.Command()
+        cmd_payload.status = 0
+        cmd_payload.tsn = self.endpoint.device.application.get_sequence()
+        cmd_payload.command_id = attrid
+        cmd_payload.function = 0
+        cmd_payload.data = Data.from_value(value)
+
+        args = [cmd_payload]
+        if others:
+            args.append(
+                TuyaManufCluster.Datapoints(
+                    TuyaManufCluster.Datapoint(
+                        command_id=attrid, function=0, data=Data.from_value(value)
+                    )
+                    for attrid, value in others
+                )
+            )
+
+        await super().command(
+            TUYA_SET_DATA,
+            *args,
+            manufacturer=manufacturer,
+            expect_reply=False,
+            tsn=cmd_payload.tsn,
+        )
+
 
 class TuyaOnOff(CustomCluster, OnOff):
     """Tuya On/Off cluster for On/Off device."""
@@ -551,6 +853,7 @@ class TuyaThermostatCluster(LocalDataCluster, Thermostat):
     """Thermostat cluster for Tuya thermostats."""
 
     _CONSTANT_ATTRIBUTES = {0x001B: Thermostat.ControlSequenceOfOperation.Heating_Only}
+    _UPDATE_FILTERS = {0x0000: SUPPRESS_UNCHANGED}  # local_temperature
 
     def __init__(self, *args, **kwargs):
         """Init."""
@@ -857,20 +1160,35 @@ class TuyaZBOnOffAttributeCluster(CustomCluster, OnOff):
 
 
 # Tuya Zigbee Metering Cluster Correction Implementation
-class TuyaZBMeteringCluster(CustomCluster, Metering):
+# Energy meters report several times per second under load changes, switching
+# a load on or off is still reported at once
+TUYA_ELECTRICAL_AGGREGATIONS = {
+    0x0505: ReportAggregation(),  # rms_voltage
+    0x0508: ReportAggregation(),  # rms_current
+    0x050B: ReportAggregation(thresholds=(1,)),  # active_power
+}
+TUYA_METERING_AGGREGATIONS = {
+    0x0000: ReportAggregation(statistic="last"),  # current_summ_delivered
+    0x0400: ReportAggregation(thresholds=(1,)),  # instantaneous_demand
+}
+
+
+class TuyaZBMeteringCluster(AggregatingCluster, Metering):
     """Divides the kWh for tuya."""
 
     MULTIPLIER = 0x0301
     DIVISOR = 0x0302
     _CONSTANT_ATTRIBUTES = {MULTIPLIER: 1, DIVISOR: 100}
+    _REPORT_AGGREGATIONS = TUYA_METERING_AGGREGATIONS
 
 
-class TuyaZBElectricalMeasurement(CustomCluster, ElectricalMeasurement):
+class TuyaZBElectricalMeasurement(AggregatingCluster, ElectricalMeasurement):
     """Divides the Current for tuya."""
 
     AC_CURRENT_MULTIPLIER = 0x0602
     AC_CURRENT_DIVISOR = 0x0603
     _CONSTANT_ATTRIBUTES = {AC_CURRENT_MULTIPLIER: 1, AC_CURRENT_DIVISOR: 1000}
+    _REPORT_AGGREGATIONS = TUYA_ELECTRICAL_AGGREGATIONS
 
 
 # Tuya Zigbee Cluster 0xE000 Implementation
@@ -1213,6 +1531,31 @@ class TuyaLocalCluster(LocalDataCluster):
             return
         return self._update_attribute(attrid, value)
 
+    def update_attributes(self, attributes: Dict[str, Any]) -> None:
+        """Update several attributes by attribute name.
+
+        All values are filtered and cached before the listeners are notified,
+        so listeners see the cluster with every attribute of the batch updated.
+        """
+
+        if type(self)._update_attribute is not LocalDataCluster._update_attribute:
+            # Overridden updates have to see each attribute
+            for attr_name, value in attributes.items():
+                self.update_attribute(attr_name, value)
+            return
+
+        updates: Dict[int, Any] = {}
+        for attr_name, value in attributes.items():
+            attrid = self.attridx.get(attr_name)
+            if attrid is None:
+                self.debug("no such attribute: %s", attr_name)
+            elif not self._suppressed(attrid, value):
+                updates[attrid] = value
+        self._attr_cache.update(updates)
+
+        for attrid, value in updates.items():
+            self.listener_event("attribute_updated", attrid, value)
+
 
 @dataclasses.dataclass
 class DPToAttributeMapping:
@@ -1251,13 +1594,77 @@ class TuyaNewManufCluster(CustomCluster):
     }
 
     manufacturer_client_commands = {
-        TUYA_GET_DATA: ("get_data", (TuyaCommand,), True),
-        TUYA_SET_DATA_RESPONSE: ("set_data_response", (TuyaCommand,), True),
-        TUYA_ACTIVE_STATUS_RPT: ("active_status_report", (TuyaCommand,), True),
+        TUYA_GET_DATA: ("get_data", (TuyaCommand, TuyaDatapoints), True),
+        TUYA_SET_DATA_RESPONSE: (
+            "set_data_response",
+            (TuyaCommand, TuyaDatapoints),
+            True,
+        ),
+        TUYA_ACTIVE_STATUS_RPT: (
+            "active_status_report",
+            (TuyaCommand, TuyaDatapoints),
+            True,
+        ),
         TUYA_SET_TIME: ("set_time_request", (t.data16,), True),
     }
 
     data_point_handlers: Dict[int, str] = {}
+    dp_to_attribute: Dict[int, DPToAttributeMapping] = {}
+
+    # command id / datapoint -> handler, resolved once per class
+    _client_command_handlers: Dict[int, Callable[..., foundation.Status]] = {}
+    _server_command_handlers: Dict[int, Callable[..., foundation.Status]] = {}
+    _dp_handlers: Dict[int, Callable[..., None]] = {}
+
+    # cluster -> attribute updates collected while handling a command
+    _attr_updates: Optional[Dict[CustomCluster, Dict[str, Any]]] = None
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        """Resolve the handlers of the subclass."""
+        super().__init_subclass__(**kwargs)
+        cls._compile_handlers()
+
+    @classmethod
+    def _compile_handlers(cls) -> None:
+        """Resolve command and datapoint handlers into dispatch tables.
+
+        Raises TypeError for datapoints without a handler or attribute mapping.
+        """
+        for table, commands, manufacturer_commands in (
+            (
+                "_client_command_handlers",
+                cls.client_commands,
+                cls.manufacturer_client_commands,
+            ),
+            (
+                "_server_command_handlers",
+                cls.server_commands,
+                cls.manufacturer_server_commands,
+            ),
+        ):
+            handlers = {}
+            for command_id, (name, _, _) in {
+                **commands,
+                **manufacturer_commands,
+            }.items():
+                handler = getattr(cls, f"handle_{name}", None)
+                if handler is not None:
+                    handlers[command_id] = handler
+            setattr(cls, table, handlers)
+
+        dp_handlers = {}
+        for dp, handler_name in cls.data_point_handlers.items():
+            handler = getattr(cls, handler_name, None)
+            if handler is None:
+                raise TypeError(
+                    f"{cls.__name__}: no '{handler_name}' handler for datapoint {dp}"
+                )
+            if handler_name == "_dp_2_attr_update" and dp not in cls.dp_to_attribute:
+                raise TypeError(
+                    f"{cls.__name__}: no attribute mapping for datapoint {dp}"
+                )
+            dp_handlers[dp] = handler
+        cls._dp_handlers = dp_handlers
 
     def handle_cluster_request(
         self,
@@ -1270,46 +1677,65 @@ class TuyaNewManufCluster(CustomCluster):
     ) -> None:
         """Handle cluster specific request."""
 
-        try:
-            if (
-                hdr.is_reply
-            ):  # server_cluster -> client_cluster cluster specific command
-                handler_name = f"handle_{self.client_commands[hdr.command_id][0]}"
-            else:
-                handler_name = f"handle_{self.server_commands[hdr.command_id][0]}"
-        except KeyError:
-            self.debug(
-                "Received unknown manufacturer command %s: %s", hdr.command_id, args
-            )
-            if not hdr.frame_control.disable_default_response:
-                self.send_default_rsp(
-                    hdr, status=foundation.Status.UNSUP_CLUSTER_COMMAND
-                )
-                return
+        if hdr.is_reply:  # server_cluster -> client_cluster cluster specific command
+            commands = self.client_commands
+            handler = self._client_command_handlers.get(hdr.command_id)
+        else:
+            commands = self.server_commands
+            handler = self._server_command_handlers.get(hdr.command_id)
 
-        try:
-            status = getattr(self, handler_name)(*args)
-        except AttributeError:
+        if handler is not None:
+            status = handler(self, *args)
+        elif hdr.command_id in commands:
             self.warning(
                 "No '%s' tuya handler found for %s",
-                handler_name,
+                commands[hdr.command_id][0],
                 args,
             )
             status = foundation.Status.UNSUP_CLUSTER_COMMAND
+        else:
+            self.debug(
+                "Received unknown manufacturer command %s: %s", hdr.command_id, args
+            )
+            status = foundation.Status.UNSUP_CLUSTER_COMMAND
 
         if not hdr.frame_control.disable_default_response:
             self.send_default_rsp(hdr, status=status)
 
-    def handle_get_data(self, command: TuyaCommand) -> foundation.Status:
-        """Handle get_data response (report)."""
+    def handle_get_data(
+        self,
+        command: TuyaCommand,
+        datapoints: Optional[List[TuyaDatapointData]] = None,
+    ) -> foundation.Status:
+        """Handle get_data response (report).
+
+        Attribute updates of all datapoints in the command are sent to each
+        target cluster as one batch.
+        """
+        commands = [command]
+        if datapoints:
+            commands.extend(
+                TuyaCommand(command.status, command.tsn, dp.dp, dp.data)
+                for dp in datapoints
+            )
+
+        status = foundation.Status.UNSUPPORTED_ATTRIBUTE
+        self._attr_updates = {}
         try:
-            dp_handler = self.data_point_handlers[command.dp]
-            getattr(self, dp_handler)(command)
-        except (AttributeError, KeyError):
-            self.debug("No datapoint handler for %s", command)
-            return foundation.status.UNSUPPORTED_ATTRIBUTE
+            for cmd in commands:
+                dp_handler = self._dp_handlers.get(cmd.dp)
+                if dp_handler is None:
+                    self.debug("No datapoint handler for %s", cmd)
+                    continue
+                dp_handler(self, cmd)
+                status = foundation.Status.SUCCESS
+        finally:
+            updates, self._attr_updates = self._attr_updates, None
 
-        return foundation.Status.SUCCESS
+        for cluster, attributes in updates.items():
+            cluster.update_attributes(attributes)
+
+        return status
 
     handle_set_data_response = handle_get_data
     handle_active_status_report = handle_get_data
@@ -1320,11 +1746,7 @@ class TuyaNewManufCluster(CustomCluster):
 
     def _dp_2_attr_update(self, command: TuyaCommand) -> None:
         """Handle data point to attribute report conversion."""
-        try:
-            dp_map = self.dp_to_attribute[command.dp]
-        except KeyError:
-            self.debug("No attribute mapping for %s data point", command.dp)
-            return
+        dp_map = self.dp_to_attribute[command.dp]
 
         endpoint = self.endpoint
         if dp_map.endpoint_id:
@@ -1334,4 +1756,10 @@ class TuyaNewManufCluster(CustomCluster):
         if dp_map.converter:
             value = dp_map.converter(value)
 
-        cluster.update_attribute(dp_map.attribute_name, value)
+        if self._attr_updates is not None:
+            self._attr_updates.setdefault(cluster, {})[dp_map.attribute_name] = value
+        else:
+            cluster.update_attribute(dp_map.attribute_name, value)
+
+
+TuyaNewManufCluster._compile_handlers()
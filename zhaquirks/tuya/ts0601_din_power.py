@@ -5,7 +5,7 @@ from zigpy.zcl.clusters.general import Basic, Groups, Ota, Scenes, Time
 from zigpy.zcl.clusters.homeautomation import ElectricalMeasurement
 from zigpy.zcl.clusters.smartenergy import Metering
 
-from zhaquirks import Bus, LocalDataCluster
+from zhaquirks import SUPPRESS_UNCHANGED, AggregatingCluster, Bus, LocalDataCluster
 from zhaquirks.const import (
     DEVICE_TYPE,
     ENDPOINTS,
@@ -14,7 +14,12 @@ from zhaquirks.const import (
     OUTPUT_CLUSTERS,
     PROFILE_ID,
 )
-from zhaquirks.tuya import TuyaManufClusterAttributes, TuyaOnOff, TuyaSwitch
+from zhaquirks.tuya import (
+    TUYA_ELECTRICAL_AGGREGATIONS,
+    TuyaManufClusterAttributes,
+    TuyaOnOff,
+    TuyaSwitch,
+)
 
 TUYA_TOTAL_ENERGY_ATTR = 0x0211
 TUYA_CURRENT_ATTR = 0x0212
@@ -50,7 +55,7 @@ class TuyaManufClusterDinPower(TuyaManufClusterAttributes):
             self.endpoint.device.switch_bus.listener_event(SWITCH_EVENT, attrid, value)
 
 
-class TuyaPowerMeasurement(LocalDataCluster, ElectricalMeasurement):
+class TuyaPowerMeasurement(AggregatingCluster, LocalDataCluster, ElectricalMeasurement):
     """Custom class for power, voltage and current measurement."""
 
     cluster_id = ElectricalMeasurement.cluster_id
@@ -63,6 +68,12 @@ class TuyaPowerMeasurement(LocalDataCluster, ElectricalMeasurement):
     AC_CURRENT_DIVISOR = 0x0603
 
     _CONSTANT_ATTRIBUTES = {AC_CURRENT_MULTIPLIER: 1, AC_CURRENT_DIVISOR: 1000}
+    _UPDATE_FILTERS = {
+        POWER_ID: SUPPRESS_UNCHANGED,
+        VOLTAGE_ID: SUPPRESS_UNCHANGED,
+        CURRENT_ID: SUPPRESS_UNCHANGED,
+    }
+    _REPORT_AGGREGATIONS = TUYA_ELECTRICAL_AGGREGATIONS
 
     def voltage_reported(self, value):
         """Voltage reported."""
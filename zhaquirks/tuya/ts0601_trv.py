@@ -170,6 +170,64 @@ class data144(t.FixedList, item_type=t.uint8_t, length=18):
     pass
 
 
+class MoesScheduleSlot(t.Struct):
+    """Switch point of a Moes schedule, temperature in centidegrees."""
+
+    hour: t.uint8_t
+    minute: t.uint8_t
+    temperature: t.int16s
+
+
+class MoesSchedule(t.FixedList, item_type=MoesScheduleSlot, length=6):
+    """Switch points of a Moes daily schedule, first to last."""
+
+    def __init__(self, slots=()):
+        """Init, converting the slots to copies of MoesScheduleSlot.
+
+        Slots can also be given as (hour, minute, temperature) sequences or as
+        mappings, like service calls do.
+        """
+        super().__init__(self._slot(slot) for slot in slots)
+
+    @staticmethod
+    def _slot(slot) -> MoesScheduleSlot:
+        if isinstance(slot, MoesScheduleSlot):
+            return MoesScheduleSlot(slot)
+        if isinstance(slot, dict):
+            return MoesScheduleSlot(**slot)
+        return MoesScheduleSlot(*slot)
+
+    @classmethod
+    def from_data(cls, data: data144) -> "MoesSchedule":
+        """Decode the schedule datapoint, which starts with the last slot."""
+        return cls(
+            MoesScheduleSlot(
+                hour=data[i + 2] & 0x3F, minute=data[i + 1], temperature=data[i] * 100
+            )
+            for i in range(15, -1, -3)
+        )
+
+    def to_data(self) -> data144:
+        """Encode the schedule datapoint."""
+        data = data144()
+        for slot in reversed(self):
+            data.extend((round(slot.temperature / 100), slot.minute, slot.hour))
+        return data
+
+
+MOES_DEFAULT_SCHEDULE = MoesSchedule(
+    MoesScheduleSlot(hour=hour, minute=minute, temperature=temperature)
+    for hour, minute, temperature in (
+        (6, 0, 2000),
+        (8, 0, 1500),
+        (11, 30, 1500),
+        (12, 30, 1500),
+        (17, 30, 2000),
+        (22, 0, 1500),
+    )
+)
+
+
 class MoesManufCluster(TuyaManufClusterAttributes):
     """Manufacturer Specific Cluster of some thermostatic valves."""
 
@@ -337,6 +395,7 @@ class MoesThermostat(TuyaThermostatCluster):
         0x4005: ("boost_duration_seconds", t.uint32_t),
         0x4006: ("valve_force_state", ForceValveState),
         0x4007: ("unoccupied_duration_days", t.uint32_t),
+        0x4100: ("workday_schedule", MoesSchedule),
         0x4110: ("workday_schedule_1_hour", t.uint8_t),
         0x4111: ("workday_schedule_1_minute", t.uint8_t),
         0x4112: ("workday_schedule_1_temperature", t.int16s),
@@ -355,6 +414,7 @@ class MoesThermostat(TuyaThermostatCluster):
         0x4160: ("workday_schedule_6_hour", t.uint8_t),
         0x4161: ("workday_schedule_6_minute", t.uint8_t),
         0x4162: ("workday_schedule_6_temperature", t.int16s),
+        0x4200: ("weekend_schedule", MoesSchedule),
         0x4210: ("weekend_schedule_1_hour", t.uint8_t),
         0x4211: ("weekend_schedule_1_minute", t.uint8_t),
         0x4212: ("weekend_schedule_1_temperature", t.int16s),
@@ -408,47 +468,13 @@ class MoesThermostat(TuyaThermostatCluster):
         "unoccupied_duration_days": (MOES_AWAY_DAYS_ATTR, None),
     }
 
-    WORKDAY_SCHEDULE_ATTRS = {
-        "workday_schedule_6_temperature": 1500,
-        "workday_schedule_6_minute": 0,
-        "workday_schedule_6_hour": 22,
-        "workday_schedule_5_temperature": 2000,
-        "workday_schedule_5_minute": 30,
-        "workday_schedule_5_hour": 17,
-        "workday_schedule_4_temperature": 1500,
-        "workday_schedule_4_minute": 30,
-        "workday_schedule_4_hour": 12,
-        "workday_schedule_3_temperature": 1500,
-        "workday_schedule_3_minute": 30,
-        "workday_schedule_3_hour": 11,
-        "workday_schedule_2_temperature": 1500,
-        "workday_schedule_2_minute": 0,
-        "workday_schedule_2_hour": 8,
-        "workday_schedule_1_temperature": 2000,
-        "workday_schedule_1_minute": 0,
-        "workday_schedule_1_hour": 6,
-    }
-
-    WEEKEND_SCHEDULE_ATTRS = {
-        "weekend_schedule_6_temperature": 1500,
-        "weekend_schedule_6_minute": 0,
-        "weekend_schedule_6_hour": 22,
-        "weekend_schedule_5_temperature": 2000,
-        "weekend_schedule_5_minute": 30,
-        "weekend_schedule_5_hour": 17,
-        "weekend_schedule_4_temperature": 1500,
-        "weekend_schedule_4_minute": 30,
-        "weekend_schedule_4_hour": 12,
-        "weekend_schedule_3_temperature": 1500,
-        "weekend_schedule_3_minute": 30,
-        "weekend_schedule_3_hour": 11,
-        "weekend_schedule_2_temperature": 1500,
-        "weekend_schedule_2_minute": 0,
-        "weekend_schedule_2_hour": 8,
-        "weekend_schedule_1_temperature": 2000,
-        "weekend_schedule_1_minute": 0,
-        "weekend_schedule_1_hour": 6,
+    # Schedule datapoint -> attribute id of the schedule, the attribute ids of its
+    # slots follow: 0x10 * slot number + 0 for the hour, 1 minute, 2 temperature
+    SCHEDULE_ATTRS = {
+        MOES_SCHEDULE_WORKDAY_ATTR: 0x4100,
+        MOES_SCHEDULE_WEEKEND_ATTR: 0x4200,
     }
+    _SCHEDULE_SLOT_FIELDS = ("hour", "minute", "temperature")
 
     def map_attribute(self, attribute, value):
         """Map standardized attribute value to dict of manufacturer values."""
@@ -489,44 +515,35 @@ class MoesThermostat(TuyaThermostatCluster):
                     self.attridx["operation_preset"], 2
                 )
             }
-        if attribute in self.WORKDAY_SCHEDULE_ATTRS:
-            data = data144()
-            for num, (attr, default) in enumerate(self.WORKDAY_SCHEDULE_ATTRS.items()):
-
-                if num % 3 == 0:
-                    if attr == attribute:
-                        val = round(value / 100)
-                    else:
-                        val = round(
-                            self._attr_cache.get(self.attridx[attr], default) / 100
-                        )
-                else:
-                    if attr == attribute:
-                        val = value
-                    else:
-                        val = self._attr_cache.get(self.attridx[attr], default)
-
-                data.append(val)
-            return {MOES_SCHEDULE_WORKDAY_ATTR: data}
-        if attribute in self.WEEKEND_SCHEDULE_ATTRS:
-            data = data144()
-            for num, (attr, default) in enumerate(self.WEEKEND_SCHEDULE_ATTRS.items()):
-
-                if num % 3 == 0:
-                    if attr == attribute:
-                        val = round(value / 100)
-                    else:
-                        val = round(
-                            self._attr_cache.get(self.attridx[attr], default) / 100
-                        )
-                else:
-                    if attr == attribute:
-                        val = value
-                    else:
-                        val = self._attr_cache.get(self.attridx[attr], default)
-
-                data.append(val)
-            return {MOES_SCHEDULE_WEEKEND_ATTR: data}
+        if attribute in ("workday_schedule", "weekend_schedule"):
+            return {self._schedule_datapoint(self.attridx[attribute]): value.to_data()}
+        attrid = self.attridx.get(attribute)
+        if attrid is not None and attrid & 0xFF00 in self.SCHEDULE_ATTRS.values():
+            # Write the slot value along with the cached values of the others
+            schedule_attrid = attrid & 0xFF00
+            schedule = self._cached_schedule(schedule_attrid)
+            field = self._SCHEDULE_SLOT_FIELDS[attrid & 0x0F]
+            setattr(schedule[(attrid >> 4 & 0x0F) - 1], field, value)
+            return {self._schedule_datapoint(schedule_attrid): schedule.to_data()}
+
+    def _schedule_datapoint(self, schedule_attrid: int) -> int:
+        for datapoint, attrid in self.SCHEDULE_ATTRS.items():
+            if attrid == schedule_attrid:
+                return datapoint
+
+    def _cached_schedule(self, schedule_attrid: int) -> MoesSchedule:
+        """Schedule from the cached slot values, defaults for the missing ones."""
+        return MoesSchedule(
+            MoesScheduleSlot(
+                **{
+                    field: self._attr_cache.get(
+                        schedule_attrid + 0x10 * num + offset, getattr(default, field)
+                    )
+                    for offset, field in enumerate(self._SCHEDULE_SLOT_FIELDS)
+                }
+            )
+            for num, default in enumerate(MOES_DEFAULT_SCHEDULE, start=1)
+        )
 
     def mode_change(self, value):
         """System Mode change."""
@@ -556,94 +573,20 @@ class MoesThermostat(TuyaThermostatCluster):
         self._update_attribute(self.attridx["occupancy"], occupancy)
 
     def schedule_change(self, attr, value):
-        """Scheduler attribute change."""
+        """Scheduler attribute change, only the changed slot values are updated."""
 
-        if attr == MOES_SCHEDULE_WORKDAY_ATTR:
-            self._update_attribute(
-                self.attridx["workday_schedule_1_hour"], value[17] & 0x3F
-            )
-            self._update_attribute(self.attridx["workday_schedule_1_minute"], value[16])
-            self._update_attribute(
-                self.attridx["workday_schedule_1_temperature"], value[15] * 100
-            )
-            self._update_attribute(
-                self.attridx["workday_schedule_2_hour"], value[14] & 0x3F
-            )
-            self._update_attribute(self.attridx["workday_schedule_2_minute"], value[13])
-            self._update_attribute(
-                self.attridx["workday_schedule_2_temperature"], value[12] * 100
-            )
-            self._update_attribute(
-                self.attridx["workday_schedule_3_hour"], value[11] & 0x3F
-            )
-            self._update_attribute(self.attridx["workday_schedule_3_minute"], value[10])
-            self._update_attribute(
-                self.attridx["workday_schedule_3_temperature"], value[9] * 100
-            )
-            self._update_attribute(
-                self.attridx["workday_schedule_4_hour"], value[8] & 0x3F
-            )
-            self._update_attribute(self.attridx["workday_schedule_4_minute"], value[7])
-            self._update_attribute(
-                self.attridx["workday_schedule_4_temperature"], value[6] * 100
-            )
-            self._update_attribute(
-                self.attridx["workday_schedule_5_hour"], value[5] & 0x3F
-            )
-            self._update_attribute(self.attridx["workday_schedule_5_minute"], value[4])
-            self._update_attribute(
-                self.attridx["workday_schedule_5_temperature"], value[3] * 100
-            )
-            self._update_attribute(
-                self.attridx["workday_schedule_6_hour"], value[2] & 0x3F
-            )
-            self._update_attribute(self.attridx["workday_schedule_6_minute"], value[1])
-            self._update_attribute(
-                self.attridx["workday_schedule_6_temperature"], value[0] * 100
-            )
-        elif attr == MOES_SCHEDULE_WEEKEND_ATTR:
-            self._update_attribute(
-                self.attridx["weekend_schedule_1_hour"], value[17] & 0x3F
-            )
-            self._update_attribute(self.attridx["weekend_schedule_1_minute"], value[16])
-            self._update_attribute(
-                self.attridx["weekend_schedule_1_temperature"], value[15] * 100
-            )
-            self._update_attribute(
-                self.attridx["weekend_schedule_2_hour"], value[14] & 0x3F
-            )
-            self._update_attribute(self.attridx["weekend_schedule_2_minute"], value[13])
-            self._update_attribute(
-                self.attridx["weekend_schedule_2_temperature"], value[12] * 100
-            )
-            self._update_attribute(
-                self.attridx["weekend_schedule_3_hour"], value[11] & 0x3F
-            )
-            self._update_attribute(self.attridx["weekend_schedule_3_minute"], value[10])
-            self._update_attribute(
-                self.attridx["weekend_schedule_3_temperature"], value[9] * 100
-            )
-            self._update_attribute(
-                self.attridx["weekend_schedule_4_hour"], value[8] & 0x3F
-            )
-            self._update_attribute(self.attridx["weekend_schedule_4_minute"], value[7])
-            self._update_attribute(
-                self.attridx["weekend_schedule_4_temperature"], value[6] * 100
-            )
-            self._update_attribute(
-                self.attridx["weekend_schedule_5_hour"], value[5] & 0x3F
-            )
-            self._update_attribute(self.attridx["weekend_schedule_5_minute"], value[4])
-            self._update_attribute(
-                self.attridx["weekend_schedule_5_temperature"], value[3] * 100
-            )
-            self._update_attribute(
-                self.attridx["weekend_schedule_6_hour"], value[2] & 0x3F
-            )
-            self._update_attribute(self.attridx["weekend_schedule_6_minute"], value[1])
-            self._update_attribute(
-                self.attridx["weekend_schedule_6_temperature"], value[0] * 100
-            )
+        schedule_attrid = self.SCHEDULE_ATTRS.get(attr)
+        if schedule_attrid is None:
+            return
+
+        schedule = MoesSchedule.from_data(value)
+        # The schedule is kept for reads, changes are reported by its slots
+        self._attr_cache[schedule_attrid] = schedule
+        for num, slot in enumerate(schedule, start=1):
+            for offset, field in enumerate(self._SCHEDULE_SLOT_FIELDS):
+                attrid = schedule_attrid + 0x10 * num + offset
+                if self._attr_cache.get(attrid) != getattr(slot, field):
+                    self._update_attribute(attrid, getattr(slot, field))
 
 
 class MoesThermostatNew(MoesThermostat):
@@ -18,6 +18,7 @@ from zigpy.zcl.clusters.measurement import TemperatureMeasurement
 from zigpy.zcl.clusters.security import IasZone
 
 from zhaquirks import Bus, LocalDataCluster
+from zhaquirks.configuration import scheduled_configuration
 from zhaquirks.const import (
     CLUSTER_COMMAND,
     DEVICE_TYPE,
@@ -45,6 +46,7 @@ class EmulatedIasZone(LocalDataCluster, IasZone):
         self.endpoint.device.ias_bus.add_listener(self)
         super()._update_attribute(ZONE_TYPE, MOISTURE_TYPE)
 
+    @scheduled_configuration
     async def bind(self):
         """Bind cluster."""
         result = await self.endpoint.device.app_cluster.bind()
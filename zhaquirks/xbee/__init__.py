@@ -18,8 +18,10 @@ the xbee stays alive in Home Assistant.
 
 import asyncio
 import enum
+import functools
 import logging
-from typing import Any, List, Optional, Union
+import struct
+from typing import Any, List, Optional, Tuple, Union
 
 from zigpy.quirks import CustomDevice
 import zigpy.types as t
@@ -53,8 +55,30 @@ XBEE_PROFILE_ID = 0xC105
 ATTR_ON_OFF = 0x0000
 ATTR_PRESENT_VALUE = 0x0055
 PIN_ANALOG_OUTPUT = 2
+# DIO0 to DIO12, the higher bits of the digital mask are reserved
+DIGITAL_PINS_MASK = (1 << 13) - 1
 
 REMOTE_AT_COMMAND_TIMEOUT = 30
+REMOTE_AT_COMMAND_CONCURRENCY = 8
+
+
+@functools.lru_cache(maxsize=None)
+def _mask_pins(mask: int) -> Tuple[int, ...]:
+    """Return the numbers of the pins enabled in an IO sample mask."""
+    return tuple(pin for pin in range(mask.bit_length()) if (mask >> pin) & 1)
+
+
+@functools.lru_cache(maxsize=None)
+def _analog_sample_format(pins: int) -> struct.Struct:
+    """Return the struct of the analog samples of a sample set."""
+    return struct.Struct(f">{pins}H")
+
+
+def _update_changed_attribute(cluster, attrid: int, value: Any) -> None:
+    """Update a pin cluster attribute, unless it already has the value."""
+    # pylint: disable=W0212
+    if cluster._attr_cache.get(attrid) != value:
+        cluster._update_attribute(attrid, value)
 
 
 class int_t(int):
@@ -349,7 +373,7 @@ class XBeeRemoteATRequest(LocalDataCluster):
     cluster_id = XBEE_AT_REQUEST_CLUSTER
     server_commands = {}
 
-    _seq: int = 1
+    max_concurrent_commands: int = REMOTE_AT_COMMAND_CONCURRENCY
 
     class EUI64(t.EUI64):
         """EUI64 serializable class."""
@@ -389,11 +413,22 @@ class XBeeRemoteATRequest(LocalDataCluster):
             k: (v[0], (v[1],), None)
             for k, v in zip(range(1, len(AT_COMMANDS) + 1), AT_COMMANDS.items())
         }
-
-    def _save_at_request(self, frame_id, future):
-        self._endpoint.in_clusters[XBEE_AT_RESPONSE_CLUSTER].save_at_request(
-            frame_id, future
-        )
+        self._seq = 1
+        self._semaphore = None
+
+    @property
+    def _responses(self):
+        return self._endpoint.in_clusters[XBEE_AT_RESPONSE_CLUSTER]
+
+    def _next_frame_id(self):
+        """Return the next frame id not used by a request in flight."""
+        # Frame id 0 disables the response, ids cycle through 1..255
+        for _ in range(255):
+            frame_id = self._seq
+            self._seq = (self._seq % 255) + 1
+            if not self._responses.is_awaiting(frame_id):
+                return frame_id
+        raise RuntimeError("No free frame id for the AT command request")
 
     def remote_at_command(self, cmd_name, *args, apply_changes=True, **kwargs):
         """Execute a Remote AT Command and Return Response."""
@@ -412,22 +447,48 @@ class XBeeRemoteATRequest(LocalDataCluster):
             options |= 0x02
         return self._remote_at_command(options, cmd_name, *args)
 
+    async def remote_at_commands(self, commands, apply_changes=True):
+        """Execute a batch of Remote AT Commands and Return their Responses.
+
+        The commands are given as (name, *args) tuples and sent without
+        waiting for the previous responses, up to `max_concurrent_commands`
+        in flight. Changes are applied once, after all commands succeeded.
+        Failed commands have their exception as response.
+        """
+        responses = await asyncio.gather(
+            *(
+                self.remote_at_command(name, *args, apply_changes=False)
+                for name, *args in commands
+            ),
+            return_exceptions=True,
+        )
+        if apply_changes and not any(
+            isinstance(response, Exception) for response in responses
+        ):
+            await self.remote_at_command("AC")
+        return responses
+
     async def _remote_at_command(self, options, name, *args):
         _LOGGER.debug("Remote AT command: %s %s", name, args)
         data = t.serialize(args, (AT_COMMANDS[name],))
-        try:
-            return await asyncio.wait_for(
-                await self._command(options, name.encode("ascii"), data, *args),
-                timeout=REMOTE_AT_COMMAND_TIMEOUT,
-            )
-        except asyncio.TimeoutError:
-            _LOGGER.warning("No response to %s command", name)
-            raise
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_commands)
 
-    async def _command(self, options, command, data, *args):
+        async with self._semaphore:
+            frame_id = self._next_frame_id()
+            future = self._responses.save_at_request(frame_id)
+            try:
+                await self._command(options, name.encode("ascii"), data, frame_id)
+                return await asyncio.wait_for(future, timeout=REMOTE_AT_COMMAND_TIMEOUT)
+            except asyncio.TimeoutError:
+                _LOGGER.warning("No response to %s command", name)
+                raise
+            finally:
+                # The frame id can be reused once the request completed
+                self._responses.discard_at_request(frame_id, future)
+
+    async def _command(self, options, command, data, frame_id):
         _LOGGER.debug("Command %s %s", command, data)
-        frame_id = self._seq
-        self._seq = (self._seq % 255) + 1
         schema = (
             uint8_t,
             uint8_t,
@@ -461,12 +522,8 @@ class XBeeRemoteATRequest(LocalDataCluster):
             data,
             expect_reply=False,
         )
-
-        future = asyncio.Future()
-        self._save_at_request(frame_id, future)
         if result[0] != foundation.Status.SUCCESS:
-            future.set_exception(RuntimeError("AT Command request: {}".format(result)))
-        return future
+            raise RuntimeError("AT Command request: {}".format(result))
 
     async def command(
         self, command_id, *args, manufacturer=None, expect_reply=False, tsn=None
@@ -498,8 +555,6 @@ class XBeeRemoteATResponse(LocalDataCluster):
 
     cluster_id = XBEE_AT_RESPONSE_CLUSTER
 
-    _awaiting = {}
-
     class ATCommandResult(enum.IntEnum):
         """AT command results."""
 
@@ -517,9 +572,26 @@ class XBeeRemoteATResponse(LocalDataCluster):
             """Deserialize ATCommand."""
             return cls(data[:2]), data[2:]
 
-    def save_at_request(self, frame_id, future):
-        """Save pending request."""
-        self._awaiting[frame_id] = (future,)
+    def __init__(self, *args, **kwargs):
+        """Init."""
+        super().__init__(*args, **kwargs)
+        self._awaiting = {}
+
+    def save_at_request(self, frame_id):
+        """Save pending request, return the future of its response."""
+        future = asyncio.get_running_loop().create_future()
+        self._awaiting[frame_id] = future
+        return future
+
+    def discard_at_request(self, frame_id, future):
+        """Forget a pending request, once completed or timed out."""
+        # A completed request's frame id may already be used by a newer request
+        if self._awaiting.get(frame_id) is future:
+            del self._awaiting[frame_id]
+
+    def is_awaiting(self, frame_id):
+        """Return True if a request with the frame id is pending."""
+        return frame_id in self._awaiting
 
     def handle_cluster_request(
         self,
@@ -539,7 +611,10 @@ class XBeeRemoteATResponse(LocalDataCluster):
             _LOGGER.debug(
                 "Remote AT command response: %s", (frame_id, cmd, status, value)
             )
-            (fut,) = self._awaiting.pop(frame_id)
+            fut = self._awaiting.pop(frame_id, None)
+            if fut is None or fut.done():
+                _LOGGER.debug("Unexpected AT command response: %s", frame_id)
+                return
             try:
                 status = self.ATCommandResult(status)
             except ValueError:
@@ -588,6 +663,14 @@ class XBeeCommon(CustomDevice):
             .remote_at_command(command, *args, apply_changes=True, **kwargs)
         )
 
+    def remote_at_commands(self, commands, apply_changes=True):
+        """Remote at commands, sent as one pipelined batch."""
+        return (
+            self.endpoints[230]
+            .out_clusters[XBEE_AT_REQUEST_CLUSTER]
+            .remote_at_commands(commands, apply_changes=apply_changes)
+        )
+
     def deserialize(self, endpoint_id, cluster_id, data):
         """Deserialize."""
         tsn = self._application.get_sequence()
@@ -601,7 +684,7 @@ class XBeeCommon(CustomDevice):
 
         cluster_id = XBEE_IO_CLUSTER
 
-        class IOSample(bytes):
+        class IOSample(dict):
             """Parse an XBee IO sample report."""
 
             # pylint: disable=R0201
@@ -617,56 +700,52 @@ class XBeeCommon(CustomDevice):
                 Sample set count byte 0
                 Digital mask byte 1, 2
                 Analog mask byte 3
-                Digital samples byte 4, 5 (if any sample exists)
-                Analog Sample, 2 bytes per
+                Then for each sample set:
+                Digital samples 2 bytes (if any digital pin is enabled)
+                Analog Sample, 2 bytes per enabled analog pin
+
+                The enabled pins are given as tuples of pin numbers, each
+                sample set as a tuple of the digital and the analog values of
+                those pins.
                 """
-                sample_sets = int.from_bytes(data[0:1], byteorder="big")
-                if sample_sets != 1:
-                    _LOGGER.warning("Number of sets is not 1")
-                digital_mask = data[1:3]
-                analog_mask = data[3:4]
-                digital_sample = data[4:6]
-                num_bits = 13
-                digital_pins = [
-                    (int.from_bytes(digital_mask, byteorder="big") >> bit) & 1
-                    for bit in range(num_bits - 1, -1, -1)
-                ]
-                digital_pins = list(reversed(digital_pins))
-                analog_pins = [
-                    (int.from_bytes(analog_mask, byteorder="big") >> bit) & 1
-                    for bit in range(8 - 1, -1, -1)
-                ]
-                analog_pins = list(reversed(analog_pins))
-                if 1 in digital_pins:
-                    digital_samples = [
-                        (int.from_bytes(digital_sample, byteorder="big") >> bit) & 1
-                        for bit in range(num_bits - 1, -1, -1)
-                    ]
-                    digital_samples = list(reversed(digital_samples))
-                    sample_index = 6
-                else:
-                    # skip digital samples block
-                    digital_samples = digital_pins
-                    sample_index = 4
-                analog_samples = []
-                for apin in analog_pins:
-                    if apin == 1:
-                        analog_samples.append(
-                            int.from_bytes(
-                                data[sample_index : sample_index + 2], byteorder="big"
-                            )
+                if len(data) < 4:
+                    raise ValueError("IO sample report is too short")
+                sample_sets = data[0]
+                digital_pins = _mask_pins(
+                    int.from_bytes(data[1:3], "big") & DIGITAL_PINS_MASK
+                )
+                analog_pins = _mask_pins(data[3])
+                analog_format = _analog_sample_format(len(analog_pins))
+
+                set_size = (2 if digital_pins else 0) + analog_format.size
+                if len(data) < 4 + sample_sets * set_size:
+                    raise ValueError(
+                        f"IO sample report is too short for {sample_sets} sample sets"
+                    )
+
+                samples = []
+                sample_index = 4
+                for _ in range(sample_sets):
+                    if digital_pins:
+                        digital_sample = int.from_bytes(
+                            data[sample_index : sample_index + 2], "big"
+                        )
+                        digital_values = tuple(
+                            (digital_sample >> pin) & 1 for pin in digital_pins
                         )
                         sample_index += 2
                     else:
-                        analog_samples.append(0)
+                        digital_values = ()
+                    analog_values = analog_format.unpack_from(data, sample_index)
+                    sample_index += analog_format.size
+                    samples.append((digital_values, analog_values))
 
                 return (
-                    {
-                        "digital_pins": digital_pins,
-                        "analog_pins": analog_pins,
-                        "digital_samples": digital_samples,
-                        "analog_samples": analog_samples,
-                    },
+                    cls(
+                        digital_pins=digital_pins,
+                        analog_pins=analog_pins,
+                        samples=samples,
+                    ),
                     data[sample_index:],
                 )
 
@@ -681,33 +760,33 @@ class XBeeCommon(CustomDevice):
         ):
             """Handle the cluster request.
 
-            Update the digital pin states
+            Update the pin states of each sample set, pins are only updated
+            when their value changes.
             """
             if hdr.command_id == ON_OFF_CMD:
                 values = args[0]
-                if "digital_pins" in values and "digital_samples" in values:
+                digital_clusters = [
+                    self._endpoint.device[0xD0 + pin].on_off
+                    for pin in values["digital_pins"]
+                ]
+                analog_clusters = [
+                    self._endpoint.device[0xD0 + pin].analog_input
+                    for pin in values["analog_pins"]
+                ]
+                analog_scales = [
+                    1000 if pin == 7 else 10.23  # supply voltage is in mV
+                    for pin in values["analog_pins"]
+                ]
+                for digital_values, analog_values in values["samples"]:
                     # Update digital inputs
-                    active_pins = [
-                        i for i, x in enumerate(values["digital_pins"]) if x == 1
-                    ]
-                    for pin in active_pins:
-                        # pylint: disable=W0212
-                        self._endpoint.device[0xD0 + pin].on_off._update_attribute(
-                            ATTR_ON_OFF, values["digital_samples"][pin]
-                        )
-                if "analog_pins" in values and "analog_samples" in values:
+                    for cluster, value in zip(digital_clusters, digital_values):
+                        _update_changed_attribute(cluster, ATTR_ON_OFF, value)
                     # Update analog inputs
-                    active_pins = [
-                        i for i, x in enumerate(values["analog_pins"]) if x == 1
-                    ]
-                    for pin in active_pins:
-                        # pylint: disable=W0212
-                        self._endpoint.device[
-                            0xD0 + pin
-                        ].analog_input._update_attribute(
-                            ATTR_PRESENT_VALUE,
-                            values["analog_samples"][pin]
-                            / (10.23 if pin != 7 else 1000),  # supply voltage is in mV
+                    for cluster, scale, value in zip(
+                        analog_clusters, analog_scales, analog_values
+                    ):
+                        _update_changed_attribute(
+                            cluster, ATTR_PRESENT_VALUE, value / scale
                         )
             else:
                 super().handle_cluster_request(hdr, args)
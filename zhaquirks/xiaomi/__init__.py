@@ -1,9 +1,12 @@
 """Xiaomi common components for custom device handlers."""
 from __future__ import annotations
 
+import collections
+import dataclasses
 import logging
 import math
-from typing import Iterable, Iterator, Optional
+import struct
+from typing import Any, Callable, Iterable, Iterator, Optional
 
 from zigpy import types as t
 import zigpy.device
@@ -30,6 +33,7 @@ import zigpy.zdo
 from zigpy.zdo.types import NodeDescriptor
 
 from zhaquirks import (
+    SUPPRESS_UNCHANGED,
     Bus,
     LocalDataCluster,
     MotionOnEvent,
@@ -96,9 +100,139 @@ XIAOMI_NODE_DESC = NodeDescriptor(
 ZONE_TYPE = 0x0001
 
 
+AQARA_ATTRIBUTE_NAMES = {
+    1: BATTERY_VOLTAGE_MV,
+    3: TEMPERATURE,
+    4: XIAOMI_ATTR_4,
+    5: XIAOMI_ATTR_5,
+    6: XIAOMI_ATTR_6,
+    10: PATH,
+}
+# Temperature sensors send temperature/humidity/pressure updates trough this
+# cluster instead of the respective clusters
+_AQARA_WEATHER_ATTRIBUTE_NAMES = {
+    **AQARA_ATTRIBUTE_NAMES,
+    100: TEMPERATURE_MEASUREMENT,
+    101: HUMIDITY_MEASUREMENT,
+    102: PRESSURE_MEASUREMENT,
+}
+_AQARA_PLUG_ATTRIBUTE_NAMES = {
+    **AQARA_ATTRIBUTE_NAMES,
+    149: CONSUMPTION,
+    150: VOLTAGE,
+    152: POWER,
+}
+AQARA_MODEL_ATTRIBUTE_NAMES = {
+    "lumi.sensor_ht": _AQARA_WEATHER_ATTRIBUTE_NAMES,
+    "lumi.sens": _AQARA_WEATHER_ATTRIBUTE_NAMES,
+    "lumi.weather": _AQARA_WEATHER_ATTRIBUTE_NAMES,
+    "lumi.airmonitor.acn01": {
+        **_AQARA_WEATHER_ATTRIBUTE_NAMES,
+        102: TVOC_MEASUREMENT,
+    },
+    "lumi.plug.maus01": _AQARA_PLUG_ATTRIBUTE_NAMES,
+    "lumi.relay.c2acn01": _AQARA_PLUG_ATTRIBUTE_NAMES,
+    "lumi.sensor_motion.aq2": {
+        **AQARA_ATTRIBUTE_NAMES,
+        11: ILLUMINANCE_MEASUREMENT,
+    },
+}
+
 _LOGGER = logging.getLogger(__name__)
 
 
+def _aqara_value_decoder(python_type) -> Callable[[memoryview, int], tuple[Any, int]]:
+    """Return a decoder of values of the type at an offset of a buffer."""
+
+    if issubclass(python_type, t.FixedIntType) and python_type._bits % 8 == 0:
+        size = python_type._bits // 8
+        signed = python_type._signed
+
+        def decode(view: memoryview, offset: int) -> tuple[Any, int]:
+            end = offset + size
+            if end > len(view):
+                raise ValueError(f"Data is too short to contain {size} bytes")
+            value = int.from_bytes(view[offset:end], "little", signed=signed)
+            return python_type(value), end
+
+    elif python_type in (t.Single, t.Double):
+        fmt = struct.Struct("<f" if python_type is t.Single else "<d")
+
+        def decode(view: memoryview, offset: int) -> tuple[Any, int]:
+            try:
+                (value,) = fmt.unpack_from(view, offset)
+            except struct.error as exc:
+                raise ValueError(str(exc)) from exc
+            return python_type(value), offset + fmt.size
+
+    else:
+
+        def decode(view: memoryview, offset: int) -> tuple[Any, int]:
+            value, data = python_type.deserialize(view[offset:].tobytes())
+            return value, len(view) - len(data)
+
+    return decode
+
+
+# Zigbee data type -> decoder of the values in Aqara structured attributes
+AQARA_VALUE_DECODERS = {
+    type_id: _aqara_value_decoder(python_type)
+    for type_id, (_, python_type, _) in foundation.DATA_TYPES.items()
+}
+
+
+def parse_aqara_tlv(value: bytes) -> dict[int, Any]:
+    """Parse the tag, type and value stream of an Aqara structured attribute."""
+
+    result = {}
+    view = memoryview(value)
+    offset = 0
+    end = len(view)
+
+    # Some attribute reports end with a stray null byte
+    while offset < end and (offset != end - 1 or view[offset] != 0):
+        if offset + 2 > end:
+            raise ValueError("Data is too short to contain an attribute type")
+        decoder = AQARA_VALUE_DECODERS[view[offset + 1]]
+        result[view[offset]], offset = decoder(view, offset + 2)
+
+    return result
+
+
+@dataclasses.dataclass(frozen=True)
+class BusRoute:
+    """Route of a parsed Xiaomi attribute to an event on a device bus."""
+
+    bus: str
+    event: str
+    converter: Optional[Callable[[Any], Any]] = None
+
+    def resolve(self, cluster: XiaomiCluster) -> Callable[[Any], None]:
+        """Return a callable sending values to the bus of the cluster's device."""
+        bus = getattr(cluster.endpoint.device, self.bus)
+        event, converter = self.event, self.converter
+        if converter is None:
+            return lambda value: bus.listener_event(event, value)
+        return lambda value: bus.listener_event(event, converter(value))
+
+
+@dataclasses.dataclass(frozen=True)
+class ClusterRoute:
+    """Route of a parsed Xiaomi attribute to an attribute of an endpoint cluster."""
+
+    ep_attribute: str
+    attribute_id: int = 0x0000
+    converter: Optional[Callable[[Any], Any]] = None
+
+    def resolve(self, cluster: XiaomiCluster) -> Callable[[Any], None]:
+        """Return a callable updating the attribute on the cluster's endpoint."""
+        target = getattr(cluster.endpoint, self.ep_attribute)
+        attrid, converter = self.attribute_id, self.converter
+        if converter is None:
+            return lambda value: target.update_attribute(attrid, value)
+        return lambda value: target.update_attribute(attrid, converter(value))
+
+
 class XiaomiCustomDevice(CustomDevice):
     """Custom device representing xiaomi devices."""
 
@@ -114,9 +248,75 @@ class XiaomiQuickInitDevice(XiaomiCustomDevice, QuickInitDevice):
     """Xiaomi devices eligible for QuickInit."""
 
 
+class AttributeReportCache:
+    """Bounded LRU cache of fixed Xiaomi attribute reports.
+
+    Keyed on the raw report payload, the value is the payload with the string
+    attributes fixed or None if the report couldn't be interpreted.
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        """Init."""
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: collections.OrderedDict[
+            bytes, Optional[bytes]
+        ] = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of cached reports."""
+        return len(self._entries)
+
+    def __getitem__(self, data: bytes) -> Optional[bytes]:
+        """Return the fixed report, raise KeyError if not cached."""
+        try:
+            fixed_data = self._entries[data]
+        except KeyError:
+            self.misses += 1
+            raise
+        self._entries.move_to_end(data)
+        self.hits += 1
+        return fixed_data
+
+    def __setitem__(self, data: bytes, fixed_data: Optional[bytes]) -> None:
+        """Cache a fixed report, evicting the least recently used one."""
+        self._entries[data] = fixed_data
+        self._entries.move_to_end(data)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all cached reports and reset the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
 class XiaomiCluster(CustomCluster):
     """Xiaomi cluster implementation."""
 
+    # Aqara devices send the same heartbeat reports over and over
+    attr_report_cache = AttributeReportCache()
+
+    # parsed attribute name -> route of its values
+    attribute_routes: dict[str, BusRoute | ClusterRoute] = {
+        BATTERY_VOLTAGE_MV: BusRoute("battery_bus", BATTERY_REPORTED),
+        TEMPERATURE_MEASUREMENT: BusRoute("temperature_bus", TEMPERATURE_REPORTED),
+        HUMIDITY_MEASUREMENT: BusRoute("humidity_bus", HUMIDITY_REPORTED),
+        PRESSURE_MEASUREMENT: BusRoute(
+            "pressure_bus", PRESSURE_REPORTED, lambda x: x / 100
+        ),
+        POWER: BusRoute("power_bus", POWER_REPORTED),
+        CONSUMPTION: BusRoute("consumption_bus", CONSUMPTION_REPORTED),
+        VOLTAGE: BusRoute("voltage_bus", VOLTAGE_REPORTED, lambda x: x * 0.1),
+        ILLUMINANCE_MEASUREMENT: BusRoute("illuminance_bus", ILLUMINANCE_REPORTED),
+        TVOC_MEASUREMENT: ClusterRoute("voc_level"),
+        TEMPERATURE: ClusterRoute("device_temperature", converter=lambda x: x * 100),
+    }
+    # parsed attribute name -> resolved route, None if not routed
+    _route_targets: Optional[dict[str, Optional[Callable[[Any], None]]]] = None
+
     def _iter_parse_attr_report(
         self, data: bytes
     ) -> Iterator[foundation.Attribute, bytes]:
@@ -190,18 +390,20 @@ class XiaomiCluster(CustomCluster):
         ):
             return super().deserialize(hdr.serialize() + data)
 
-        reports = list(self._interpret_attr_reports(data))
-
-        if not reports:
+        try:
+            fixed_data = self.attr_report_cache[data]
+        except KeyError:
+            # The first interpretation consuming the whole report wins
+            report = next(iter(self._interpret_attr_reports(data)), None)
+            if report is None:
+                fixed_data = None
+            else:
+                fixed_data = b"".join(attr.serialize() for attr in report)
+            self.attr_report_cache[data] = fixed_data
+
+        if fixed_data is None:
             _LOGGER.warning("Failed to parse Xiaomi attribute report: %r", data)
             return super().deserialize(hdr.serialize() + data)
-        elif len(reports) > 1:
-            _LOGGER.warning(
-                "Xiaomi attribute report has multiple valid interpretations: %r",
-                reports,
-            )
-
-        fixed_data = b"".join(attr.serialize() for attr in reports[0])
 
         return super().deserialize(hdr.serialize() + fixed_data)
 
@@ -237,93 +439,31 @@ class XiaomiCluster(CustomCluster):
             attrid,
             attributes,
         )
-        if BATTERY_VOLTAGE_MV in attributes:
-            self.endpoint.device.battery_bus.listener_event(
-                BATTERY_REPORTED, attributes[BATTERY_VOLTAGE_MV]
-            )
+        self._route_attributes(attributes)
 
-        if TEMPERATURE_MEASUREMENT in attributes:
-            self.endpoint.device.temperature_bus.listener_event(
-                TEMPERATURE_REPORTED, attributes[TEMPERATURE_MEASUREMENT]
-            )
-        if HUMIDITY_MEASUREMENT in attributes:
-            self.endpoint.device.humidity_bus.listener_event(
-                HUMIDITY_REPORTED, attributes[HUMIDITY_MEASUREMENT]
-            )
-        if PRESSURE_MEASUREMENT in attributes:
-            self.endpoint.device.pressure_bus.listener_event(
-                PRESSURE_REPORTED, attributes[PRESSURE_MEASUREMENT] / 100
-            )
-        if POWER in attributes:
-            self.endpoint.device.power_bus.listener_event(
-                POWER_REPORTED, attributes[POWER]
-            )
-        if CONSUMPTION in attributes:
-            self.endpoint.device.consumption_bus.listener_event(
-                CONSUMPTION_REPORTED, attributes[CONSUMPTION]
-            )
-        if VOLTAGE in attributes:
-            self.endpoint.device.voltage_bus.listener_event(
-                VOLTAGE_REPORTED, attributes[VOLTAGE] * 0.1
-            )
-        if ILLUMINANCE_MEASUREMENT in attributes:
-            self.endpoint.device.illuminance_bus.listener_event(
-                ILLUMINANCE_REPORTED, attributes[ILLUMINANCE_MEASUREMENT]
-            )
-        if TVOC_MEASUREMENT in attributes:
-            self.endpoint.voc_level.update_attribute(
-                0x0000, attributes[TVOC_MEASUREMENT]
-            )
-        if TEMPERATURE in attributes:
-            self.endpoint.device_temperature.update_attribute(
-                0x0000, attributes[TEMPERATURE] * 100
-            )
+    def _route_attributes(self, attributes: dict[str, Any]) -> None:
+        """Send parsed attributes to their routes."""
+        if self._route_targets is None:
+            self._route_targets = {}
+
+        targets = self._route_targets
+        for key, value in attributes.items():
+            if key not in targets:
+                route = self.attribute_routes.get(key)
+                targets[key] = route and route.resolve(self)
+
+            target = targets[key]
+            if target is not None:
+                target(value)
 
     def _parse_aqara_attributes(self, value):
         """Parse non standard attributes."""
-        attributes = {}
-        attribute_names = {
-            1: BATTERY_VOLTAGE_MV,
-            3: TEMPERATURE,
-            4: XIAOMI_ATTR_4,
-            5: XIAOMI_ATTR_5,
-            6: XIAOMI_ATTR_6,
-            10: PATH,
-        }
+        attribute_names = AQARA_MODEL_ATTRIBUTE_NAMES.get(
+            self.endpoint.device.model, AQARA_ATTRIBUTE_NAMES
+        )
 
-        if self.endpoint.device.model in [
-            "lumi.sensor_ht",
-            "lumi.sens",
-            "lumi.weather",
-            "lumi.airmonitor.acn01",
-        ]:
-            # Temperature sensors send temperature/humidity/pressure updates trough this
-            # cluster instead of the respective clusters
-            attribute_names.update(
-                {
-                    100: TEMPERATURE_MEASUREMENT,
-                    101: HUMIDITY_MEASUREMENT,
-                    102: TVOC_MEASUREMENT
-                    if self.endpoint.device.model == "lumi.airmonitor.acn01"
-                    else PRESSURE_MEASUREMENT,
-                }
-            )
-        elif self.endpoint.device.model in [
-            "lumi.plug.maus01",
-            "lumi.relay.c2acn01",
-        ]:
-            attribute_names.update({149: CONSUMPTION, 150: VOLTAGE, 152: POWER})
-        elif self.endpoint.device.model == "lumi.sensor_motion.aq2":
-            attribute_names.update({11: ILLUMINANCE_MEASUREMENT})
-
-        result = {}
-
-        # Some attribute reports end with a stray null byte
-        while value not in (b"", b"\x00"):
-            skey = int(value[0])
-            svalue, value = foundation.TypeValue.deserialize(value[1:])
-            result[skey] = svalue.value
-        for item, val in result.items():
+        attributes = {}
+        for item, val in parse_aqara_tlv(value).items():
             key = (
                 attribute_names[item]
                 if item in attribute_names
@@ -517,6 +657,11 @@ class ElectricalMeasurementCluster(LocalDataCluster, ElectricalMeasurement):
         0x0604: 1,  # ac_power_multiplier
         0x0605: 1,  # ac_power_divisor
     }
+    _UPDATE_FILTERS = {
+        POWER_ID: SUPPRESS_UNCHANGED,
+        VOLTAGE_ID: SUPPRESS_UNCHANGED,
+        CONSUMPTION_ID: SUPPRESS_UNCHANGED,
+    }
 
     def __init__(self, *args, **kwargs):
         """Init."""
@@ -568,7 +713,7 @@ class OnOffCluster(OnOff, CustomCluster):
         *args,
         manufacturer: Optional[int | t.uint16_t] = None,
         expect_reply: bool = True,
-        tsn: Optional[int | t.uint8_t] = None
+        tsn: Optional[int | t.uint8_t] = None,
     ):
         """Command handler."""
         src_ep = 1
@@ -14,6 +14,7 @@ from zigpy.zcl.clusters.lighting import Color
 from zigpy.zdo.types import NodeDescriptor
 
 from zhaquirks import CustomCluster, PowerConfigurationCluster
+from zhaquirks.configuration import scheduled_configuration, write_attr_config
 from zhaquirks.const import (
     ALT_DOUBLE_PRESS,
     ALT_LONG_PRESS,
@@ -148,10 +149,11 @@ class OppleCluster(CustomCluster):
         self._current_state = None
         super().__init__(*args, **kwargs)
 
+    @scheduled_configuration
     async def bind(self):
         """Bind cluster."""
         result = await super().bind()
-        await self.write_attributes(self.attr_config, manufacturer=OPPLE_MFG_CODE)
+        await write_attr_config(self, self.attr_config, manufacturer=OPPLE_MFG_CODE)
         return result
 
 
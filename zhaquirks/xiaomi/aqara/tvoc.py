@@ -8,6 +8,7 @@ from zigpy.zcl.clusters.measurement import RelativeHumidity, TemperatureMeasurem
 from zigpy.zdo.types import NodeDescriptor
 
 from zhaquirks import Bus, LocalDataCluster, PowerConfigurationCluster
+from zhaquirks.configuration import scheduled_configuration
 from zhaquirks.const import (
     DEVICE_TYPE,
     ENDPOINTS,
@@ -53,6 +54,7 @@ class EmulatedTVOCMeasurement(LocalDataCluster):
         MEASURED_VALUE: ("measured_value", t.Single),
     }
 
+    @scheduled_configuration
     async def bind(self):
         """Bind cluster."""
         result = await self.endpoint.analog_input.bind()
@@ -1,5 +1,4 @@
 """Xiaomi mija button device."""
-import asyncio
 import logging
 
 from zigpy.profiles import zha
@@ -45,6 +44,7 @@ from zhaquirks.const import (
     UNKNOWN,
     ZHA_SEND_EVENT,
 )
+from zhaquirks.gestures import ButtonGestures
 from zhaquirks.xiaomi import (
     LUMI,
     XIAOMI_NODE_DESC,
@@ -82,8 +82,13 @@ class MijaButton(XiaomiQuickInitDevice):
         def __init__(self, *args, **kwargs):
             """Init."""
             self._current_state = {}
-            self._loop = asyncio.get_running_loop()
-            self._timer_handle = None
+            self.button_gestures = ButtonGestures(
+                self._click,
+                on_hold=self._hold_timeout,
+                on_release=self._release,
+                multi_click_s=0,
+                hold_s=self.hold_duration,
+            )
             super().__init__(*args, **kwargs)
 
         def _update_attribute(self, attrid, value):
@@ -94,18 +99,9 @@ class MijaButton(XiaomiQuickInitDevice):
                 value = not value
 
                 if value:
-                    if self._timer_handle:
-                        self._timer_handle.cancel()
-                    self._timer_handle = self._loop.call_later(
-                        self.hold_duration, self._hold_timeout
-                    )
+                    self.button_gestures.press(BUTTON)
                 else:
-                    if self._timer_handle:
-                        self._timer_handle.cancel()
-                        self._timer_handle = None
-                        click_type = COMMAND_SINGLE
-                    else:
-                        self.listener_event(ZHA_SEND_EVENT, COMMAND_RELEASE, [])
+                    self.button_gestures.release(BUTTON)
 
             # Handle Multi Clicks
             elif attrid == 32768:
@@ -118,12 +114,23 @@ class MijaButton(XiaomiQuickInitDevice):
 
             super()._update_attribute(attrid, value)
 
-        def _hold_timeout(self):
+        def _click(self, button, clicks, data):
+            """Handle a click released before the hold timeout."""
+
+            self.listener_event(
+                ZHA_SEND_EVENT, COMMAND_CLICK, {CLICK_TYPE: COMMAND_SINGLE}
+            )
+
+        def _hold_timeout(self, button, data):
             """Handle hold timeout."""
 
-            self._timer_handle = None
             self.listener_event(ZHA_SEND_EVENT, COMMAND_HOLD, [])
 
+        def _release(self, button, data):
+            """Handle release after hold."""
+
+            self.listener_event(ZHA_SEND_EVENT, COMMAND_RELEASE, [])
+
     signature = {
         # Endpoints:
         #   1: profile=0x104, device_type=DeviceType.DIMMER_SWITCH